@@ -0,0 +1,262 @@
+"""
+Per-agent health registry.
+
+Every AgentLog line (task worker START/DONE/RETRY/ERROR, manager review events)
+updates its agent's AgentHealth row in the same transaction: last seen, last tx,
+last error and the number of consecutive error-level lines. A batch of lines is
+folded per agent in Python and written with one executemany
+INSERT ... ON CONFLICT DO UPDATE, whose SET clause merges with the stored row
+(keeps the previous tx/error when the batch has none, and adds to the stored
+failure streak when every line in the batch is an error), so no row is read
+first. Committed updates are mirrored into an in-process registry, so
+/api/agent-status reads memory and only re-reads the small agent_health table
+(one SELECT) every few seconds to pick up writes made by other processes.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, case, event, func, select
+
+from change_counters import upsert
+from models import AgentHealth, AgentLog
+
+ERROR_LEVELS = ("error", "failed")
+REFRESH_SECONDS = 2.0
+_PENDING_KEY = "_agent_health_pending"
+
+
+def _is_error(level: str | None) -> bool:
+    return (level or "").strip().lower() in ERROR_LEVELS
+
+
+def _normalize_ts(ts: str | None) -> str | None:
+    if not ts:
+        return None
+    return ts.replace("+00:00", "Z")
+
+
+def _record_from_row(row) -> dict:
+    return {
+        "agent_name": row.agent_name,
+        "last_seen": row.last_seen,
+        "last_level": row.last_level,
+        "last_tx_id": row.last_tx_id,
+        "last_error": row.last_error,
+        "last_error_at": row.last_error_at,
+        "consecutive_failures": int(row.consecutive_failures or 0),
+    }
+
+
+def apply_log_line(record: dict | None, agent_name: str, created_at, level, hedera_tx_id, message, last_error) -> dict:
+    record = dict(record or {"agent_name": agent_name, "consecutive_failures": 0})
+    record["last_seen"] = created_at
+    record["last_level"] = level
+    if hedera_tx_id:
+        record["last_tx_id"] = hedera_tx_id
+    if _is_error(level):
+        record["last_error"] = (last_error or message or "")[:512] or None
+        record["last_error_at"] = created_at
+        record["consecutive_failures"] = int(record.get("consecutive_failures") or 0) + 1
+    else:
+        record["consecutive_failures"] = 0
+    return record
+
+
+class AgentHealthRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records: dict[str, dict] = {}
+        self._loaded_at = 0.0
+
+    def merge(self, records: dict[str, dict]):
+        with self._lock:
+            for agent_name, record in records.items():
+                current = self._records.get(agent_name)
+                # Keep whichever copy saw the later log line.
+                if current is None or (record.get("last_seen") or "") >= (current.get("last_seen") or ""):
+                    self._records[agent_name] = dict(record)
+
+    def snapshot(self, session, max_age: float = REFRESH_SECONDS) -> dict[str, dict]:
+        if time.monotonic() - self._loaded_at > max_age:
+            rows = session.execute(select(AgentHealth)).scalars().all()
+            self.merge({row.agent_name: _record_from_row(row) for row in rows})
+            self._loaded_at = time.monotonic()
+        with self._lock:
+            return {name: dict(record) for name, record in self._records.items()}
+
+    def get(self, agent_name: str) -> dict | None:
+        with self._lock:
+            record = self._records.get(agent_name)
+            return dict(record) if record else None
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._loaded_at = 0.0
+
+
+registry = AgentHealthRegistry()
+
+
+def status_for(agent_name: str, record: dict | None) -> dict:
+    if not record or not record.get("last_seen"):
+        health = "unknown"
+    else:
+        health = "degraded" if int(record.get("consecutive_failures") or 0) > 0 else "ok"
+    record = record or {}
+    return {
+        "agent": agent_name,
+        "health": health,
+        "last_seen": _normalize_ts(record.get("last_seen")),
+        # Only the Hedera-writing agents report a transaction id.
+        "last_tx": record.get("last_tx_id") if agent_name in ("LogbookAgent", "RewardAgent") else None,
+        "last_error": record.get("last_error"),
+        "consecutive_failures": int(record.get("consecutive_failures") or 0),
+    }
+
+
+def _persist(connection, record: dict):
+    table = AgentHealth.__table__
+    values = {key: record.get(key) for key in ("last_seen", "last_level", "last_tx_id", "last_error", "last_error_at")}
+    values["consecutive_failures"] = int(record.get("consecutive_failures") or 0)
+    values["updated_at"] = datetime.now(timezone.utc)
+    upsert(connection, table, {"agent_name": record["agent_name"]}, values)
+
+
+def rebuild_from_logs(session) -> int:
+    """Seed agent_health from existing AgentLog rows (first boot after upgrade)."""
+    records = {}
+    agent_names = [name for (name,) in session.execute(select(AgentLog.agent_name).distinct()).all()]
+    for agent_name in agent_names:
+        latest = session.execute(
+            select(AgentLog).where(AgentLog.agent_name == agent_name).order_by(AgentLog.id.desc()).limit(1)
+        ).scalar_one_or_none()
+        latest_error = session.execute(
+            select(AgentLog)
+            .where(AgentLog.agent_name == agent_name, AgentLog.level.in_(ERROR_LEVELS))
+            .order_by(AgentLog.id.desc())
+            .limit(1)
+        ).scalar_one_or_none()
+        latest_tx = session.execute(
+            select(AgentLog.hedera_tx_id)
+            .where(AgentLog.agent_name == agent_name, AgentLog.hedera_tx_id.isnot(None), AgentLog.hedera_tx_id != "")
+            .order_by(AgentLog.id.desc())
+            .limit(1)
+        ).scalar_one_or_none()
+        if latest is None:
+            continue
+        records[agent_name] = {
+            "agent_name": agent_name,
+            "last_seen": latest.created_at,
+            "last_level": latest.level,
+            "last_tx_id": latest_tx,
+            "last_error": (latest_error.last_error or latest_error.message) if latest_error else None,
+            "last_error_at": latest_error.created_at if latest_error else None,
+            "consecutive_failures": 1 if _is_error(latest.level) else 0,
+        }
+    connection = session.connection()
+    for record in records.values():
+        _persist(connection, record)
+    session.commit()
+    registry.merge(records)
+    return len(records)
+
+
+def _persist_batch(connection, batch: list[dict]):
+    """
+    One executemany upsert for per-agent batch summaries. Each summary is the
+    batch folded from an empty record; "carry" says every line was an error,
+    so the stored failure streak continues instead of restarting.
+    """
+    table = AgentHealth.__table__
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    stmt = dialect_insert(table)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(index_elements=["agent_name"], set_={
+        "last_seen": excluded.last_seen,
+        "last_level": excluded.last_level,
+        "last_tx_id": func.coalesce(excluded.last_tx_id, table.c.last_tx_id),
+        "last_error": func.coalesce(excluded.last_error, table.c.last_error),
+        "last_error_at": func.coalesce(excluded.last_error_at, table.c.last_error_at),
+        "consecutive_failures": excluded.consecutive_failures
+        + case((bindparam("carry") == 1, table.c.consecutive_failures), else_=0),
+        "updated_at": excluded.updated_at,
+    })
+    now = datetime.now(timezone.utc)
+    connection.execute(stmt, [
+        {
+            **{key: summary.get(key) for key in ("agent_name", "last_seen", "last_level", "last_tx_id",
+                                                  "last_error", "last_error_at")},
+            "consecutive_failures": int(summary.get("consecutive_failures") or 0),
+            "carry": 1 if summary["carry"] else 0,
+            "updated_at": now,
+        }
+        for summary in batch
+    ])
+
+
+def stage_log_lines(session, lines):
+    """
+    Fold AgentLog lines (dicts with the column values) into agent_health within
+    the session's transaction; the registry picks them up on commit.
+    """
+    lines = sorted(lines, key=lambda line: line.get("created_at") or "")
+    if not lines:
+        return
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    summaries: dict[str, dict] = {}
+    for line in lines:
+        agent_name = line["agent_name"]
+        fields = (agent_name, line.get("created_at"), line.get("level"), line.get("hedera_tx_id"),
+                  line.get("message"), line.get("last_error"))
+        summary = summaries.get(agent_name)
+        carry = summary["carry"] if summary else True
+        summaries[agent_name] = {**apply_log_line(summary, *fields), "carry": carry and _is_error(line.get("level"))}
+        # The registry copy may lag other processes by a refresh; the stored row is merged in SQL.
+        if agent_name not in pending:
+            pending[agent_name] = registry.get(agent_name)
+        pending[agent_name] = apply_log_line(pending[agent_name], *fields)
+
+    connection = session.connection()
+    if connection.dialect.name in ("sqlite", "postgresql"):
+        _persist_batch(connection, list(summaries.values()))
+        return
+    table = AgentHealth.__table__
+    for agent_name in summaries:
+        row = connection.execute(select(table).where(table.c.agent_name == agent_name)).first()
+        record = _record_from_row(row) if row else None
+        for line in lines:
+            if line["agent_name"] == agent_name:
+                record = apply_log_line(record, agent_name, line.get("created_at"), line.get("level"),
+                                        line.get("hedera_tx_id"), line.get("message"), line.get("last_error"))
+        _persist(connection, record)
+
+
+def install_session_hooks(session_factory):
+    @event.listens_for(session_factory, "after_flush")
+    def _update_agent_health(session, flush_context):
+        stage_log_lines(session, [
+            {
+                "agent_name": obj.agent_name, "created_at": obj.created_at, "level": obj.level,
+                "hedera_tx_id": obj.hedera_tx_id, "message": obj.message, "last_error": obj.last_error,
+            }
+            for obj in session.new if isinstance(obj, AgentLog)
+        ])
+
+    @event.listens_for(session_factory, "after_commit")
+    def _publish_agent_health(session):
+        pending = session.info.pop(_PENDING_KEY, None)
+        if pending:
+            registry.merge({name: record for name, record in pending.items() if record})
+
+    @event.listens_for(session_factory, "after_rollback")
+    def _discard_agent_health(session):
+        session.info.pop(_PENDING_KEY, None)
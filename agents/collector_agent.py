@@ -3,6 +3,7 @@ CollectorAgent: Basic validation + creates pipeline activity
 Now a lightweight stage-setter for the multi-agent pipeline.
 """
 
+from agents import task_compaction
 from extensions import db
 from models import Activity, AgentTask
 
@@ -13,7 +14,7 @@ def _enqueue_verifier_once(activity_id: int) -> bool:
         AgentTask.agent_name == "VerifierAgent",
         AgentTask.status.in_(["queued", "running", "done"])
     ).first()
-    if existing:
+    if existing or task_compaction.has_archived_task(db.session, activity_id, "VerifierAgent", statuses=("done",)):
         return False
 
     db.session.add(AgentTask(
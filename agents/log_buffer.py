@@ -0,0 +1,240 @@
+"""
+Write-buffered AgentLog writer.
+
+The task worker used to add one AgentLog row (plus a db.session.get(Activity)
+for the snapshot columns) inside every START/DONE/RETRY commit. Lines now go
+into an in-memory buffer that a background thread writes in batches: every
+VERICYCLE_AGENT_LOG_BATCH rows or VERICYCLE_AGENT_LOG_FLUSH_MS milliseconds,
+whichever comes first, as one executemany INSERT in one transaction, which also
+updates agent_health and bumps the "agent_logs" change counter.
+
+Snapshot columns (pipeline_stage, hedera_tx_id, last_error) come from the
+caller's Activity when its attributes are still loaded; otherwise (e.g. after
+a commit expired them) they are filled at flush time with one batched SELECT
+per flush, so they reflect the activity as of the flush, at most one flush
+interval later than the line itself.
+
+A flush whose transaction fails puts its rows back at the head of the buffer
+and the flusher retries with exponential backoff (up to RETRY_MAX_SECONDS).
+The buffer holds at most VERICYCLE_AGENT_LOG_MAX_BUFFERED rows (default 10000);
+only past that are the oldest lines dropped (logged, and counted in
+stats["dropped"]).
+
+VERICYCLE_AGENT_LOG_INFO_SAMPLE (0..1, default 1) keeps only that fraction of
+info-level lines; warnings and errors are always written.
+VERICYCLE_AGENT_LOG_BUFFER=0 restores synchronous writes.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import inspect, select
+
+from agents import agent_health
+from change_counters import SCOPE_AGENT_LOGS, touch_scopes
+from extensions import db
+from models import Activity, AgentLog
+
+SNAPSHOT_FIELDS = ("pipeline_stage", "hedera_tx_id", "last_error")
+RETRY_MAX_SECONDS = 30.0
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _loaded_snapshot(activity) -> dict | None:
+    """Snapshot fields from an already-loaded Activity, without triggering a refresh."""
+    if activity is None:
+        return None
+    loaded = inspect(activity).dict
+    if not all(field in loaded for field in SNAPSHOT_FIELDS):
+        return None
+    return {field: loaded.get(field) for field in SNAPSHOT_FIELDS}
+
+
+class AgentLogBuffer:
+    def __init__(self):
+        self.enabled = os.getenv("VERICYCLE_AGENT_LOG_BUFFER", "1").strip().lower() not in ("0", "false", "no")
+        self.batch_size = max(1, int(_env_float("VERICYCLE_AGENT_LOG_BATCH", 50)))
+        self.flush_seconds = max(0.01, _env_float("VERICYCLE_AGENT_LOG_FLUSH_MS", 500) / 1000.0)
+        self.info_sample = min(1.0, max(0.0, _env_float("VERICYCLE_AGENT_LOG_INFO_SAMPLE", 1.0)))
+        self.max_buffered = max(self.batch_size, int(_env_float("VERICYCLE_AGENT_LOG_MAX_BUFFERED", 10000)))
+        self._lock = threading.Lock()
+        self._rows: list[dict] = []
+        self._failures = 0
+        self._retry_at = 0.0
+        self._overflowing = False
+        self._wake = threading.Event()
+        self._thread = None
+        self._app = None
+        self.stats = {"lines": 0, "sampled_out": 0, "written": 0, "flushes": 0, "snapshot_queries": 0,
+                      "retries": 0, "dropped": 0}
+
+    def write(self, activity_id: int, agent_name: str, message: str, level: str = "info", activity=None, **explicit):
+        """
+        Queue one AgentLog line. Snapshot columns passed explicitly (pipeline_stage,
+        hedera_tx_id, last_error) are used as given; the rest come from `activity`
+        when it is loaded, else from the batched lookup at flush time.
+        """
+        level = level or "info"
+        self.stats["lines"] += 1
+        if level == "info" and self.info_sample < 1.0 and random.random() >= self.info_sample:
+            self.stats["sampled_out"] += 1
+            return
+
+        row = {
+            "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "activity_id": activity_id,
+            "agent_name": agent_name,
+            "level": level,
+            "message": (message or "")[:512],
+            **{field: explicit[field] for field in SNAPSHOT_FIELDS if field in explicit},
+        }
+        if any(field not in row for field in SNAPSHOT_FIELDS):
+            loaded = _loaded_snapshot(activity)
+            if loaded is None:
+                row["_needs_snapshot"] = True
+            else:
+                for field, value in loaded.items():
+                    row.setdefault(field, value)
+
+        if not self.enabled:
+            self._fill_snapshots([row])
+            db.session.add(AgentLog(**row))
+            return
+
+        self._ensure_started()
+        with self._lock:
+            self._rows.append(row)
+            dropped = self._trim_locked()
+            full = len(self._rows) >= self.batch_size
+        if dropped and not self._overflowing:
+            # Once per overflow episode; stats["dropped"] keeps the running total.
+            self._overflowing = True
+            print(f"[AGENT LOG] buffer over {self.max_buffered} lines, dropping the oldest", flush=True)
+        if full:
+            self._wake.set()
+
+    def _trim_locked(self) -> int:
+        """Drop the oldest rows past max_buffered. Caller holds self._lock."""
+        overflow = len(self._rows) - self.max_buffered
+        if overflow <= 0:
+            return 0
+        del self._rows[:overflow]
+        self.stats["dropped"] += overflow
+        return overflow
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        from flask import current_app
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._app = current_app._get_current_object()
+            self._thread = threading.Thread(target=self._run, name="agent-log-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            if time.monotonic() < self._retry_at:
+                continue
+            try:
+                with self._app.app_context():
+                    self.flush()
+            except Exception as e:
+                print(f"[AGENT LOG] flush failed: {type(e).__name__}: {e}", flush=True)
+
+    def _fill_snapshots(self, rows: list[dict]):
+        pending = [row for row in rows if row.pop("_needs_snapshot", False)]
+        if not pending:
+            return
+        ids = {row["activity_id"] for row in pending}
+        self.stats["snapshot_queries"] += 1
+        table = Activity.__table__
+        found = {
+            row_id: values
+            for row_id, *values in db.session.execute(
+                select(table.c.id, *[table.c[field] for field in SNAPSHOT_FIELDS]).where(table.c.id.in_(ids))
+            ).all()
+        }
+        for row in pending:
+            values = found.get(row["activity_id"])
+            for idx, field in enumerate(SNAPSHOT_FIELDS):
+                row.setdefault(field, values[idx] if values else None)
+
+    def flush(self) -> int:
+        """Write everything buffered so far in one transaction. Needs an app context."""
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return 0
+        try:
+            self._fill_snapshots(rows)
+            # One executemany INSERT; an ORM flush would insert row by row to fetch ids.
+            db.session.execute(AgentLog.__table__.insert(), rows)
+            agent_health.stage_log_lines(db.session, rows)
+            touch_scopes(db.session, {SCOPE_AGENT_LOGS})
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self._requeue(rows, e)
+            return 0
+        self._failures, self._retry_at, self._overflowing = 0, 0.0, False
+        self.stats["written"] += len(rows)
+        self.stats["flushes"] += 1
+        return len(rows)
+
+    def _requeue(self, rows: list[dict], error: Exception):
+        """Put a failed batch back ahead of newer lines and back the flusher off."""
+        self._failures += 1
+        delay = min(RETRY_MAX_SECONDS, self.flush_seconds * (2 ** self._failures))
+        self._retry_at = time.monotonic() + delay
+        self.stats["retries"] += 1
+        with self._lock:
+            self._rows[:0] = rows
+            dropped = self._trim_locked()
+        print(
+            f"[AGENT LOG] flush of {len(rows)} lines failed ({type(error).__name__}: {error}); "
+            f"retrying in {delay:.1f}s" + (f", dropped {dropped} oldest" if dropped else ""),
+            flush=True,
+        )
+
+    def discard(self) -> int:
+        """Drop buffered lines (demo reset recreates the tables underneath them)."""
+        with self._lock:
+            dropped, self._rows = len(self._rows), []
+        self._failures, self._retry_at = 0, 0.0
+        return dropped
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+
+buffer = AgentLogBuffer()
+
+
+def _flush_at_exit():
+    if buffer._app is not None and buffer.pending():
+        try:
+            with buffer._app.app_context():
+                buffer.flush()
+        except Exception:
+            pass
+
+
+atexit.register(_flush_at_exit)
@@ -0,0 +1,138 @@
+"""
+Time-based AgentLog retention.
+
+Lines older than VERICYCLE_AGENT_LOG_RETENTION_DAYS (default 14) are moved out
+of the database into gzip-compressed NDJSON files, one file per UTC day under
+artifacts/agent_logs/ (agent_log_YYYY-MM-DD.ndjson.gz). Each sweep appends a
+gzip member to the day's file, so repeated runs never rewrite earlier output.
+Rows are deleted only after their batch is on disk; a crash in between can
+duplicate lines in the archive but never lose them.
+
+Every gunicorn worker runs its own task thread, so a sweep holds an exclusive
+flock on archive_dir/.retention.lock from its first SELECT to its last commit.
+A process that finds the lock taken skips that sweep instead of archiving the
+same rows a second time (or interleaving its writes into the same file).
+
+The task worker calls run_if_due() every loop iteration; the sweep itself runs
+at most once per VERICYCLE_AGENT_LOG_RETENTION_INTERVAL_S (default 3600). The
+first sweep after boot waits a random 0-FIRST_RUN_JITTER_S seconds so workers
+started together do not all sweep at once.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes run a single process
+    fcntl = None
+
+from change_counters import SCOPE_AGENT_LOGS, touch_scopes
+from models import AgentLog
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ARCHIVE_DIR = os.path.join(ROOT, "artifacts", "agent_logs")
+RETENTION_DAYS = int(os.getenv("VERICYCLE_AGENT_LOG_RETENTION_DAYS", "14"))
+INTERVAL_SECONDS = float(os.getenv("VERICYCLE_AGENT_LOG_RETENTION_INTERVAL_S", "3600"))
+BATCH_SIZE = 1000
+FIRST_RUN_JITTER_S = 300.0
+
+COLUMNS = ("id", "created_at", "activity_id", "agent_name", "level", "message",
+           "pipeline_stage", "hedera_tx_id", "last_error")
+
+_next_run: float | None = None
+
+
+def _cutoff(now: datetime, days: int) -> str:
+    # created_at is an ISO-8601 UTC string, so string order is time order.
+    return (now - timedelta(days=days)).isoformat().replace("+00:00", "Z")
+
+
+def _append_archive(archive_dir: str, rows) -> None:
+    by_day: dict[str, list[dict]] = {}
+    for row in rows:
+        record = {column: row[column] for column in COLUMNS}
+        by_day.setdefault((record["created_at"] or "unknown")[:10], []).append(record)
+    os.makedirs(archive_dir, exist_ok=True)
+    for day, records in sorted(by_day.items()):
+        path = os.path.join(archive_dir, f"agent_log_{day}.ndjson.gz")
+        with gzip.open(path, "at", encoding="utf-8") as fh:
+            for record in records:
+                fh.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+@contextmanager
+def _sweep_lock(archive_dir: str):
+    """Yield True while holding the cross-process sweep lock, False if another process has it."""
+    os.makedirs(archive_dir, exist_ok=True)
+    with open(os.path.join(archive_dir, ".retention.lock"), "a") as lock_file:
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def archive_expired_logs(session, now: datetime | None = None, retention_days: int = RETENTION_DAYS,
+                         archive_dir: str = ARCHIVE_DIR, batch_size: int = BATCH_SIZE) -> int:
+    """Archive and delete AgentLog rows older than the retention window. Returns rows moved."""
+    with _sweep_lock(archive_dir) as acquired:
+        if not acquired:
+            return 0
+        # Start a fresh transaction so rows the previous lock holder deleted are not seen.
+        session.commit()
+        return _archive_batches(session, _cutoff(now or datetime.now(timezone.utc), retention_days),
+                                archive_dir, batch_size)
+
+
+def _archive_batches(session, cutoff: str, archive_dir: str, batch_size: int) -> int:
+    table = AgentLog.__table__
+    moved = 0
+    while True:
+        rows = session.execute(
+            select(*[table.c[column] for column in COLUMNS])
+            .where(table.c.created_at < cutoff)
+            .order_by(table.c.created_at.asc(), table.c.id.asc())
+            .limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            break
+        _append_archive(archive_dir, rows)
+        session.execute(delete(table).where(table.c.id.in_([row["id"] for row in rows])))
+        # Bulk deletes skip the flush hooks.
+        touch_scopes(session, [SCOPE_AGENT_LOGS])
+        session.commit()
+        moved += len(rows)
+        if len(rows) < batch_size:
+            break
+    return moved
+
+
+def run_if_due(session, interval: float = INTERVAL_SECONDS) -> int:
+    global _next_run
+    now = time.monotonic()
+    if _next_run is None:
+        _next_run = now + random.uniform(0, min(interval, FIRST_RUN_JITTER_S))
+    if now < _next_run:
+        return 0
+    _next_run = now + interval
+    moved = archive_expired_logs(session)
+    if moved:
+        print(f"[AGENT LOG] Archived {moved} log lines older than {RETENTION_DAYS} days to {ARCHIVE_DIR}", flush=True)
+    return moved
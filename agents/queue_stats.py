@@ -0,0 +1,118 @@
+"""
+Single-pass AgentTask queue statistics.
+
+One GROUP BY (status, agent_name) query yields the status totals, the
+stalled-running count, per-agent depth and the oldest queued task's age; a
+GROUP BY status over agent_task_archive adds the tasks compaction moved out to
+the done/failed totals. The task worker refreshes the snapshot every few
+seconds and /api/admin/queue serves it from memory; the snapshot is stamped
+with the "tasks" change counter, so a task commit from any process makes the
+next read recompute it, while activity or signal commits do not.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import case, func, select
+
+from change_counters import SCOPE_TASKS, current_versions
+from models import AgentTask, AgentTaskArchive
+
+STATUSES = ("queued", "running", "failed", "done", "dead_letter")
+STALL_AFTER = timedelta(minutes=3)
+REFRESH_SECONDS = 5.0
+
+
+def _as_utc(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def compute_queue_stats(session, now: datetime | None = None) -> dict:
+    now = now or datetime.now(timezone.utc)
+    stall_cutoff = now - STALL_AFTER
+    rows = session.execute(
+        select(
+            AgentTask.status,
+            AgentTask.agent_name,
+            func.count(AgentTask.id),
+            func.min(AgentTask.created_at),
+            func.sum(case((AgentTask.updated_at < stall_cutoff, 1), else_=0)),
+        ).group_by(AgentTask.status, AgentTask.agent_name)
+    ).all()
+
+    totals = {status: 0 for status in STATUSES}
+    for status, count in session.execute(
+        select(AgentTaskArchive.status, func.count(AgentTaskArchive.id)).group_by(AgentTaskArchive.status)
+    ).all():
+        totals[status] = totals.get(status, 0) + int(count or 0)
+    per_agent: dict[str, dict] = {}
+    stalled_running = 0
+    oldest_queued = None
+    for status, agent_name, count, oldest_created, stale in rows:
+        status = status or "unknown"
+        totals[status] = totals.get(status, 0) + int(count or 0)
+        agent = per_agent.setdefault(agent_name, {
+            "queued": 0, "running": 0, "stalled_running": 0, "oldest_queued_age_seconds": None,
+        })
+        if status in ("queued", "running"):
+            agent[status] += int(count or 0)
+        if status == "running":
+            stalled_running += int(stale or 0)
+            agent["stalled_running"] += int(stale or 0)
+        if status == "queued" and oldest_created is not None:
+            oldest_created = _as_utc(oldest_created)
+            agent["oldest_queued_age_seconds"] = round(max(0.0, (now - oldest_created).total_seconds()), 1)
+            if oldest_queued is None or oldest_created < oldest_queued:
+                oldest_queued = oldest_created
+
+    return {
+        **totals,
+        "stalled_running": stalled_running,
+        "oldest_queued_age_seconds": (
+            round(max(0.0, (now - oldest_queued).total_seconds()), 1) if oldest_queued else None
+        ),
+        "per_agent": per_agent,
+        "computed_at": now.isoformat().replace("+00:00", "Z"),
+    }
+
+
+class QueueStatsSnapshot:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict | None = None
+        self._version = None
+        self._computed_at = 0.0
+
+    def refresh(self, session) -> dict:
+        version = current_versions(session, [SCOPE_TASKS])[SCOPE_TASKS]
+        stats = compute_queue_stats(session)
+        with self._lock:
+            self._stats, self._version, self._computed_at = stats, version, time.monotonic()
+        return stats
+
+    def refresh_if_due(self, session, interval: float = REFRESH_SECONDS):
+        if time.monotonic() - self._computed_at >= interval:
+            self.refresh(session)
+
+    def get(self, session, max_age: float = REFRESH_SECONDS) -> dict:
+        """Memory copy while it matches the current tasks version and is recent; else recompute."""
+        version = current_versions(session, [SCOPE_TASKS])[SCOPE_TASKS]
+        with self._lock:
+            fresh = (
+                self._stats is not None
+                and self._version == version
+                and time.monotonic() - self._computed_at < max_age
+            )
+            if fresh:
+                return dict(self._stats)
+        return dict(self.refresh(session))
+
+
+snapshot = QueueStatsSnapshot()
@@ -6,7 +6,7 @@ Credits rewards to user and submits real HTS transfer when available.
 import os
 import re
 import subprocess
-import requests
+
 from extensions import db
 from models import Activity, User, AgentTask, AgentCommerceEvent
 
@@ -122,6 +122,8 @@ def _get_available_token_balance(account_id: str, token_id: str, timeout_sec: in
     if not account_id or not token_id:
         return None
 
+    import requests
+
     url = f"https://testnet.mirrornode.hedera.com/api/v1/tokens/{token_id}/balances"
     params = {"account.id": account_id, "limit": 1}
     response = requests.get(url, params=params, timeout=timeout_sec)
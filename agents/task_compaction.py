@@ -0,0 +1,212 @@
+"""
+Compaction of finished AgentTask rows.
+
+Every activity leaves one finished task per pipeline agent (more with retries)
+in agent_task, which the worker's pick query, the queue stats and the proof
+bundle all read. Tasks that finished (done/failed) more than
+VERICYCLE_TASK_COMPACT_AFTER_DAYS (default 7) ago are copied to
+agent_task_archive and removed from agent_task; the latest archived task per
+agent is folded into activity_task_summary, which proof bundles and the admin
+activity list merge with any live tasks. Tasks referenced by a dead-letter
+entry stay put, since requeueing reuses the original row. Archive rows have
+their own key and keep the task's id in original_id, so an id that SQLite hands
+out again after compaction never collides with an archived one.
+
+Like log retention, a sweep holds an exclusive flock on
+artifacts/.task_compaction.lock so only one gunicorn worker's task thread
+compacts at a time; the others skip that sweep. The task worker calls
+run_if_due() every loop iteration; the sweep itself runs at most once per
+VERICYCLE_TASK_COMPACT_INTERVAL_S (default 3600), and the first one after boot
+waits a random 0-FIRST_RUN_JITTER_S seconds.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes run a single process
+    fcntl = None
+
+from change_counters import SCOPE_PIPELINE, SCOPE_TASKS, touch_scopes
+from models import ActivityTaskSummary, AgentTask, AgentTaskArchive, DeadLetterTask
+
+FINISHED_STATUSES = ("done", "failed")
+COMPACT_AFTER_DAYS = int(os.getenv("VERICYCLE_TASK_COMPACT_AFTER_DAYS", "7"))
+INTERVAL_SECONDS = float(os.getenv("VERICYCLE_TASK_COMPACT_INTERVAL_S", "3600"))
+BATCH_SIZE = 500
+FIRST_RUN_JITTER_S = 300.0
+LOCK_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "artifacts", ".task_compaction.lock")
+
+ARCHIVE_COLUMNS = ("id", "activity_id", "agent_name", "task_type", "status", "attempts",
+                   "last_error", "created_at", "updated_at")
+
+_next_run: float | None = None
+
+
+def _entry(task) -> dict:
+    return {
+        "id": task["id"],
+        "agent": task["agent_name"],
+        "status": task["status"],
+        "attempts": task["attempts"],
+        "last_error": task["last_error"],
+    }
+
+
+def _merge_entries(entries: list[dict], tasks) -> list[dict]:
+    """
+    Keep the latest task per agent. Tasks in this batch finished after anything
+    an earlier sweep archived, so they replace it even when SQLite reused a
+    lower id; within the batch the highest id wins.
+    """
+    by_agent = {entry["agent"]: entry for entry in entries}
+    batch: dict[str, dict] = {}
+    for task in tasks:
+        entry = _entry(task)
+        current = batch.get(entry["agent"])
+        if current is None or entry["id"] > current["id"]:
+            batch[entry["agent"]] = entry
+    by_agent.update(batch)
+    return sorted(by_agent.values(), key=lambda entry: entry["id"])
+
+
+@contextmanager
+def _sweep_lock(lock_path: str):
+    """Yield True while holding the cross-process compaction lock, False if another process has it."""
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, "a") as lock_file:
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def compact_finished_tasks(session, now: datetime | None = None, older_than_days: int = COMPACT_AFTER_DAYS,
+                           batch_size: int = BATCH_SIZE, lock_path: str = LOCK_PATH) -> int:
+    """Move finished tasks older than the threshold into the archive. Returns tasks moved."""
+    with _sweep_lock(lock_path) as acquired:
+        if not acquired:
+            return 0
+        # Start a fresh transaction so tasks the previous lock holder moved are not seen.
+        session.commit()
+        return _compact_batches(session, now or datetime.now(timezone.utc), older_than_days, batch_size)
+
+
+def _compact_batches(session, now: datetime, older_than_days: int, batch_size: int) -> int:
+    cutoff = now - timedelta(days=older_than_days)
+    tasks = AgentTask.__table__
+    archive = AgentTaskArchive.__table__
+    summaries = ActivityTaskSummary.__table__
+    moved = 0
+    while True:
+        rows = session.execute(
+            select(*[tasks.c[column] for column in ARCHIVE_COLUMNS])
+            .where(
+                tasks.c.status.in_(FINISHED_STATUSES),
+                tasks.c.updated_at < cutoff,
+                tasks.c.id.notin_(select(DeadLetterTask.task_id)),
+            )
+            .order_by(tasks.c.id.asc())
+            .limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            break
+
+        by_activity: dict[int, list] = {}
+        for row in rows:
+            by_activity.setdefault(row["activity_id"], []).append(row)
+        existing = {
+            row.activity_id: row
+            for row in session.execute(
+                select(summaries).where(summaries.c.activity_id.in_(list(by_activity)))
+            ).all()
+        }
+        for activity_id, activity_rows in by_activity.items():
+            current = existing.get(activity_id)
+            entries = _merge_entries(json.loads(current.agents_json) if current else [], activity_rows)
+            values = {
+                "agents_json": json.dumps(entries, separators=(",", ":")),
+                "archived_task_count": (current.archived_task_count if current else 0) + len(activity_rows),
+                "updated_at": now,
+            }
+            if current:
+                session.execute(summaries.update().where(summaries.c.activity_id == activity_id).values(**values))
+            else:
+                session.execute(summaries.insert().values(activity_id=activity_id, **values))
+
+        session.execute(archive.insert(), [
+            {**{column: row[column] for column in ARCHIVE_COLUMNS if column != "id"},
+             "original_id": row["id"], "archived_at": now}
+            for row in rows
+        ])
+        session.execute(delete(tasks).where(tasks.c.id.in_([row["id"] for row in rows])))
+        # Core writes skip the flush hooks.
+        touch_scopes(session, [SCOPE_PIPELINE, SCOPE_TASKS])
+        session.commit()
+        moved += len(rows)
+        if len(rows) < batch_size:
+            break
+    return moved
+
+
+def archived_entries(session, activity_ids) -> dict[int, list[dict]]:
+    """activity_id -> archived latest-per-agent entries, for the given activities."""
+    activity_ids = list({int(activity_id) for activity_id in activity_ids})
+    if not activity_ids:
+        return {}
+    rows = session.execute(
+        select(ActivityTaskSummary.activity_id, ActivityTaskSummary.agents_json)
+        .where(ActivityTaskSummary.activity_id.in_(activity_ids))
+    ).all()
+    return {activity_id: json.loads(agents_json or "[]") for activity_id, agents_json in rows}
+
+
+def latest_by_agent(archived: list[dict], live_tasks) -> dict[str, dict]:
+    """Archived entries overlaid with live AgentTask rows (ordered by id), newest task per agent."""
+    result = {entry["agent"]: entry for entry in archived or []}
+    for task in live_tasks:
+        result[task.agent_name] = {
+            "id": task.id,
+            "agent": task.agent_name,
+            "status": task.status,
+            "attempts": task.attempts,
+            "last_error": task.last_error,
+        }
+    return result
+
+
+def has_archived_task(session, activity_id: int, agent_name: str, statuses=FINISHED_STATUSES) -> bool:
+    entries = archived_entries(session, [activity_id]).get(int(activity_id), [])
+    return any(entry["agent"] == agent_name and entry["status"] in statuses for entry in entries)
+
+
+def run_if_due(session, interval: float = INTERVAL_SECONDS) -> int:
+    global _next_run
+    now = time.monotonic()
+    if _next_run is None:
+        _next_run = now + random.uniform(0, min(interval, FIRST_RUN_JITTER_S))
+    if now < _next_run:
+        return 0
+    _next_run = now + interval
+    moved = compact_finished_tasks(session)
+    if moved:
+        print(f"[WORKER] Compacted {moved} finished tasks older than {COMPACT_AFTER_DAYS} days", flush=True)
+    return moved
@@ -2,8 +2,10 @@ import time
 from datetime import datetime, timezone, timedelta
 from sqlalchemy import case, or_
 
+import metrics
 from extensions import db
-from models import AgentTask, AgentLog, Activity, DeadLetterTask
+from models import AgentTask, Activity, DeadLetterTask
+from agents import log_buffer, log_retention, queue_stats, task_compaction
 from agents.collector_agent import CollectorAgent
 from agents.verifier_agent import VerifierAgent
 from agents.logbook_agent import LogbookAgent
@@ -21,19 +23,8 @@ AGENT_MAP = {
 BACKOFF_SECONDS = [5, 20, 60]
 
 
-def _log(activity_id: int, agent_name: str, message: str, level: str = "info"):
-    ts = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-    activity = db.session.get(Activity, activity_id)
-    db.session.add(AgentLog(
-        created_at=ts,
-        activity_id=activity_id,
-        agent_name=agent_name,
-        level=level,
-        message=message[:512],
-        pipeline_stage=getattr(activity, "pipeline_stage", None) if activity else None,
-        hedera_tx_id=getattr(activity, "hedera_tx_id", None) if activity else None,
-        last_error=getattr(activity, "last_error", None) if activity else None,
-    ))
+def _log(activity_id: int, agent_name: str, message: str, level: str = "info", activity=None):
+    log_buffer.buffer.write(activity_id, agent_name, message, level=level, activity=activity)
 
 
 def _schedule_retry(task: AgentTask, reason: str):
@@ -50,6 +41,7 @@ def _schedule_retry(task: AgentTask, reason: str):
             status="open",
         ))
         _log(task.activity_id, task.agent_name, f"DEAD_LETTER attempts={attempts} reason={task.last_error}", level="error")
+        metrics.registry.inc("vericycle_agent_task_dead_letters_total", {"agent": task.agent_name})
         return
 
     wait_seconds = BACKOFF_SECONDS[min(max(attempts - 1, 0), len(BACKOFF_SECONDS) - 1)]
@@ -57,16 +49,44 @@ def _schedule_retry(task: AgentTask, reason: str):
     task.last_error = (reason or "retry scheduled")[:512]
     task.next_run_at = datetime.now(timezone.utc) + timedelta(seconds=wait_seconds)
     _log(task.activity_id, task.agent_name, f"RETRY attempts={attempts} backoff={wait_seconds}s reason={task.last_error}", level="warn")
+    metrics.registry.inc("vericycle_agent_task_retries_total", {"agent": task.agent_name})
+
+
+def _retry_outcome(task: AgentTask) -> str:
+    """Metrics outcome after _schedule_retry(): "retry" or "dead_letter"."""
+    return "retry" if task.status == "queued" else task.status
+
 
 def run_worker_loop(poll_interval=1.0):
     print("[WORKER] AgentTask worker loop started", flush=True)
 
     # import app lazily to avoid circular imports during module import
-    from app import app
+    from app import app, run_demo_maintenance_if_due
 
     while True:
         try:
             with app.app_context():
+                try:
+                    queue_stats.snapshot.refresh_if_due(db.session)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[WORKER] Queue stats refresh skipped: {type(e).__name__}: {e}", flush=True)
+                try:
+                    log_retention.run_if_due(db.session)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[WORKER] Agent log retention skipped: {type(e).__name__}: {e}", flush=True)
+                try:
+                    task_compaction.run_if_due(db.session)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[WORKER] Task compaction skipped: {type(e).__name__}: {e}", flush=True)
+                try:
+                    run_demo_maintenance_if_due()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[WORKER] Demo maintenance skipped: {type(e).__name__}: {e}", flush=True)
+
                 # Only pick queued tasks; done/failed/running tasks are never re-executed
                 priority_order = case(
                     (AgentTask.agent_name == "CollectorAgent", 1),
@@ -98,7 +118,7 @@ def run_worker_loop(poll_interval=1.0):
                     if not activity or activity.status in ("failed", "rejected") or activity.pipeline_stage in ("failed", "rejected"):
                         task.status = "done"
                         task.last_error = "Skipped: activity terminal state"
-                        _log(task.activity_id, task.agent_name, task.last_error)
+                        _log(task.activity_id, task.agent_name, task.last_error, activity=activity)
                         db.session.commit()
                         continue
 
@@ -106,31 +126,39 @@ def run_worker_loop(poll_interval=1.0):
                     if not agent:
                         task.status = "failed"
                         task.last_error = f"Unknown agent: {task.agent_name}"
-                        _log(task.activity_id, task.agent_name, task.last_error, level="error")
+                        _log(task.activity_id, task.agent_name, task.last_error, level="error", activity=activity)
                         db.session.commit()
+                        metrics.record_task(task.agent_name, "failed", 0.0)
                     else:
                         print(f"[WORKER] Running task_id={task.id} agent={task.agent_name} activity_id={task.activity_id}", flush=True)
-                        _log(task.activity_id, task.agent_name, f"START task_id={task.id}")
+                        _log(task.activity_id, task.agent_name, f"START task_id={task.id}", activity=activity)
                         db.session.commit()
 
                         run_result = None
+                        outcome = "error"
+                        started = time.perf_counter()
                         try:
                             run_result = agent.process(task.activity_id)
                             if run_result is False:
                                 _schedule_retry(task, "Agent returned False")
+                                outcome = _retry_outcome(task)
                                 db.session.commit()
                                 continue
                         except Exception as e:
                             _schedule_retry(task, f"{type(e).__name__}: {str(e)}")
-                            _log(task.activity_id, task.agent_name, f"ERROR {type(e).__name__}: {str(e)}", level="error")
+                            outcome = _retry_outcome(task)
+                            _log(task.activity_id, task.agent_name, f"ERROR {type(e).__name__}: {str(e)}", level="error", activity=activity)
                             db.session.commit()
                             print(f"[WORKER TASK ERROR] task_id={task.id} {type(e).__name__}: {e}", flush=True)
                         finally:
                             if task.status == "running":
                                 task.status = "done"
                                 task.last_error = None
-                                _log(task.activity_id, task.agent_name, f"DONE result={run_result}")
+                                _log(task.activity_id, task.agent_name, f"DONE result={run_result}", activity=activity)
                                 db.session.commit()
+                            if outcome == "error" and task.status in ("done", "failed"):
+                                outcome = task.status
+                            metrics.record_task(task.agent_name, outcome, time.perf_counter() - started)
 
             # Sleep between polls
             time.sleep(poll_interval)
@@ -19,17 +19,19 @@ Tools Used:
 ================================================================================
 """
 
+import boot_profiler
+boot_profiler.install()  # import/boot-step timing when VERICYCLE_BOOT_PROFILE=1
+
 from dotenv import load_dotenv
 load_dotenv() 
 
-from flask import Flask, render_template, request, redirect, url_for, send_file, flash, jsonify, abort
+from flask import Flask, render_template, request, redirect, url_for, send_file, flash, jsonify, abort, Response, stream_with_context, make_response
 from datetime import datetime, timezone, date, timedelta
 from flask_login import login_user, login_required, logout_user, current_user
 import io
 import zipfile
 import subprocess
 import os 
-import requests
 import json
 import hashlib
 import hmac
@@ -38,12 +40,21 @@ import uuid
 import re 
 import math
 import threading
+import time
+from functools import wraps
 from typing import Any, cast
 from collections import defaultdict
+from types import SimpleNamespace
 from sqlalchemy.exc import OperationalError
-from sqlalchemy import text, func, or_
+from sqlalchemy import text, func, or_, event, inspect as sa_inspect
+from sqlalchemy.orm import selectinload, joinedload, load_only
 from urllib.parse import quote, urlencode
 from werkzeug.exceptions import HTTPException
+import db_config
+import sql_profiler
+import metrics
+import request_profiler
+from db_config import read_replica
 
 # -----------------------------------------------------------------
 # 1. APP CONFIGURATION
@@ -65,9 +76,7 @@ DEMO_MODE = os.getenv("DEMO_MODE", "0") == "1"
 _is_prod = os.getenv('FLASK_ENV') == 'production' or os.getenv('RENDER') == 'true'
 _database_url = (os.getenv('DATABASE_URL') or '').strip()
 if _database_url:
-    if _database_url.startswith('postgres://'):
-        _database_url = _database_url.replace('postgres://', 'postgresql://', 1)
-    app.config['SQLALCHEMY_DATABASE_URI'] = _database_url
+    app.config['SQLALCHEMY_DATABASE_URI'] = db_config.normalize_url(_database_url)
 else:
     # Render hackathon parity: allow demo boot without a managed database.
     if _is_prod and DEMO_MODE:
@@ -75,6 +84,10 @@ else:
     else:
         app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'vericycle.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Bounded pool, WAL/busy-timeout pragmas for SQLite, optional read replica (see db_config.py)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = db_config.engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+app.config['SQLALCHEMY_BINDS'] = db_config.binds()
+db_config.install()
 
 # Session / cookie security
 _network_raw = (os.getenv('NETWORK') or 'testnet').strip().lower()
@@ -109,6 +122,13 @@ from extensions import db, bcrypt, login_manager
 
 # Initialize extensions with the app
 db.init_app(app)
+db_config.init_replica_routing(app, db)
+sql_profiler.profiler.install(app)
+metrics.install(app)
+# Real admins only: the open admin-monitor demo policy does not extend to profiling.
+request_profiler.profiler.install(
+    app, lambda: current_user.is_authenticated and is_admin_user(current_user)
+)
 bcrypt.init_app(app)
 login_manager.init_app(app)
 
@@ -116,12 +136,15 @@ login_manager.init_app(app)
 
 # Start the task worker thread (run in background thread with app context)
 import os
+import sys
 import threading
-from agents.task_worker import run_worker_loop
 
 
 def start_worker_background():
     def _run():
+        # Imported here so the agent modules load on the worker thread, not on the boot path.
+        from agents.task_worker import run_worker_loop
+
         with app.app_context():
             print("[BACKEND] Worker thread entering app context", flush=True)
             run_worker_loop()
@@ -130,11 +153,53 @@ def start_worker_background():
     t.start()
     print("[BACKEND] Task worker thread started (daemon=True)", flush=True)
 
+
+# Under `gunicorn --preload` (gunicorn.conf.py sets VERICYCLE_PRELOAD=1) the
+# master imports this module once and forks the web workers from it, sharing
+# the loaded code copy-on-write. Threads don't survive fork, so in that mode
+# nothing starts here: each worker calls start_runtime() from post_fork.
+PRELOADED = os.getenv("VERICYCLE_PRELOAD", "0") == "1"
+_runtime_started = False
+
+
+def _runtime_wanted() -> bool:
+    """
+    False for processes that only run a command: `flask --app app migrate` (or
+    shell, routes, ...) imports this module too, and a task worker running there
+    would touch a half-migrated schema while the backfills commit. `flask run`
+    still gets its worker. VERICYCLE_RUNTIME=0 opts out explicitly.
+    """
+    if os.getenv("VERICYCLE_RUNTIME", "1").strip().lower() in ("0", "false", "no"):
+        return False
+    script = sys.argv[0] if sys.argv else ""
+    is_flask_cli = os.path.basename(script) in ("flask", "flask.exe") or script.endswith(
+        os.path.join("flask", "__main__.py")
+    )
+    return not is_flask_cli or "run" in sys.argv[1:]
+
+
+def start_runtime():
+    """Start this process's background runtime (the task worker thread). Idempotent."""
+    global _runtime_started
+    if _runtime_started:
+        return
+    _runtime_started = True
+    start_worker_background()
+
+
+def create_app():
+    """WSGI factory (`gunicorn 'app:create_app()'`): the app, with its runtime started unless preloading."""
+    if not PRELOADED:
+        start_runtime()
+    return app
+
+
 # Start the background worker for both direct-run and Gunicorn deployments.
 # WERKZEUG_RUN_MAIN guard prevents a double-start when the Werkzeug reloader
 # forks a child process (only relevant to `python app.py` with reload enabled).
-if os.environ.get("WERKZEUG_RUN_MAIN") != "true":
-    start_worker_background()
+if not PRELOADED and os.environ.get("WERKZEUG_RUN_MAIN") != "true" and _runtime_wanted():
+    with boot_profiler.step("start task worker thread"):
+        start_runtime()
 
 login_manager_any = cast(Any, login_manager)
 login_manager_any.login_view = 'home'
@@ -145,11 +210,63 @@ login_manager_any.login_message_category = None
 # 3. DATABASE MODEL
 # - Define `User` and `Activity` models used across routes.
 # -----------------------------------------------------------------
-from models import User, Activity, Location, WasteSchedule, HouseholdProfile, PickupEvent, AgentLog, AgentTask, AgentCommerceEvent, DeadLetterTask, AdminAuditLog, VerificationSignal, PickupOpportunity, OpportunityAssignment, WalletTransaction
+from models import User, Activity, Location, WasteSchedule, HouseholdProfile, PickupEvent, AgentLog, AgentTask, AgentCommerceEvent, DeadLetterTask, AdminAuditLog, VerificationSignal, PickupOpportunity, OpportunityAssignment, WalletTransaction, CommunityHotspot, NeighborhoodDailyKg, AgentHealth
 from extensions import db as _db  # ensure db is available for seed helper
 from agents.proof_utils import build_proof_hash
-from demo_profile import DEMO_PROFILES, apply_demo_profile, profile_health
 from security_utils import encrypt_text, decrypt_text
+from event_stream import ADMIN_CHANNEL, install_session_hooks as install_event_stream_hooks, stream_events, user_channel
+
+from change_counters import SCOPE_AGENT_LOGS, SCOPE_HOTSPOTS, SCOPE_PIPELINE, SCOPE_TASKS, current_versions, etag_for_versions, user_scope
+from change_counters import install_session_hooks as install_change_counter_hooks, touch_scopes, atomic_increment
+from computation_cache import cache as computation_cache, cached
+import migrations
+import queries
+from agents import agent_health, log_buffer, queue_stats, task_compaction
+
+# Committed stage/queue transitions feed the live event stream (see /api/events/stream).
+install_event_stream_hooks(db.session)
+# Every flush bumps per-scope change counters used for conditional GETs.
+install_change_counter_hooks(db.session)
+# AgentLog writes keep the per-agent health rows behind /api/agent-status current.
+agent_health.install_session_hooks(db.session)
+
+
+def conditional_get(scopes_fn, time_bucket_seconds: int | None = None):
+    """
+    Answer If-None-Match with 304 from the per-scope change counters before the
+    wrapped view runs. scopes_fn returns the scopes the payload depends on, or
+    None to skip the check for this request. Time-dependent payloads pass a
+    bucket size so their ETag also rolls over with the clock.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            scopes = scopes_fn()
+            if scopes is None:
+                return view(*args, **kwargs)
+            try:
+                versions = current_versions(db.session, scopes)
+            except Exception as e:
+                db.session.rollback()
+                print(f"[ETAG] change counters unavailable: {e}", flush=True)
+                return view(*args, **kwargs)
+
+            extra = [request.full_path, current_user.get_id() if current_user.is_authenticated else "anon"]
+            if time_bucket_seconds:
+                extra.append(int(time.time() // time_bucket_seconds))
+            etag = etag_for_versions(request.endpoint or view.__name__, versions, *extra)
+
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
 
 
 def stable_proof_input(bundle: dict) -> dict:
@@ -894,6 +1011,7 @@ def calculate_demo_reward_amount(material_type: str | None, weight_kg: float | i
     return round(safe_weight * payout_rate_per_kg, 2)
 
 
+@cached(tags=lambda user: [user_scope(user.id)], key=lambda user: user.id)
 def build_rewards_wallet_snapshot(user: User) -> dict:
     rows = (
         Activity.query
@@ -920,15 +1038,6 @@ def build_rewards_wallet_snapshot(user: User) -> dict:
             return False
         return bool(states & {"verified", "anchored", "completed", "logged", "rewarded", "attested", "paid"})
 
-    def parse_activity_dt(activity: Activity):
-        raw = (activity.timestamp or "").strip()
-        if not raw:
-            return None
-        try:
-            return datetime.fromisoformat(raw.replace("Z", "+00:00"))
-        except Exception:
-            return None
-
     balance = 0.0
     total_earned = 0.0
     verified_events = 0
@@ -968,7 +1077,7 @@ def build_rewards_wallet_snapshot(user: User) -> dict:
         fallback_proof_url = f"/api/proof-bundle/{row.id}"
 
         history_rows.append({
-            "created_at": parse_activity_dt(row),
+            "created_at": parse_utc_timestamp(row.timestamp_utc),
             "date": row.timestamp,
             "activity": row.desc or "Verified recycling activity",
             "status": status_text,
@@ -1130,6 +1239,170 @@ def parse_weight_kg_from_text(text_value: str | None) -> float:
         return 0.0
 
 
+_DESC_WEIGHT_MATERIAL_RE = re.compile(r"\((\d+(?:\.\d+)?)\s*kg\s+of\s+([^\)]+)\)", re.IGNORECASE)
+
+
+def parse_activity_weight_material(desc: str | None) -> tuple[float, str | None]:
+    """Split an activity description into (weight_kg, material_key); 0.0 / None when absent."""
+    match = _DESC_WEIGHT_MATERIAL_RE.search(str(desc or ''))
+    if match:
+        return max(0.0, float(match.group(1))), normalize_material_key(match.group(2).strip())
+    return parse_weight_kg_from_text(desc), None
+
+
+def activity_weight_kg(activity) -> float:
+    return max(0.0, float(activity.weight_kg or 0.0))
+
+
+def parse_utc_timestamp(value) -> datetime | None:
+    """Normalize the mixed 'Z' / '+00:00' / naive ISO strings (and datetimes) to aware UTC."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        raw = str(value).strip()
+        try:
+            parsed = datetime.fromisoformat(raw.replace('Z', '+00:00'))
+        except ValueError:
+            parsed = None
+            for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+                try:
+                    parsed = datetime.strptime(raw, fmt)
+                    break
+                except ValueError:
+                    continue
+            if parsed is None:
+                return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+@event.listens_for(db.session, "before_flush")
+def _fill_activity_structured_fields(session, flush_context, instances):
+    # Writers that know the weight/material set them explicitly; anything else
+    # (manual entries, bulk imports, demo seeds) is parsed from desc once here.
+    # The typed timestamp mirror always follows its string column.
+    # Registered ahead of the rollup hooks below, which read these fields.
+    for obj in list(session.new) + list(session.dirty):
+        is_new = obj in session.new
+        if not isinstance(obj, Activity):
+            continue
+        state = sa_inspect(obj)
+        if is_new or state.attrs.timestamp.history.has_changes():
+            obj.timestamp_utc = parse_utc_timestamp(obj.timestamp)
+        if is_new:
+            if obj.weight_kg is not None:
+                continue
+        elif not state.attrs.desc.history.has_changes() or state.attrs.weight_kg.history.has_changes():
+            continue
+        obj.weight_kg, obj.material_key = parse_activity_weight_material(obj.desc)
+
+
+def backfill_activity_weight_material(chunk_size: int = 500) -> int:
+    """Parse desc into weight_kg/material_key for rows written before the columns existed."""
+    table = Activity.__table__
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(table.c.id, table.c.desc)
+            .where(table.c.weight_kg.is_(None), table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        params = []
+        for row_id, desc in rows:
+            weight, material = parse_activity_weight_material(desc)
+            params.append({"row_id": row_id, "weight": weight, "material": material})
+        # Core executemany: the rows' kg is already counted in the rollups, so
+        # this must not go through the flush hooks.
+        db.session.execute(
+            table.update()
+            .where(table.c.id == db.bindparam("row_id"))
+            .values(weight_kg=db.bindparam("weight"), material_key=db.bindparam("material")),
+            params,
+        )
+        db.session.commit()
+        updated += len(rows)
+        last_id = rows[-1][0]
+    return updated
+
+
+def backfill_typed_timestamps(chunk_size: int = 500) -> int:
+    """Fill Activity.timestamp_utc from the ISO timestamp string."""
+    table = Activity.__table__
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(table.c.id, table.c.timestamp)
+            .where(table.c.timestamp_utc.is_(None), table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        params = [
+            {"row_id": row_id, "value": parsed}
+            for row_id, raw in rows
+            if (parsed := parse_utc_timestamp(raw)) is not None
+        ]
+        if params:
+            db.session.execute(
+                table.update()
+                .where(table.c.id == db.bindparam("row_id"))
+                .values(timestamp_utc=db.bindparam("value")),
+                params,
+            )
+        db.session.commit()
+        updated += len(params)
+        last_id = rows[-1][0]
+    return updated
+
+
+def activity_verified_canonical_clause():
+    """SQL form of is_activity_verified_canonical()."""
+    states = [
+        func.lower(func.trim(func.coalesce(column, '')))
+        for column in (Activity.status, Activity.verified_status, Activity.pipeline_stage, Activity.logbook_status, Activity.reward_status)
+    ]
+    verified_states = ("verified", "anchored", "completed", "logged", "rewarded", "attested", "paid")
+    return db.and_(
+        *[state.notin_(("failed", "rejected")) for state in states],
+        or_(*[state.in_(verified_states) for state in states]),
+    )
+
+
+def verified_totals_by_material(user_id: int | None = None) -> dict[str, dict]:
+    """
+    Verified activity count, ECO and kg per material_key from one GROUP BY, so
+    overall totals summed from it cover exactly the same rows as the breakdown.
+    """
+    query = (
+        db.session.query(
+            Activity.material_key,
+            func.count(Activity.id),
+            func.coalesce(func.sum(Activity.amount), 0.0),
+            func.coalesce(func.sum(Activity.weight_kg), 0.0),
+        )
+        .filter(or_(Activity.verified_status == 'verified', Activity.status == 'verified'))
+        .group_by(Activity.material_key)
+    )
+    if user_id is not None:
+        query = query.filter(Activity.user_id == user_id)
+    totals = defaultdict(lambda: {"count": 0, "eco": 0.0, "kg": 0.0})
+    for material, count, eco, kg in query.all():
+        entry = totals[material or 'mixed recyclables']
+        entry["count"] += int(count or 0)
+        entry["eco"] += float(eco or 0.0)
+        entry["kg"] += max(0.0, float(kg or 0.0))
+    return dict(totals)
+
+
 def assignment_weight_kg_for_metrics(assignment: OpportunityAssignment | None) -> float:
     if not assignment:
         return 0.0
@@ -1141,11 +1414,153 @@ def assignment_weight_kg_for_metrics(assignment: OpportunityAssignment | None) -
     return 0.0
 
 
+# Neighborhood rollup: verified kg per UTC day across all users. Flush hooks
+# apply the delta of every activity/assignment change, so the dashboard's
+# 30-day neighborhood window is a sum over at most 30 rows.
+_ROLLUP_PENDING_KEY = "_neighborhood_rollup_pending"
+_ROLLUP_ACTIVITY_FIELDS = ("status", "verified_status", "pipeline_stage", "logbook_status", "reward_status", "weight_kg", "timestamp_utc")
+_ROLLUP_ASSIGNMENT_FIELDS = ("status", "linked_activity_id", "submitted_weight_kg", "submitted_at", "accepted_at", "opportunity_id")
+
+
+def _utc_day(value) -> date | None:
+    dt = parse_utc_timestamp(value)
+    return dt.date() if dt else None
+
+
+def activity_rollup_contribution(activity) -> tuple[date, float] | None:
+    if not is_activity_verified_canonical(activity):
+        return None
+    day = _utc_day(activity.timestamp_utc)
+    kg = activity_weight_kg(activity)
+    if not day or kg <= 0:
+        return None
+    return day, kg
+
+
+def assignment_rollup_contribution(assignment) -> tuple[date, float] | None:
+    # Completed assignments count only until they produce a linked activity (which then counts instead).
+    if (assignment.status or '').strip().lower() != 'completed' or assignment.linked_activity_id:
+        return None
+    day = _utc_day(assignment.submitted_at or assignment.accepted_at)
+    kg = assignment_weight_kg_for_metrics(assignment)
+    if not day or kg <= 0:
+        return None
+    return day, kg
+
+
+def _committed_rows(session, model, fields, ids) -> dict:
+    if not ids:
+        return {}
+    table = model.__table__
+    rows = session.connection().execute(
+        db.select(table.c.id, *[table.c[field] for field in fields]).where(table.c.id.in_(ids))
+    ).mappings().all()
+    return {row["id"]: SimpleNamespace(**row) for row in rows}
+
+
+@event.listens_for(db.session, "before_flush")
+def _collect_neighborhood_rollup_deltas(session, flush_context, instances):
+    deltas = defaultdict(float)
+
+    def _apply(contribution, sign):
+        if contribution:
+            deltas[contribution[0]] += sign * contribution[1]
+
+    with session.no_autoflush:
+        for model, fields, contribution_fn in (
+            (Activity, _ROLLUP_ACTIVITY_FIELDS, activity_rollup_contribution),
+            (OpportunityAssignment, _ROLLUP_ASSIGNMENT_FIELDS, assignment_rollup_contribution),
+        ):
+            new_objs = [obj for obj in session.new if isinstance(obj, model)]
+            deleted_objs = [obj for obj in session.deleted if isinstance(obj, model)]
+            changed_objs = [
+                obj for obj in session.dirty
+                if isinstance(obj, model) and obj.id and any(
+                    sa_inspect(obj).attrs[field].history.has_changes() for field in fields
+                )
+            ]
+            committed = _committed_rows(session, model, fields, [obj.id for obj in changed_objs + deleted_objs if obj.id])
+
+            for obj in new_objs:
+                _apply(contribution_fn(obj), +1)
+            for obj in changed_objs + deleted_objs:
+                previous = committed.get(obj.id)
+                if previous is not None:
+                    if model is OpportunityAssignment:
+                        previous.opportunity = obj.opportunity
+                    _apply(contribution_fn(previous), -1)
+                if obj not in deleted_objs:
+                    _apply(contribution_fn(obj), +1)
+
+    deltas = {day: kg for day, kg in deltas.items() if abs(kg) > 1e-9}
+    if deltas:
+        pending = session.info.setdefault(_ROLLUP_PENDING_KEY, defaultdict(float))
+        for day, kg in deltas.items():
+            pending[day] += kg
+
+
+@event.listens_for(db.session, "after_flush")
+def _apply_neighborhood_rollup_deltas(session, flush_context):
+    pending = session.info.pop(_ROLLUP_PENDING_KEY, None)
+    if not pending:
+        return
+    table = NeighborhoodDailyKg.__table__
+    connection = session.connection()
+    for day, kg in pending.items():
+        atomic_increment(connection, table, {"day": day}, "kg", kg)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _discard_neighborhood_rollup_deltas(session):
+    session.info.pop(_ROLLUP_PENDING_KEY, None)
+
+
+def rebuild_neighborhood_rollup() -> int:
+    totals = defaultdict(float)
+    for activity in Activity.query.all():
+        contribution = activity_rollup_contribution(activity)
+        if contribution:
+            totals[contribution[0]] += contribution[1]
+    completed_assignments = (
+        OpportunityAssignment.query
+        .filter(OpportunityAssignment.status == 'completed', OpportunityAssignment.linked_activity_id.is_(None))
+        .all()
+    )
+    for assignment in completed_assignments:
+        contribution = assignment_rollup_contribution(assignment)
+        if contribution:
+            totals[contribution[0]] += contribution[1]
+
+    NeighborhoodDailyKg.query.delete(synchronize_session=False)
+    for day, kg in totals.items():
+        db.session.add(NeighborhoodDailyKg(day=day, kg=kg))
+    db.session.commit()
+    return len(totals)
+
+
+def backfill_neighborhood_rollup():
+    if NeighborhoodDailyKg.query.first() is not None or Activity.query.first() is None:
+        return
+    days = rebuild_neighborhood_rollup()
+    print(f"[BACKEND] Neighborhood rollup rebuilt ({days} days)", flush=True)
+
+
+def neighborhood_recent_kg(days: int = 30) -> float:
+    cutoff_day = (datetime.now(timezone.utc) - timedelta(days=days)).date()
+    total = (
+        db.session.query(func.coalesce(func.sum(NeighborhoodDailyKg.kg), 0.0))
+        .filter(NeighborhoodDailyKg.day >= cutoff_day)
+        .scalar()
+    )
+    return max(0.0, float(total or 0.0))
+
+
+@cached(tags=[SCOPE_PIPELINE, SCOPE_HOTSPOTS])
 def compute_network_impact_snapshot() -> dict:
-    activities = Activity.query.all()
+    activities = queries.activity_summaries()
     verified = [a for a in activities if is_activity_verified_canonical(a)]
 
-    waste_diverted_kg = round(sum(parse_weight_kg_from_text(a.desc) for a in verified), 1)
+    waste_diverted_kg = round(sum(activity_weight_kg(a) for a in verified), 1)
     eco_generated = round(sum(max(0.0, float(a.amount or 0.0)) for a in verified), 1)
     active_neighbors = len({int(a.user_id) for a in verified if a.user_id is not None})
 
@@ -1511,9 +1926,10 @@ def seed_demo_data(force_reset: bool = False) -> None:
         db.session.commit()
 
 
-def purge_stale_demo_seed_rows() -> None:
+def purge_stale_demo_seed_rows() -> bool:
+    """Drop or cancel leftover judge seed rows; True once nothing is left to watch for."""
     if not DEMO_FEATURES_ALLOWED:
-        return
+        return False
 
     demo_notes = {
         "Demo seeded pickup for judge flow",
@@ -1551,7 +1967,7 @@ def purge_stale_demo_seed_rows() -> None:
 
         if stale_opportunities or removed_assignments or seeded_activities:
             db.session.commit()
-        return
+        return True
 
     has_real_activity = db.session.query(Activity.id).first() is not None
     has_real_pickup_data = (
@@ -1561,7 +1977,7 @@ def purge_stale_demo_seed_rows() -> None:
         is not None
     )
     if not (has_real_activity or has_real_pickup_data):
-        return
+        return False
 
     stale_opportunities = (
         PickupOpportunity.query
@@ -1570,7 +1986,7 @@ def purge_stale_demo_seed_rows() -> None:
         .all()
     )
     if not stale_opportunities:
-        return
+        return True
 
     for opportunity in stale_opportunities:
         for assignment in (opportunity.assignments or []):
@@ -1581,24 +1997,68 @@ def purge_stale_demo_seed_rows() -> None:
         opportunity.status = 'cancelled'
 
     db.session.commit()
+    return True
 
 
-def build_community_hotspot_board() -> list[dict]:
-    purge_stale_demo_seed_rows()
+DEMO_PURGE_MARKER = "demo_stale_seed_purged"
+DEMO_MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("VERICYCLE_DEMO_MAINTENANCE_INTERVAL_S", "300"))
+_demo_maintenance_last_run = 0.0
+
+
+def run_demo_maintenance() -> None:
+    """Keep the demo seed in shape: Day-28 business history, hotspots, stale judge rows.
+
+    Runs once as a migration step and then from the task worker, never from
+    request handlers. The stale-row purge only has work to do until real data
+    shows up; after that it is recorded in schema_migration and skipped.
+    """
+    if not DEMO_FEATURES_ALLOWED:
+        return
+    ensure_demo_business_verified_transactions()
     ensure_demo_community_hotspots(force_reset=False)
+    if not migrations.is_recorded(db.session, DEMO_PURGE_MARKER) and purge_stale_demo_seed_rows():
+        migrations.record(db.session, DEMO_PURGE_MARKER)
+
 
+def run_demo_maintenance_if_due(interval: float = DEMO_MAINTENANCE_INTERVAL_SECONDS) -> None:
+    global _demo_maintenance_last_run
+    if _demo_maintenance_last_run and time.monotonic() - _demo_maintenance_last_run < interval:
+        return
+    _demo_maintenance_last_run = time.monotonic()
+    run_demo_maintenance()
+
+
+def build_community_hotspot_board() -> list[dict]:
+    return _community_hotspot_board_rows()
+
+
+@cached(tags=[SCOPE_HOTSPOTS])
+def _community_hotspot_board_rows() -> list[dict]:
     rows = (
-        PickupOpportunity.query
-        .filter_by(source_role='resident')
-        .order_by(PickupOpportunity.created_at.desc())
-        .limit(600)
+        CommunityHotspot.query
+        .order_by(
+            CommunityHotspot.board_bucket.asc(),
+            CommunityHotspot.support_count.desc(),
+            CommunityHotspot.report_count.desc(),
+            CommunityHotspot.latest_created_at.asc(),
+        )
         .all()
     )
+    return [row.to_board_dict() for row in rows]
+
+
+def _hotspot_key_for_opportunity(row: PickupOpportunity) -> str:
+    title, location, _ = parse_community_hotspot_details(row.notes, row.location)
+    return normalize_hotspot_key(title, location)
+
 
+def _aggregate_community_hotspots(rows: list[PickupOpportunity]) -> dict[str, dict]:
     grouped: dict[str, dict] = {}
     for row in rows:
         title, location, is_support = parse_community_hotspot_details(row.notes, row.location)
         key = normalize_hotspot_key(title, location)
+        if row.hotspot_key != key:
+            row.hotspot_key = key
         rank = _OPPORTUNITY_STATUS_RANK.get((row.status or '').strip().lower(), 0)
         created_iso = row.created_at.isoformat() if row.created_at else None
 
@@ -1703,17 +2163,157 @@ def build_community_hotspot_board() -> list[dict]:
             entry["status_label"] = 'Confirmed by residents'
             entry["can_prioritize"] = False
 
-    payload = list(grouped.values())
-    payload.sort(
-        key=lambda x: (
-            0 if (x.get("status") or '').strip().lower() not in {'completed', 'cancelled'} else 1,
-            0 if (x.get("priority") or '') == 'center' else 1,
-            -(x.get("support_count") or 0),
-            -(x.get("report_count") or 0),
-            x.get("latest_created_at") or '',
+    for entry in grouped.values():
+        is_closed = (entry.get("status") or '').strip().lower() in {'completed', 'cancelled'}
+        entry["board_bucket"] = (2 if is_closed else 0) + (0 if entry.get("priority") == 'center' else 1)
+    return grouped
+
+
+def refresh_community_hotspots(keys=None, session=None) -> int:
+    """
+    Recompute CommunityHotspot rows from their resident reports. keys=None
+    rebuilds the whole board (backfill); otherwise only the given hotspots.
+    Relationships are batch-loaded, so the cost is a handful of queries
+    regardless of how many reports or assignments are involved.
+    """
+    session = session or db.session
+    query = session.query(PickupOpportunity).filter(PickupOpportunity.source_role == 'resident')
+    if keys is not None:
+        keys = {key for key in keys if key}
+        if not keys:
+            return 0
+        query = query.filter(PickupOpportunity.hotspot_key.in_(keys))
+
+    rows = (
+        query
+        .options(
+            selectinload(PickupOpportunity.assignments).joinedload(OpportunityAssignment.verified_by_center),
+            selectinload(PickupOpportunity.assignments)
+            .joinedload(OpportunityAssignment.linked_activity)
+            .selectinload(Activity.signals)
+            .joinedload(VerificationSignal.source_user),
         )
+        .order_by(PickupOpportunity.created_at.desc())
+        .all()
+    )
+    grouped = _aggregate_community_hotspots(rows)
+
+    existing_query = session.query(CommunityHotspot)
+    if keys is not None:
+        existing_query = existing_query.filter(CommunityHotspot.hotspot_key.in_(keys | set(grouped)))
+    existing = {row.hotspot_key: row for row in existing_query.all()}
+
+    for key, entry in grouped.items():
+        hotspot = existing.pop(key, None)
+        if hotspot is None:
+            hotspot = CommunityHotspot(hotspot_key=key)
+            session.add(hotspot)
+        for field in (
+            "title", "location", "type_label", "status", "status_rank", "status_label", "priority",
+            "can_prioritize", "board_bucket", "support_count", "report_count", "estimated_kg",
+            "latest_created_at", "completed_at", "completed_by", "completed_activity_id",
+            "hashscan_url", "reward_amount", "resident_confirmation_status",
+            "resident_confirmation_at", "resident_confirmation_by",
+        ):
+            value = entry.get(field)
+            if getattr(hotspot, field) != value:
+                setattr(hotspot, field, value)
+
+    # Hotspots whose reports were all removed or re-keyed.
+    for hotspot in existing.values():
+        session.delete(hotspot)
+    return len(grouped)
+
+
+def backfill_community_hotspots():
+    resident_rows = PickupOpportunity.query.filter_by(source_role='resident')
+    needs_backfill = (
+        resident_rows.filter(PickupOpportunity.hotspot_key.is_(None)).first() is not None
+        or (resident_rows.first() is not None and CommunityHotspot.query.first() is None)
+    )
+    if needs_backfill:
+        count = refresh_community_hotspots()
+        db.session.commit()
+        print(f"[BACKEND] Community hotspot board rebuilt ({count} hotspots)", flush=True)
+
+
+# Board rows are kept current by the write path: flushes record which hotspots
+# their opportunity/assignment/signal/activity changes touch, and the owning
+# hotspots are recomputed just before the same transaction commits.
+_HOTSPOT_PENDING_KEY = "_community_hotspot_pending"
+_HOTSPOT_ACTIVITY_FIELDS = ("amount", "hcs_tx_id", "logbook_tx_id", "hedera_tx_id", "hts_tx_id", "reward_tx_id")
+
+
+@event.listens_for(db.session, "before_flush")
+def _track_community_hotspot_changes(session, flush_context, instances):
+    pending = session.info.setdefault(
+        _HOTSPOT_PENDING_KEY, {"keys": set(), "opportunity_ids": set(), "activity_ids": set()}
     )
-    return payload
+    with session.no_autoflush:
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+            if isinstance(obj, PickupOpportunity):
+                if (obj.source_role or '').strip().lower() != 'resident':
+                    continue
+                if obj.hotspot_key:
+                    pending["keys"].add(obj.hotspot_key)
+                if obj not in session.deleted:
+                    key = _hotspot_key_for_opportunity(obj)
+                    if obj.hotspot_key != key:
+                        obj.hotspot_key = key
+                    pending["keys"].add(key)
+            elif isinstance(obj, OpportunityAssignment):
+                opportunity = obj.opportunity
+                if opportunity is not None and opportunity.hotspot_key:
+                    pending["keys"].add(opportunity.hotspot_key)
+                elif obj.opportunity_id:
+                    pending["opportunity_ids"].add(obj.opportunity_id)
+            elif isinstance(obj, VerificationSignal):
+                activity_id = obj.activity_id or (obj.activity.id if obj.activity is not None else None)
+                if activity_id:
+                    pending["activity_ids"].add(activity_id)
+            elif isinstance(obj, Activity) and obj.id and obj in session.dirty:
+                state = sa_inspect(obj)
+                if any(state.attrs[field].history.has_changes() for field in _HOTSPOT_ACTIVITY_FIELDS):
+                    pending["activity_ids"].add(obj.id)
+
+
+# insert=True: run ahead of the change-counter hook, so the hotspot rows this
+# writes are flushed before the counters are bumped and the board's
+# "hotspots" ETag moves in the same commit.
+@event.listens_for(db.session, "before_commit", insert=True)
+def _refresh_pending_community_hotspots(session):
+    # before_commit runs ahead of the final flush, so flush first to collect its changes.
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    pending = session.info.pop(_HOTSPOT_PENDING_KEY, None)
+    if not pending or not any(pending.values()):
+        return
+    keys = set(pending.get("keys") or ())
+    if pending.get("opportunity_ids"):
+        keys.update(
+            key for (key,) in session.query(PickupOpportunity.hotspot_key)
+            .filter(PickupOpportunity.id.in_(pending["opportunity_ids"]), PickupOpportunity.hotspot_key.isnot(None))
+        )
+    if pending.get("activity_ids"):
+        keys.update(
+            key for (key,) in session.query(PickupOpportunity.hotspot_key)
+            .join(OpportunityAssignment, OpportunityAssignment.opportunity_id == PickupOpportunity.id)
+            .filter(
+                OpportunityAssignment.linked_activity_id.in_(pending["activity_ids"]),
+                PickupOpportunity.hotspot_key.isnot(None),
+            )
+            .distinct()
+        )
+    if keys:
+        refresh_community_hotspots(keys, session=session)
+
+
+@event.listens_for(db.session, "after_commit")
+@event.listens_for(db.session, "after_rollback")
+def _clear_pending_community_hotspots(session):
+    session.info.pop(_HOTSPOT_PENDING_KEY, None)
 
 
 def compute_local_community_impact_snapshot(location: Location | None) -> dict:
@@ -1884,9 +2484,66 @@ def create_verification_signal(
         metadata_json=json.dumps(metadata or {}, ensure_ascii=False),
     )
     db.session.add(signal)
+    if signal_type == "center_verification":
+        activity = db.session.get(Activity, activity_id)
+        if activity is not None:
+            if activity.center_signal_at is None:
+                activity.center_signal_at = datetime.now(timezone.utc)
+            if activity.center_assignment_id is None:
+                activity.center_assignment_id = _signal_assignment_id(metadata)
     return signal
 
 
+def _signal_assignment_id(meta) -> int | None:
+    """assignment_id from center_verification signal metadata; None when missing or not numeric."""
+    value = meta.get('assignment_id') if isinstance(meta, dict) else None
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def backfill_center_verification_links(chunk_size: int = 500) -> int:
+    """Copy the center_verification signal link onto activities written before the columns existed."""
+    activity_table = Activity.__table__
+    signal_table = VerificationSignal.__table__
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(signal_table.c.id, signal_table.c.activity_id, signal_table.c.metadata_json, signal_table.c.created_at)
+            .join(activity_table, activity_table.c.id == signal_table.c.activity_id)
+            .where(
+                signal_table.c.signal_type == 'center_verification',
+                activity_table.c.center_signal_at.is_(None),
+                signal_table.c.id > last_id,
+            )
+            .order_by(signal_table.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        links = {}
+        for _, activity_id, metadata_json, created_at in rows:
+            try:
+                meta = json.loads(metadata_json) if metadata_json else {}
+            except Exception:
+                meta = {}
+            link = links.setdefault(activity_id, {"row_id": activity_id, "signal_at": created_at, "assignment_id": None})
+            if link["assignment_id"] is None:
+                link["assignment_id"] = _signal_assignment_id(meta)
+        db.session.execute(
+            activity_table.update()
+            .where(activity_table.c.id == db.bindparam("row_id"))
+            .values(center_signal_at=db.bindparam("signal_at"), center_assignment_id=db.bindparam("assignment_id")),
+            list(links.values()),
+        )
+        db.session.commit()
+        updated += len(links)
+        last_id = rows[-1][0]
+    return updated
+
+
 def add_schedule_match_signal(activity: Activity):
     create_verification_signal(
         activity_id=activity.id,
@@ -2063,9 +2720,25 @@ def seed_layer0_if_empty():
         print('[SEED] Error while seeding Layer 0:', e, flush=True)
 
 
+def _table_columns(table_name: str) -> set[str]:
+    """Column names of an existing table (empty if it doesn't exist), on any dialect."""
+    inspector = sa_inspect(db.session.connection())
+    if not inspector.has_table(table_name):
+        return set()
+    return {column["name"] for column in inspector.get_columns(table_name)}
+
+
+def _has_table(table_name: str) -> bool:
+    return sa_inspect(db.session.connection()).has_table(table_name)
+
+
 def ensure_activity_columns():
-    cols = db.session.execute(text("PRAGMA table_info(activity)")).mappings().all()
-    existing = {c.get("name") for c in cols}
+    # Patches databases created before these columns/tables existed; fresh ones
+    # get them from create_all(), so there only the idempotent CREATE INDEX IF
+    # NOT EXISTS statements run. Checks go through the inspector and added
+    # columns use portable types (TIMESTAMP, not DATETIME) so this also runs on
+    # Postgres.
+    existing = _table_columns("activity")
 
     if "proof_hash" not in existing:
         db.session.execute(text("ALTER TABLE activity ADD COLUMN proof_hash VARCHAR(64)"))
@@ -2080,7 +2753,7 @@ def ensure_activity_columns():
         db.session.execute(text("ALTER TABLE activity ADD COLUMN logbook_last_error TEXT"))
 
     if "logbook_finalized_at" not in existing:
-        db.session.execute(text("ALTER TABLE activity ADD COLUMN logbook_finalized_at DATETIME"))
+        db.session.execute(text("ALTER TABLE activity ADD COLUMN logbook_finalized_at TIMESTAMP"))
 
     if "reward_tx_id" not in existing:
         db.session.execute(text("ALTER TABLE activity ADD COLUMN reward_tx_id VARCHAR(150)"))
@@ -2119,40 +2792,63 @@ def ensure_activity_columns():
         db.session.execute(text("ALTER TABLE activity ADD COLUMN reviewed_by_user_id INTEGER"))
 
     if "reviewed_at" not in existing:
-        db.session.execute(text("ALTER TABLE activity ADD COLUMN reviewed_at DATETIME"))
+        db.session.execute(text("ALTER TABLE activity ADD COLUMN reviewed_at TIMESTAMP"))
+
+    if "weight_kg" not in existing:
+        db.session.execute(text("ALTER TABLE activity ADD COLUMN weight_kg FLOAT"))
+
+    if "material_key" not in existing:
+        db.session.execute(text("ALTER TABLE activity ADD COLUMN material_key VARCHAR(40)"))
+    db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_activity_material_key ON activity (material_key)"))
+    db.session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_activity_user_material_weight ON activity (user_id, material_key, weight_kg)"
+    ))
 
-    user_cols = db.session.execute(text("PRAGMA table_info(user)")).mappings().all()
-    user_existing = {c.get("name") for c in user_cols}
+    if "timestamp_utc" not in existing:
+        db.session.execute(text("ALTER TABLE activity ADD COLUMN timestamp_utc TIMESTAMP"))
+    db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_activity_timestamp_utc ON activity (timestamp_utc)"))
+
+    if "center_signal_at" not in existing:
+        db.session.execute(text("ALTER TABLE activity ADD COLUMN center_signal_at TIMESTAMP"))
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_activity_center_signal_at ON activity (center_signal_at)"))
+
+    if "center_assignment_id" not in existing:
+        db.session.execute(text("ALTER TABLE activity ADD COLUMN center_assignment_id INTEGER"))
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_activity_center_assignment_id ON activity (center_assignment_id)"))
+
+    db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_agent_log_activity_id ON agent_log (activity_id, id)"))
+    db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_agent_log_agent_name ON agent_log (agent_name, id)"))
+    db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_agent_log_created_at ON agent_log (created_at)"))
+
+    user_existing = _table_columns("user")
 
     if "hedera_private_key_encrypted" not in user_existing:
-        db.session.execute(text("ALTER TABLE user ADD COLUMN hedera_private_key_encrypted TEXT"))
+        db.session.execute(text('ALTER TABLE "user" ADD COLUMN hedera_private_key_encrypted TEXT'))
 
     if "hedera_key_version" not in user_existing:
-        db.session.execute(text("ALTER TABLE user ADD COLUMN hedera_key_version VARCHAR(20)"))
+        db.session.execute(text('ALTER TABLE "user" ADD COLUMN hedera_key_version VARCHAR(20)'))
 
-    task_cols = db.session.execute(text("PRAGMA table_info(agent_task)")).mappings().all()
-    task_existing = {c.get("name") for c in task_cols}
+    task_existing = _table_columns("agent_task")
 
     if "attempts" not in task_existing:
         db.session.execute(text("ALTER TABLE agent_task ADD COLUMN attempts INTEGER DEFAULT 0"))
 
     if "next_run_at" not in task_existing:
         now_iso = datetime.now(timezone.utc).isoformat()
-        db.session.execute(text(f"ALTER TABLE agent_task ADD COLUMN next_run_at DATETIME DEFAULT '{now_iso}'"))
+        db.session.execute(text(f"ALTER TABLE agent_task ADD COLUMN next_run_at TIMESTAMP DEFAULT '{now_iso}'"))
 
     if "last_error" not in task_existing:
         db.session.execute(text("ALTER TABLE agent_task ADD COLUMN last_error VARCHAR(512)"))
 
     if "created_at" not in task_existing:
         now_iso = datetime.now(timezone.utc).isoformat()
-        db.session.execute(text(f"ALTER TABLE agent_task ADD COLUMN created_at DATETIME DEFAULT '{now_iso}'"))
+        db.session.execute(text(f"ALTER TABLE agent_task ADD COLUMN created_at TIMESTAMP DEFAULT '{now_iso}'"))
 
     if "updated_at" not in task_existing:
         now_iso = datetime.now(timezone.utc).isoformat()
-        db.session.execute(text(f"ALTER TABLE agent_task ADD COLUMN updated_at DATETIME DEFAULT '{now_iso}'"))
+        db.session.execute(text(f"ALTER TABLE agent_task ADD COLUMN updated_at TIMESTAMP DEFAULT '{now_iso}'"))
 
-    commerce_tables = db.session.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='agent_commerce_event'"))
-    if not commerce_tables.scalar():
+    if not _has_table("agent_commerce_event"):
         db.session.execute(text("""
             CREATE TABLE IF NOT EXISTS agent_commerce_event (
                 id INTEGER NOT NULL,
@@ -2170,8 +2866,7 @@ def ensure_activity_columns():
             )
         """))
 
-    dlq_tables = db.session.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='dead_letter_task'"))
-    if not dlq_tables.scalar():
+    if not _has_table("dead_letter_task"):
         db.session.execute(text("""
             CREATE TABLE IF NOT EXISTS dead_letter_task (
                 id INTEGER NOT NULL,
@@ -2189,8 +2884,7 @@ def ensure_activity_columns():
             )
         """))
 
-    audit_tables = db.session.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='admin_audit_log'"))
-    if not audit_tables.scalar():
+    if not _has_table("admin_audit_log"):
         db.session.execute(text("""
             CREATE TABLE IF NOT EXISTS admin_audit_log (
                 id INTEGER NOT NULL,
@@ -2204,10 +2898,7 @@ def ensure_activity_columns():
             )
         """))
 
-    signal_tables = db.session.execute(
-        text("SELECT name FROM sqlite_master WHERE type='table' AND name='verification_signal'")
-    )
-    if not signal_tables.scalar():
+    if not _has_table("verification_signal"):
         db.session.execute(text("""
             CREATE TABLE IF NOT EXISTS verification_signal (
                 id INTEGER NOT NULL,
@@ -2226,10 +2917,7 @@ def ensure_activity_columns():
             )
         """))
 
-    pickup_table = db.session.execute(
-        text("SELECT name FROM sqlite_master WHERE type='table' AND name='pickup_opportunity'")
-    )
-    if not pickup_table.scalar():
+    if not _has_table("pickup_opportunity"):
         db.session.execute(text("""
             CREATE TABLE IF NOT EXISTS pickup_opportunity (
                 id INTEGER NOT NULL,
@@ -2248,10 +2936,7 @@ def ensure_activity_columns():
             )
         """))
 
-    assignment_table = db.session.execute(
-        text("SELECT name FROM sqlite_master WHERE type='table' AND name='opportunity_assignment'")
-    )
-    if not assignment_table.scalar():
+    if not _has_table("opportunity_assignment"):
         db.session.execute(text("""
             CREATE TABLE IF NOT EXISTS opportunity_assignment (
                 id INTEGER NOT NULL,
@@ -2267,19 +2952,21 @@ def ensure_activity_columns():
             )
         """))
 
-    assignment_cols = db.session.execute(text("PRAGMA table_info(opportunity_assignment)")).mappings().all()
-    assignment_existing = {c.get("name") for c in assignment_cols}
+    assignment_existing = _table_columns("opportunity_assignment")
 
-    pickup_cols = db.session.execute(text("PRAGMA table_info(pickup_opportunity)")).mappings().all()
-    pickup_existing = {c.get("name") for c in pickup_cols}
+    pickup_existing = _table_columns("pickup_opportunity")
     if "priority" not in pickup_existing:
         db.session.execute(text("ALTER TABLE pickup_opportunity ADD COLUMN priority VARCHAR(20) NOT NULL DEFAULT 'standard'"))
 
+    if "hotspot_key" not in pickup_existing:
+        db.session.execute(text("ALTER TABLE pickup_opportunity ADD COLUMN hotspot_key VARCHAR(255)"))
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_pickup_opportunity_hotspot_key ON pickup_opportunity (hotspot_key)"))
+
     if "submitted_at" not in assignment_existing:
-        db.session.execute(text("ALTER TABLE opportunity_assignment ADD COLUMN submitted_at DATETIME"))
+        db.session.execute(text("ALTER TABLE opportunity_assignment ADD COLUMN submitted_at TIMESTAMP"))
 
     if "handover_confirmed_at" not in assignment_existing:
-        db.session.execute(text("ALTER TABLE opportunity_assignment ADD COLUMN handover_confirmed_at DATETIME"))
+        db.session.execute(text("ALTER TABLE opportunity_assignment ADD COLUMN handover_confirmed_at TIMESTAMP"))
 
     if "handover_code" not in assignment_existing:
         db.session.execute(text("ALTER TABLE opportunity_assignment ADD COLUMN handover_code VARCHAR(80)"))
@@ -2300,7 +2987,7 @@ def ensure_activity_columns():
         db.session.execute(text("ALTER TABLE opportunity_assignment ADD COLUMN verified_by_center_id INTEGER"))
 
     if "verified_at" not in assignment_existing:
-        db.session.execute(text("ALTER TABLE opportunity_assignment ADD COLUMN verified_at DATETIME"))
+        db.session.execute(text("ALTER TABLE opportunity_assignment ADD COLUMN verified_at TIMESTAMP"))
 
     if "verification_status" not in assignment_existing:
         db.session.execute(text("ALTER TABLE opportunity_assignment ADD COLUMN verification_status VARCHAR(30)"))
@@ -2311,14 +2998,23 @@ def ensure_activity_columns():
     db.session.commit()
 
 
-def backfill_activity_proof_hashes():
-    try:
-        activities = Activity.query.all()
+def backfill_activity_proof_hashes(progress, chunk_size: int = 500):
+    """Recompute stable proof hashes and fill derived logbook/reward fields, in id order."""
+    last_id = progress.cursor
+    while True:
+        activities = (
+            Activity.query
+            .options(joinedload(Activity.user))
+            .filter(Activity.id > last_id)
+            .order_by(Activity.id.asc())
+            .limit(chunk_size)
+            .all()
+        )
         if not activities:
-            return
+            break
 
         for act in activities:
-            user = db.session.get(User, act.user_id)
+            user = act.user
             bundle = {
                 "vericycle_version": "hackathon-2026",
                 "activity_id": act.id,
@@ -2351,15 +3047,23 @@ def backfill_activity_proof_hashes():
             if getattr(act, "reputation_delta", None) is None:
                 act.reputation_delta = 0.0
 
-        db.session.commit()
-    except Exception as e:
-        print(f"[BACKEND] Proof-hash backfill skipped: {e}", flush=True)
+        last_id = activities[-1].id
+        progress.checkpoint(last_id, len(activities))
 
 
-def migrate_private_keys_to_encrypted():
-    try:
-        users = User.query.all()
-        changed = 0
+def migrate_private_keys_to_encrypted(progress, chunk_size: int = 500):
+    last_id = progress.cursor
+    changed = 0
+    while True:
+        users = (
+            User.query
+            .filter(User.id > last_id)
+            .order_by(User.id.asc())
+            .limit(chunk_size)
+            .all()
+        )
+        if not users:
+            break
         for user in users:
             plain = getattr(user, "hedera_private_key", None)
             encrypted = getattr(user, "hedera_private_key_encrypted", None)
@@ -2370,11 +3074,10 @@ def migrate_private_keys_to_encrypted():
                     user.hedera_key_version = version
                     user.hedera_private_key = None
                     changed += 1
-        if changed:
-            db.session.commit()
-            print(f"[SECURITY] Encrypted {changed} user Hedera private keys", flush=True)
-    except Exception as e:
-        print(f"[SECURITY] Private key migration skipped: {e}", flush=True)
+        last_id = users[-1].id
+        progress.checkpoint(last_id, len(users))
+    if changed:
+        print(f"[SECURITY] Encrypted {changed} user Hedera private keys", flush=True)
 
 
 def safe_create_all():
@@ -2389,28 +3092,154 @@ def safe_create_all():
             return
         raise
 
+def ensure_model_indexes() -> int:
+    """Create any index declared on the models that an existing database is missing."""
+    connection = db.session.connection()
+    inspector = sa_inspect(connection)
+    existing = {
+        (table_name, index["name"])
+        for table_name in inspector.get_table_names()
+        for index in inspector.get_indexes(table_name)
+    }
+    created = 0
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if (table.name, index.name) not in existing:
+                index.create(connection)
+                created += 1
+    db.session.commit()
+    return created
+
+
+def ensure_task_archive_original_id() -> int:
+    """
+    agent_task_archive used agent_task.id as its own key, which collides once
+    SQLite hands a compacted id out again. Existing archives keep that id in
+    the new original_id column and the key becomes a plain surrogate. Returns
+    rows updated.
+    """
+    columns = _table_columns("agent_task_archive")
+    if not columns or "original_id" in columns:
+        return 0
+    db.session.execute(text("ALTER TABLE agent_task_archive ADD COLUMN original_id INTEGER"))
+    updated = db.session.execute(text("UPDATE agent_task_archive SET original_id = id")).rowcount
+    if db.session.connection().dialect.name == "postgresql":
+        # Archived rows were inserted with explicit ids, so the serial sequence never moved.
+        db.session.execute(text(
+            "SELECT setval(pg_get_serial_sequence('agent_task_archive', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+            "FROM agent_task_archive"
+        ))
+    db.session.commit()
+    return updated
+
+# Versioned one-shot migrations (see migrations.py). Step names are recorded in
+# schema_migration once applied: never rename or reorder them, append new ones.
+@migrations.step("0001_activity_columns")
+def _migrate_activity_columns(progress):
+    ensure_activity_columns()
+
+
+# Demo data goes in before the backfills so they cover the seeded rows too.
+@migrations.step("0002_demo_seed")
+def _migrate_demo_seed(progress):
+    seed_layer0_if_empty()
+    ensure_demo_login_accounts()
+    seed_demo_data(force_reset=False)
+
+
+@migrations.step("0003_activity_proof_hashes")
+def _migrate_activity_proof_hashes(progress):
+    backfill_activity_proof_hashes(progress)
+
+
+@migrations.step("0004_encrypt_private_keys")
+def _migrate_private_keys(progress):
+    migrate_private_keys_to_encrypted(progress)
+
+
+@migrations.step("0005_typed_timestamps")
+def _migrate_typed_timestamps(progress):
+    progress.checkpoint(0, backfill_typed_timestamps())
+
+
+@migrations.step("0006_center_verification_links")
+def _migrate_center_verification_links(progress):
+    progress.checkpoint(0, backfill_center_verification_links())
+
+
+@migrations.step("0007_activity_weight_material")
+def _migrate_activity_weight_material(progress):
+    progress.checkpoint(0, backfill_activity_weight_material())
+
+
+@migrations.step("0008_agent_health_seed")
+def _migrate_agent_health_seed(progress):
+    if AgentHealth.query.first() is None and AgentLog.query.first() is not None:
+        progress.checkpoint(0, agent_health.rebuild_from_logs(db.session))
+
+
+@migrations.step("0009_community_hotspots")
+def _migrate_community_hotspots(progress):
+    backfill_community_hotspots()
+
+
+@migrations.step("0010_neighborhood_rollup")
+def _migrate_neighborhood_rollup(progress):
+    backfill_neighborhood_rollup()
+
+
+@migrations.step("0011_demo_maintenance")
+def _migrate_demo_maintenance(progress):
+    run_demo_maintenance()
+
+
+# Access-path indexes declared in models.py (see tests/test_query_plans.py).
+@migrations.step("0012_access_path_indexes")
+def _migrate_access_path_indexes(progress):
+    progress.checkpoint(0, ensure_model_indexes())
+
+
+@migrations.step("0013_task_archive_original_id")
+def _migrate_task_archive_original_id(progress):
+    progress.checkpoint(0, ensure_task_archive_original_id() + ensure_model_indexes())
+
+
+AUTO_MIGRATE = os.getenv("VERICYCLE_AUTO_MIGRATE", "0" if _is_prod else "1").strip().lower() in ("1", "true", "yes")
+
+
+@app.cli.command("migrate")
+def migrate_command():
+    """Apply pending schema migrations and backfills."""
+    with app.app_context():
+        safe_create_all()
+        ran = migrations.run_pending(db.session)
+        print(f"[MIGRATE] {len(ran)} step(s) applied" if ran else "[MIGRATE] Up to date", flush=True)
+
+
 # Ensure tables exist (create after models are imported so metadata is registered)
 with app.app_context():
-    safe_create_all()
-    try:
-        ensure_activity_columns()
-        backfill_activity_proof_hashes()
-        migrate_private_keys_to_encrypted()
-    except Exception as e:
-        print(f"[BACKEND] Activity schema ensure skipped: {e}", flush=True)
-    # Seed Layer 0 household/location/schedule data if empty
-    try:
-        seed_layer0_if_empty()
-    except Exception:
-        pass
+    with boot_profiler.step("create_all"):
+        safe_create_all()
     try:
-        ensure_demo_login_accounts()
-    except Exception as e:
-        print(f"[DEMO] Demo account seed skipped: {e}", flush=True)
-    try:
-        seed_demo_data(force_reset=False)
+        with boot_profiler.step("check pending migrations"):
+            pending = migrations.pending_steps(db.session)
+        if pending and AUTO_MIGRATE:
+            with boot_profiler.step(f"apply {len(pending)} migration(s)"):
+                migrations.run_pending(db.session)
+        elif pending:
+            print(
+                f"[BACKEND] {len(pending)} migration(s) pending ({pending[0].name}...); "
+                "run `flask --app app migrate`",
+                flush=True,
+            )
     except Exception as e:
-        print(f"[DEMO] Demo data seed skipped: {e}", flush=True)
+        db.session.rollback()
+        print(f"[BACKEND] Migrations skipped: {type(e).__name__}: {e}", flush=True)
+    if PRELOADED:
+        # Forked workers must not inherit the master's pooled connections.
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
 
 # -----------------------------------------------------------------
 # 4. HELPER FUNCTION FOR FLASK-LOGIN
@@ -2429,6 +3258,9 @@ def mirror_fetch_latest_topic_messages(topic_id: str, limit: int = 10):
     Fetch latest topic messages from Hedera Mirror Node (testnet).
     Returns list of dicts with: consensus_timestamp, sequence_number, message (decoded), tx_id (best-effort).
     """
+    # Only outbound calls need requests; imported where used to keep it off the boot path.
+    import requests
+
     base = "https://testnet.mirrornode.hedera.com"
     url = f"{base}/api/v1/topics/{topic_id}/messages"
     params = {"limit": limit, "order": "desc"}
@@ -2776,8 +3608,9 @@ def splash():
     return render_template('splash.html')
 
 @app.route('/home')
+@read_replica
 def home():
-    activities = Activity.query.order_by(Activity.id.desc()).all()
+    activities = queries.activity_summaries(order_by=Activity.id.desc())
     pickup_opportunities = PickupOpportunity.query.order_by(PickupOpportunity.created_at.desc()).all()
 
     def parse_event_datetime(value):
@@ -3006,10 +3839,11 @@ def proof_integrity():
 
 
 @app.get('/proof-hub')
+@read_replica
 @login_required
 def proof_hub():
     # Filter out test/fake data
-    rows = Activity.query.order_by(Activity.timestamp.desc()).filter(
+    rows = Activity.query.order_by(Activity.timestamp_utc.desc()).filter(
         ~Activity.desc.ilike('%low signal%'),
         ~Activity.desc.ilike('%regression%'),
         ~Activity.desc.ilike('%test%')
@@ -3089,13 +3923,13 @@ def profile():
     )
 
 @app.route('/collector')
+@read_replica
 @login_required 
 def collector_dashboard():
     if not can_accept_opportunity_recycler(current_user):
         # Silent role redirect avoids stale cross-page flash leakage during judging flows.
         return redirect(url_for(access_denied_redirect_for(current_user)))
 
-    purge_stale_demo_seed_rows()
     ensure_demo_pickup_flow_seed()
 
     # Require profile completion for recycler users (including legacy collector rows).
@@ -3111,7 +3945,7 @@ def collector_dashboard():
     activities = (
         Activity.query
         .filter_by(user_id=current_user.id)
-        .order_by(Activity.timestamp.desc())
+        .order_by(Activity.timestamp_utc.desc())
         .all()
     )
 
@@ -3216,6 +4050,7 @@ def _wallet_try_debit(*, amount_eco: float, action_type: str, amount_out: float
 
 @app.get('/api/wallet/snapshot')
 @login_required
+@conditional_get(lambda: [user_scope(current_user.id)])
 def api_wallet_snapshot():
     allowed, error_response = _wallet_require_recycler()
     if not allowed:
@@ -3345,6 +4180,7 @@ def request_pickup():
 
 
 @app.route('/resident/impact')
+@read_replica
 @login_required
 def resident_impact():
     if not is_resident_user(current_user):
@@ -3363,6 +4199,7 @@ def create_pickup():
 
 
 @app.route('/business')
+@read_replica
 @login_required
 def business_dashboard():
     role = effective_role(current_user)
@@ -3370,7 +4207,6 @@ def business_dashboard():
         return redirect(url_for(access_denied_redirect_for(current_user)))
 
     ensure_demo_pickup_flow_seed()
-    ensure_demo_business_verified_transactions()
 
     requests = (
         PickupOpportunity.query
@@ -3400,17 +4236,14 @@ def business_dashboard():
         "demo_seed_eco": 0.0,
     }
 
+    latest_by_request = queries.latest_assignments_by_opportunity(req.id for req in requests)
+
     for req in requests:
-        latest_assignment = (
-            OpportunityAssignment.query
-            .filter_by(opportunity_id=req.id)
-            .order_by(OpportunityAssignment.accepted_at.desc())
-            .first()
-        )
+        latest_assignment = latest_by_request.get(req.id)
 
         linked_activity = None
         if latest_assignment and latest_assignment.linked_activity_id:
-            linked_activity = db.session.get(Activity, latest_assignment.linked_activity_id)
+            linked_activity = latest_assignment.linked_activity
 
         request_status_label = pickup_request_status_label(
             req.status,
@@ -3663,7 +4496,6 @@ def api_create_opportunity():
 @app.get('/api/opportunities/open')
 @login_required
 def api_list_open_opportunities():
-    purge_stale_demo_seed_rows()
     ensure_demo_pickup_flow_seed()
 
     rows = (
@@ -3698,8 +4530,16 @@ def api_list_open_opportunities():
     return jsonify({"rows": payload})
 
 
+def _hotspot_board_etag_scopes():
+    # ?reset=1 reseeds the demo hotspots, so it must always reach the view.
+    if (request.args.get('reset') or '').strip().lower() in {'1', 'true', 'yes'}:
+        return None
+    return [SCOPE_HOTSPOTS]
+
+
 @app.get('/api/community/hotspots/board')
 @login_required
+@conditional_get(_hotspot_board_etag_scopes)
 def api_community_hotspots_board():
     reset_demo = (request.args.get('reset') or '').strip().lower() in {'1', 'true', 'yes'}
     if reset_demo:
@@ -3729,7 +4569,7 @@ def api_center_prioritize_community_hotspot():
 
     resident_rows = (
         PickupOpportunity.query
-        .filter_by(source_role='resident')
+        .filter_by(source_role='resident', hotspot_key=hotspot_key)
         .order_by(PickupOpportunity.created_at.desc())
         .all()
     )
@@ -3771,7 +4611,7 @@ def api_center_complete_community_hotspot():
 
     resident_rows = (
         PickupOpportunity.query
-        .filter_by(source_role='resident')
+        .filter_by(source_role='resident', hotspot_key=hotspot_key)
         .order_by(PickupOpportunity.created_at.desc())
         .all()
     )
@@ -3814,7 +4654,7 @@ def api_confirm_community_hotspot_completion():
 
     resident_rows = (
         PickupOpportunity.query
-        .filter_by(source_role='resident')
+        .filter_by(source_role='resident', hotspot_key=hotspot_key)
         .order_by(PickupOpportunity.created_at.desc())
         .all()
     )
@@ -4017,14 +4857,7 @@ def api_my_assignments():
     if not can_accept_opportunity_recycler(current_user):
         return jsonify({"rows": []})
 
-    purge_stale_demo_seed_rows()
-
-    rows = (
-        OpportunityAssignment.query
-        .filter_by(recycler_user_id=current_user.id)
-        .order_by(OpportunityAssignment.accepted_at.desc())
-        .all()
-    )
+    rows = queries.assignments_for_recycler(current_user.id).all()
 
     payload = []
     for row in rows:
@@ -4161,15 +4994,9 @@ def api_center_submitted_assignments():
     if not can_verify_deposit_center(current_user):
         return jsonify({"rows": []}), 403
 
-    purge_stale_demo_seed_rows()
     ensure_demo_pickup_flow_seed()
 
-    rows = (
-        OpportunityAssignment.query
-        .filter(OpportunityAssignment.status == 'submitted')
-        .order_by(OpportunityAssignment.submitted_at.desc())
-        .all()
-    )
+    rows = queries.submitted_assignments().all()
 
     payload = []
     for row in rows:
@@ -4202,98 +5029,76 @@ def api_center_recent_verifications():
     if not can_verify_deposit_center(current_user):
         return jsonify({"rows": []}), 403
 
-    ensure_demo_business_verified_transactions()
-
     scope = (request.args.get('scope') or 'today').strip().lower()
     now_utc = datetime.now(timezone.utc)
     today_utc = now_utc.date()
     yesterday_utc = today_utc - timedelta(days=1)
 
-    rows = (
+    try:
+        limit = max(1, min(450, int(request.args.get('limit') or 450)))
+    except (TypeError, ValueError):
+        limit = 450
+    try:
+        before_id = int(request.args.get('before_id') or 0)
+    except (TypeError, ValueError):
+        before_id = 0
+
+    # Finalization time reflects true verification completion; fall back to creation time.
+    effective_at = func.coalesce(Activity.logbook_finalized_at, Activity.timestamp_utc)
+    today_start = datetime.combine(today_utc, datetime.min.time(), tzinfo=timezone.utc)
+    yesterday_start = today_start - timedelta(days=1)
+    tomorrow_start = today_start + timedelta(days=1)
+    filters = [
+        or_(
+            func.lower(func.trim(func.coalesce(Activity.pipeline_stage, ''))).in_(('attested', 'rewarded', 'verified')),
+            func.lower(func.trim(func.coalesce(Activity.status, ''))).in_(('attested', 'rewarded', 'verified')),
+            func.lower(func.trim(func.coalesce(Activity.verified_status, ''))) == 'verified',
+            Activity.center_signal_at.isnot(None),
+        )
+    ]
+    if scope == 'today':
+        filters.append(or_(effective_at.is_(None), db.and_(effective_at >= today_start, effective_at < tomorrow_start)))
+    elif scope == 'yesterday':
+        filters.extend([effective_at >= yesterday_start, effective_at < today_start])
+    elif scope == 'recent':
+        filters.append(or_(effective_at.is_(None), effective_at >= yesterday_start))
+
+    # Several activities can record the same assignment; keep only the newest of each.
+    ranked = (
+        db.select(
+            Activity.id.label('activity_id'),
+            func.row_number().over(
+                partition_by=func.coalesce(Activity.center_assignment_id, -Activity.id),
+                order_by=Activity.id.desc(),
+            ).label('rank'),
+        )
+        .where(*filters)
+        .subquery()
+    )
+    rows_query = (
         Activity.query
-        .order_by(Activity.id.desc())
-        .limit(450)
-        .all()
+        .options(joinedload(Activity.user))
+        .join(ranked, ranked.c.activity_id == Activity.id)
+        .filter(ranked.c.rank == 1)
     )
+    if before_id:
+        rows_query = rows_query.filter(Activity.id < before_id)
+    rows = rows_query.order_by(Activity.id.desc()).limit(limit).all()
 
     payload = []
-    seen_keys = set()
     for row in rows:
         recycler = row.user
+        assignment_id = row.center_assignment_id
 
-        assignment_id = None
-        has_center_verification_signal = False
-        for signal in (row.signals or []):
-            if (signal.signal_type or '').strip().lower() != 'center_verification':
-                continue
-            has_center_verification_signal = True
-            signal_meta = {}
-            try:
-                signal_meta = json.loads(signal.metadata_json) if signal.metadata_json else {}
-            except Exception:
-                signal_meta = {}
-            if isinstance(signal_meta, dict):
-                assignment_id = signal_meta.get('assignment_id')
-            if assignment_id is not None:
-                break
-
-        stage = (row.pipeline_stage or '').strip().lower()
-        status = (row.status or '').strip().lower()
-        verified = (row.verified_status or '').strip().lower()
-        has_verification_stage = stage in {'attested', 'rewarded', 'verified'}
-        has_verified_status = status in {'attested', 'rewarded', 'verified'} or verified == 'verified'
-        if not (has_verification_stage or has_verified_status or has_center_verification_signal):
-            continue
-
-        dedupe_key = f"assignment:{assignment_id}" if assignment_id is not None else f"activity:{row.id}"
-        if dedupe_key in seen_keys:
-            continue
-        seen_keys.add(dedupe_key)
-
-        # Use finalization time when available to reflect true verification completion time.
-        dt_source = row.logbook_finalized_at
-        if not dt_source:
-            raw_ts = (row.timestamp or '').strip()
-            if raw_ts:
-                try:
-                    dt_source = datetime.fromisoformat(raw_ts.replace('Z', '+00:00'))
-                except ValueError:
-                    dt_source = None
-        if not dt_source:
-            dt_source = now_utc
-
-        dt_utc = dt_source.astimezone(timezone.utc) if dt_source.tzinfo else dt_source.replace(tzinfo=timezone.utc)
-
-        if scope == 'today' and dt_utc.date() != today_utc:
-            continue
-        if scope == 'yesterday' and dt_utc.date() != yesterday_utc:
-            continue
-        if scope == 'recent' and dt_utc.date() < yesterday_utc:
-            continue
+        dt_utc = parse_utc_timestamp(row.logbook_finalized_at or row.timestamp_utc) or now_utc
 
         tx_id = row.hcs_tx_id or row.logbook_tx_id or row.hedera_tx_id or row.hts_tx_id or row.reward_tx_id
         hashscan_url = hashscan_link(tx_id)
         if not hashscan_url:
             hashscan_url = hashscan_link(f"0.0.1001@1700000000.{row.id:09d}")
 
-        material_type = "Mixed Recyclables"
-        weight_kg = None
-        desc_raw = (row.desc or "").strip()
-        pickup_match = re.search(r"\((\d+(?:\.\d+)?)kg\s+of\s+([^\)]+)\)", desc_raw, re.IGNORECASE)
-        if pickup_match:
-            try:
-                weight_kg = float(pickup_match.group(1))
-            except (TypeError, ValueError):
-                weight_kg = None
-            material_type = canonical_material_label(pickup_match.group(2).strip())
-        elif 'pending drop-off' in desc_raw.lower():
-            # Fallback parse for legacy direct-lane entries with weight-only descriptions.
-            weight_only = re.search(r"\((\d+(?:\.\d+)?)kg\)", desc_raw, re.IGNORECASE)
-            if weight_only:
-                try:
-                    weight_kg = float(weight_only.group(1))
-                except (TypeError, ValueError):
-                    weight_kg = None
+        material_type = canonical_material_label(row.material_key)
+        weight_kg = float(row.weight_kg) if row.weight_kg else None
 
         routed_name, _ = routed_collector_label(weight_kg, assignment_id or row.id)
 
@@ -4313,8 +5118,10 @@ def api_center_recent_verifications():
             "hashscan_url": hashscan_url,
         })
 
-    payload.sort(key=lambda x: x.get('timestamp') or '', reverse=True)
-    return jsonify({"rows": payload})
+    # Rows stay in Activity.id order: the page boundary (before_id) is an id, so
+    # re-sorting by timestamp would interleave rows across pages.
+    next_before_id = rows[-1].id if len(rows) == limit else None
+    return jsonify({"rows": payload, "next_before_id": next_before_id})
 
 
 @app.post('/api/center/assignments/<int:assignment_id>/verify')
@@ -4365,6 +5172,8 @@ def api_center_verify_assignment(assignment_id):
         user_id=recycler.id,
         timestamp=datetime.now(timezone.utc).isoformat(),
         desc=desc,
+        weight_kg=round(weight, 1),
+        material_key=normalize_material_key(material),
         amount=reward_amount,
         status='pending',
         verified_status='pending',
@@ -4429,6 +5238,7 @@ def api_center_verify_assignment(assignment_id):
     })
 
 @app.route('/center')
+@read_replica
 @login_required 
 def center_dashboard():
     if not can_verify_deposit_center(current_user):
@@ -4455,8 +5265,6 @@ def household_dashboard():
     if not can_create_opportunity_resident(current_user):
         return redirect(url_for(access_denied_redirect_for(current_user)))
 
-    ensure_demo_business_verified_transactions()
-
     # Attach user to default location if no profile exists
     profile = HouseholdProfile.query.filter_by(user_id=current_user.id).first()
     if not profile:
@@ -4498,14 +5306,7 @@ def household_dashboard():
         "eco_funded_total": 0.0,
     }
     if top_business:
-        completed_assignments = (
-            OpportunityAssignment.query
-            .join(PickupOpportunity, OpportunityAssignment.opportunity_id == PickupOpportunity.id)
-            .filter(PickupOpportunity.source_role == 'business')
-            .filter(PickupOpportunity.source_user_id == top_business.id)
-            .filter(OpportunityAssignment.linked_activity_id.isnot(None))
-            .all()
-        )
+        completed_assignments = queries.linked_assignments_for_business(top_business.id).all()
         total_kg = 0.0
         total_eco = 0.0
         for a in completed_assignments:
@@ -4689,7 +5490,14 @@ def bulk_activities():
             db.session.commit()
 
         # Return the canonical activity list
-        acts = Activity.query.filter_by(user_id=current_user.id).order_by(Activity.id.desc()).limit(500).all()
+        acts = (
+            Activity.query
+            .options(load_only(Activity.id, Activity.timestamp, Activity.desc, Activity.amount))
+            .filter_by(user_id=current_user.id)
+            .order_by(Activity.id.desc())
+            .limit(500)
+            .all()
+        )
         result = [{'timestamp': x.timestamp, 'desc': x.desc, 'amount': x.amount} for x in acts]
         return jsonify({'success': True, 'added': added, 'activities': result})
     except Exception as e:
@@ -4769,6 +5577,8 @@ def confirm_dropoff():
             user_id=collector.id,
             timestamp=datetime.utcnow().isoformat(),
             desc=desc,
+            weight_kg=round(weight_value, 1),
+            material_key=normalize_material_key(material),
             amount=float(reward_amount),
             verified_status="pending",
             status="pending",
@@ -5069,15 +5879,16 @@ def simulate_deposit():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/my-dashboard-data')
+@read_replica
 @login_required
+# Neighborhood progress reads everyone's recent activity; the 30-day window moves with the clock.
+@conditional_get(lambda: [SCOPE_PIPELINE, SCOPE_HOTSPOTS, user_scope(current_user.id)], time_bucket_seconds=300)
 def get_dashboard_data():
     """
     Returns dashboard data with real balance calculated from verified activities.
     For demo user: Uses demo seed data + any new activities.
     For other users: Calculates from their verified activities database.
     """
-    purge_stale_demo_seed_rows()
-
     timeline = []
     total_eco = 0.0
     total_kg = 0.0
@@ -5086,9 +5897,6 @@ def get_dashboard_data():
     now_utc = datetime.now(timezone.utc)
     recent_cutoff = now_utc - timedelta(days=30)
 
-    def parse_kg_from_desc(text_value):
-        return parse_weight_kg_from_text(text_value)
-
     def counts_for_balance(activity):
         return is_activity_verified_canonical(activity)
 
@@ -5101,21 +5909,6 @@ def get_dashboard_data():
     def assignment_weight_kg(assignment):
         return assignment_weight_kg_for_metrics(assignment)
 
-    def parse_timestamp_utc(value):
-        if not value:
-            return None
-        if isinstance(value, datetime):
-            dt = value
-        else:
-            raw = str(value).strip().replace('Z', '+00:00')
-            try:
-                dt = datetime.fromisoformat(raw)
-            except Exception:
-                return None
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.astimezone(timezone.utc)
-
     def _generated_proof_url(activity_id, timestamp, desc, amount, trust_weight, user_email):
         qs = urlencode({
             "activity_id": activity_id,
@@ -5131,8 +5924,9 @@ def get_dashboard_data():
         # Fetch all activities for this user (verified + pending)
         acts = (
             Activity.query
+            .options(queries.activity_diagnostics())
             .filter_by(user_id=current_user.id)
-            .order_by(Activity.timestamp.desc())
+            .order_by(Activity.timestamp_utc.desc())
             .limit(200)
             .all()
         )
@@ -5183,11 +5977,7 @@ def get_dashboard_data():
                     pass
 
             if counts_for_completed(a):
-                kg_from_desc = parse_kg_from_desc(a.desc)
-                total_kg += kg_from_desc
-                row_dt = parse_timestamp_utc(a.timestamp)
-                if row_dt and row_dt >= recent_cutoff:
-                    recent_kg_30d += kg_from_desc
+                total_kg += activity_weight_kg(a)
 
         # Include assignment-stage progress so submitted/in-transit rows reflect in totals.
         assignments = (
@@ -5203,14 +5993,34 @@ def get_dashboard_data():
             # Avoid double counting when assignment already produced a linked activity row.
             if assignment.linked_activity_id:
                 continue
-            assignment_kg = assignment_weight_kg(assignment)
-            total_kg += assignment_kg
-            reference_dt = assignment.submitted_at or assignment.accepted_at
-            parsed_reference = parse_timestamp_utc(reference_dt)
-            if parsed_reference and parsed_reference >= recent_cutoff:
-                recent_kg_30d += assignment_kg
+            total_kg += assignment_weight_kg(assignment)
 
         total_recycled_completed = total_kg
+
+        # 30-day window as SQL range predicates over the typed timestamps.
+        recent_activity_kg = (
+            db.session.query(func.coalesce(func.sum(Activity.weight_kg), 0.0))
+            .filter(
+                Activity.user_id == current_user.id,
+                Activity.timestamp_utc >= recent_cutoff,
+                activity_verified_canonical_clause(),
+            )
+            .scalar()
+        )
+        recent_assignment_kg = (
+            db.session.query(func.coalesce(func.sum(
+                func.coalesce(OpportunityAssignment.submitted_weight_kg, PickupOpportunity.estimated_kg, 0.0)
+            ), 0.0))
+            .outerjoin(PickupOpportunity, PickupOpportunity.id == OpportunityAssignment.opportunity_id)
+            .filter(
+                OpportunityAssignment.recycler_user_id == current_user.id,
+                func.lower(func.trim(OpportunityAssignment.status)) == 'completed',
+                OpportunityAssignment.linked_activity_id.is_(None),
+                func.coalesce(OpportunityAssignment.submitted_at, OpportunityAssignment.accepted_at) >= recent_cutoff,
+            )
+            .scalar()
+        )
+        recent_kg_30d = max(0.0, float(recent_activity_kg or 0.0)) + max(0.0, float(recent_assignment_kg or 0.0))
     except Exception as e:
         print('Error fetching activities:', e)
         timeline = []
@@ -5221,28 +6031,10 @@ def get_dashboard_data():
     # Fixed targets for demo consistency.
     monthly_goal = 10
 
-    # Dynamic neighborhood aggregation from all pipeline activity + unlinked assignment progress.
+    # Neighborhood aggregation from the daily rollup (verified activity + unlinked completed assignments).
     neighborhood_current_kg = 0.0
     try:
-        all_acts = Activity.query.order_by(Activity.id.desc()).limit(2000).all()
-        for activity in all_acts:
-            if not counts_for_completed(activity):
-                continue
-            row_dt = parse_timestamp_utc(activity.timestamp)
-            if row_dt and row_dt >= recent_cutoff:
-                neighborhood_current_kg += parse_kg_from_desc(activity.desc)
-
-        all_assignments = OpportunityAssignment.query.order_by(OpportunityAssignment.id.desc()).limit(2000).all()
-        for assignment in all_assignments:
-            assignment_status = (assignment.status or '').strip().lower()
-            if assignment_status not in {'completed'}:
-                continue
-            if assignment.linked_activity_id:
-                continue
-            reference_dt = assignment.submitted_at or assignment.accepted_at
-            parsed_reference = parse_timestamp_utc(reference_dt)
-            if parsed_reference and parsed_reference >= recent_cutoff:
-                neighborhood_current_kg += assignment_weight_kg(assignment)
+        neighborhood_current_kg = neighborhood_recent_kg(days=30)
     except Exception as agg_err:
         print(f"[DASHBOARD] Neighborhood aggregate fallback: {agg_err}")
         neighborhood_current_kg = total_recycled_completed
@@ -5281,29 +6073,21 @@ def download_income_report_pdf():
             "error": "PDF dependency missing. Install reportlab to enable this feature."
         }), 500
 
+    # Summary and per-material rows are all-time figures from the same GROUP BY;
+    # the ledger lists the most recent of those activities.
+    totals_by_material = verified_totals_by_material(current_user.id)
+    verified_count = sum(entry["count"] for entry in totals_by_material.values())
+    total_eco = sum(entry["eco"] for entry in totals_by_material.values())
+    total_kg = sum(entry["kg"] for entry in totals_by_material.values())
     verified_activities = (
         Activity.query
         .filter_by(user_id=current_user.id)
         .filter((Activity.verified_status == "verified") | (Activity.status == "verified"))
-        .order_by(Activity.timestamp.desc())
-        .limit(100)
+        .order_by(Activity.timestamp_utc.desc())
+        .limit(20)
         .all()
     )
 
-    total_eco = 0.0
-    total_kg = 0.0
-    for activity in verified_activities:
-        try:
-            total_eco += float(activity.amount or 0)
-        except Exception:
-            total_eco += 0.0
-        match = re.search(r'(\d+\.?\d*)\s*kg', activity.desc or '')
-        if match:
-            try:
-                total_kg += float(match.group(1))
-            except Exception:
-                pass
-
     report_buffer = io.BytesIO()
     document = SimpleDocTemplate(
         report_buffer,
@@ -5366,10 +6150,13 @@ def download_income_report_pdf():
     summary_rows = [
         ["Collector", collector_name],
         ["Email", collector_email],
-        ["Verified transactions", str(len(verified_activities))],
+        ["Verified transactions", str(verified_count)],
         ["Total income (ECO)", f"{total_eco:,.2f}"],
         ["Total recycled (kg)", f"{total_kg:,.1f}"],
     ]
+    for material_key, entry in sorted(totals_by_material.items(), key=lambda item: -item[1]["kg"]):
+        if entry["kg"] > 0:
+            summary_rows.append([f"{canonical_material_label(material_key)} (kg)", f"{entry['kg']:,.1f}"])
     summary_table = Table(summary_rows, colWidths=[48 * mm, 124 * mm])
     summary_table.setStyle(TableStyle([
         ("BACKGROUND", (0, 0), (0, -1), colors.HexColor("#f1f5f9")),
@@ -5387,11 +6174,11 @@ def download_income_report_pdf():
     story.append(summary_table)
     story.append(Spacer(1, 10))
 
-    story.append(Paragraph("<b>Verified Activity Ledger</b>", body_style))
+    story.append(Paragraph("<b>Verified Activity Ledger</b> (most recent 20)", body_style))
     story.append(Spacer(1, 4))
 
     ledger_rows = [["Date", "Description", "Amount (ECO)", "Hedera Reference"]]
-    for activity in verified_activities[:20]:
+    for activity in verified_activities:
         timestamp = activity.timestamp
         if hasattr(timestamp, "strftime"):
             date_text = timestamp.strftime("%Y-%m-%d")
@@ -5472,7 +6259,7 @@ def download_proof_bundle(activity_id):
 
 
 def _build_proof_payload(activity=None, fallback_activity_id='', fallback_timestamp='', fallback_desc='', fallback_amount=0.0, fallback_user=''):
-    tasks = []
+    latest_by_agent = {}
     if activity:
         tasks = (
             AgentTask.query
@@ -5480,10 +6267,9 @@ def _build_proof_payload(activity=None, fallback_activity_id='', fallback_timest
             .order_by(AgentTask.id.asc())
             .all()
         )
-
-    latest_by_agent = {}
-    for task in tasks:
-        latest_by_agent[task.agent_name] = task
+        # Finished tasks older than the compaction window live in activity_task_summary.
+        archived = task_compaction.archived_entries(db.session, [activity.id]).get(activity.id, [])
+        latest_by_agent = task_compaction.latest_by_agent(archived, tasks)
 
     pipeline_order = ["CollectorAgent", "VerifierAgent", "LogbookAgent", "RewardAgent", "ComplianceAgent"]
 
@@ -5497,10 +6283,10 @@ def _build_proof_payload(activity=None, fallback_activity_id='', fallback_timest
     for agent_name in sorted(latest_by_agent.keys(), key=_agent_sort_key):
         task = latest_by_agent[agent_name]
         agent_approvals.append({
-            "agent": task.agent_name,
-            "status": task.status,
-            "attempts": task.attempts,
-            "last_error": task.last_error,
+            "agent": task["agent"],
+            "status": task["status"],
+            "attempts": task["attempts"],
+            "last_error": task["last_error"],
         })
 
     effective_activity_id = activity.id if activity else (fallback_activity_id or "")
@@ -5717,79 +6503,42 @@ def verify_proof_bundle(activity_id):
 
 @app.route('/api/agent-status')
 @login_required
+@conditional_get(lambda: [SCOPE_AGENT_LOGS])
 def get_agent_status():
-    agents = ["CollectorAgent", "VerifierAgent", "LogbookAgent", "RewardAgent", "ComplianceAgent"]
-    statuses = []
-
-    def _normalize_ts(ts: str):
-        if not ts:
-            return None
-        return ts.replace("+00:00", "Z")
-
-    error_levels = ("error", "failed")
-
-    for agent_name in agents:
-        latest_log = (
-            AgentLog.query
-            .filter(AgentLog.agent_name == agent_name)
-            .order_by(AgentLog.id.desc())
-            .first()
-        )
+    return jsonify(build_agent_status_payload())
 
-        latest_error = (
-            AgentLog.query
-            .filter(
-                AgentLog.agent_name == agent_name,
-                db.func.lower(AgentLog.level).in_(error_levels)
-            )
-            .order_by(AgentLog.id.desc())
-            .first()
-        )
 
-        latest_non_error = (
-            AgentLog.query
-            .filter(
-                AgentLog.agent_name == agent_name,
-                db.func.lower(AgentLog.level).notin_(error_levels)
-            )
-            .order_by(AgentLog.id.desc())
-            .first()
-        )
-
-        latest_tx = (
-            None if agent_name not in ("LogbookAgent", "RewardAgent") else (
-                AgentLog.query
-                .filter(
-                    AgentLog.agent_name == agent_name,
-                    AgentLog.hedera_tx_id.isnot(None),
-                    AgentLog.hedera_tx_id != ""
-                )
-                .order_by(AgentLog.id.desc())
-                .first()
-            )
-        )
+@cached(tags=[SCOPE_AGENT_LOGS])
+def build_agent_status_payload() -> dict:
+    agents = ["CollectorAgent", "VerifierAgent", "LogbookAgent", "RewardAgent", "ComplianceAgent"]
+    records = agent_health.registry.snapshot(db.session)
+    return {"agents": [agent_health.status_for(agent_name, records.get(agent_name)) for agent_name in agents]}
 
-        if not latest_log:
-            health = "unknown"
-        else:
-            level = (latest_log.level or "").lower()
-            health = "degraded" if level in error_levels else "ok"
-            if latest_error and (not latest_non_error or latest_error.id > latest_non_error.id):
-                health = "degraded"
-
-        last_error_msg = None
-        if latest_error:
-            last_error_msg = latest_error.last_error or latest_error.message
-
-        statuses.append({
-            "agent": agent_name,
-            "health": health,
-            "last_seen": _normalize_ts(latest_log.created_at if latest_log else None),
-            "last_tx": latest_tx.hedera_tx_id if latest_tx else None,
-            "last_error": last_error_msg,
-        })
 
-    return jsonify({"agents": statuses})
+@app.get('/api/events/stream')
+def api_events_stream():
+    # Server-sent events: ?scope=admin subscribes monitors to the pipeline/queue
+    # channel; otherwise signed-in users receive their own channel.
+    channels = set()
+    if (request.args.get('scope') or '').strip().lower() == 'admin':
+        if not can_review_events():
+            abort(403)
+        channels.add(ADMIN_CHANNEL)
+    elif current_user.is_authenticated:
+        channels.add(user_channel(current_user.id))
+    if not channels:
+        return jsonify({"ok": False, "error": "Authentication required"}), 401
+
+    # "<epoch>-<sequence>"; the broker answers ids it did not issue with a resync.
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or None
+
+    response = Response(
+        stream_with_context(stream_events(channels, last_event_id=last_event_id)),
+        mimetype='text/event-stream',
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 
 # -----------------------------------------------------------------
@@ -5853,18 +6602,12 @@ def logbook_retry_blocked(activity_id: int) -> bool:
 
 
 def log_agent_event(activity_id: int, agent_name: str, level: str, pipeline_stage: str, hedera_tx_id: str, message: str):
-    activity = db.session.get(Activity, activity_id)
-    ts = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-    db.session.add(AgentLog(
-        created_at=ts,
-        activity_id=activity_id,
-        agent_name=agent_name,
-        level=level,
-        message=(message or "")[:512],
-        pipeline_stage=pipeline_stage,
-        hedera_tx_id=hedera_tx_id,
-        last_error=getattr(activity, "last_error", None),
-    ))
+    # last_error comes from the activity if this session already loaded it, else at buffer flush time.
+    activity = db.session.identity_map.get(db.session.identity_key(Activity, activity_id))
+    log_buffer.buffer.write(
+        activity_id, agent_name, message, level=level, activity=activity,
+        pipeline_stage=pipeline_stage, hedera_tx_id=hedera_tx_id,
+    )
 
 
 @app.route('/admin/monitor')
@@ -5881,10 +6624,14 @@ def reset_demo():
         db.session.remove()
         db.drop_all()
         db.create_all()
+        agent_health.registry.clear()
+        log_buffer.buffer.discard()
         ensure_activity_columns()
         seed_layer0_if_empty()
         seed_demo_data(force_reset=True)
         db.session.commit()
+        # schema_migration was recreated empty; record the steps against the fresh data.
+        migrations.run_pending(db.session)
 
         admin_user = User.query.filter_by(email='admin@vericycle.com').first()
         if admin_user:
@@ -6020,6 +6767,8 @@ def _export_evidence_pack(activity_rows: list[Activity], profile_name: str) -> s
 def api_admin_demo_profile():
     if not can_review_events():
         abort(403)
+    from demo_profile import DEMO_PROFILES, profile_health
+
     name = request.args.get("name", "judge_testnet_v1")
     payload = profile_health(name)
     payload["available_profiles"] = list(DEMO_PROFILES.keys())
@@ -6031,6 +6780,8 @@ def api_admin_demo_profile():
 def api_admin_apply_demo_profile():
     if not is_admin_user():
         abort(403)
+    from demo_profile import apply_demo_profile, profile_health
+
     body = request.get_json(silent=True) or {}
     name = body.get("name", "judge_testnet_v1")
     applied = apply_demo_profile(name)
@@ -6043,6 +6794,8 @@ def api_admin_apply_demo_profile():
 def api_admin_generate_evidence_pack():
     if not can_manage_admin_monitor_actions():
         abort(403)
+    from demo_profile import apply_demo_profile
+
 
     body = request.get_json(silent=True) or {}
     profile_name = body.get("profile", "judge_testnet_v1")
@@ -6097,11 +6850,12 @@ def normalize_status_label_for_api(activity: Activity) -> str:
 
 
 @app.route('/api/admin/metrics-summary')
+@read_replica
 def api_admin_metrics_summary():
     if not can_review_events():
         abort(403)
 
-    activities = Activity.query.all()
+    activities = queries.activity_summaries()
     verified_count = sum(1 for a in activities if is_activity_verified_canonical(a))
     anchored_count = sum(1 for a in activities if is_activity_anchored_canonical(a))
     rewarded_count = sum(1 for a in activities if is_activity_rewarded_canonical(a))
@@ -6116,13 +6870,20 @@ def api_admin_metrics_summary():
 
 
 @app.route('/api/admin/activities')
+@read_replica
 def api_admin_activities():
     if not can_review_events():
         abort(403)
-    activities = Activity.query.order_by(Activity.timestamp.desc(), Activity.id.desc()).all()
+    activities = (
+        Activity.query
+        .options(queries.activity_diagnostics())
+        .order_by(Activity.timestamp_utc.desc(), Activity.id.desc())
+        .all()
+    )
 
     activity_ids = [a.id for a in activities]
     tasks_by_activity = defaultdict(list)
+    archived_by_activity = {}
     events_by_activity = defaultdict(list)
 
     if activity_ids:
@@ -6134,6 +6895,7 @@ def api_admin_activities():
         )
         for task in all_tasks:
             tasks_by_activity[task.activity_id].append(task)
+        archived_by_activity = task_compaction.archived_entries(db.session, activity_ids)
 
         all_events = (
             AgentCommerceEvent.query
@@ -6147,19 +6909,18 @@ def api_admin_activities():
     result = []
 
     for activity in activities:
-        tasks = tasks_by_activity.get(activity.id, [])
-
-        latest_by_agent = {}
-        for t in tasks:
-            latest_by_agent[t.agent_name] = t
+        latest_by_agent = task_compaction.latest_by_agent(
+            archived_by_activity.get(activity.id, []),
+            tasks_by_activity.get(activity.id, []),
+        )
 
         task_data = []
         for _, t in latest_by_agent.items():
             task_data.append({
-                'agent': t.agent_name,
-                'status': t.status,
-                'attempts': t.attempts,
-                'error': t.last_error,
+                'agent': t['agent'],
+                'status': t['status'],
+                'attempts': t['attempts'],
+                'error': t['last_error'],
             })
 
         order = ["CollectorAgent", "VerifierAgent", "LogbookAgent", "RewardAgent", "ComplianceAgent"]
@@ -6362,30 +7123,21 @@ def api_review_event_reject(activity_id):
     return jsonify({"ok": True, "activity_id": activity.id})
 
 
+def _admin_queue_etag_scopes():
+    if not can_review_events():
+        abort(403)
+    return [SCOPE_TASKS]
+
+
 @app.route('/api/admin/queue')
+# The stalled-running count ages with the clock, so the ETag rolls over every 30s.
+@conditional_get(_admin_queue_etag_scopes, time_bucket_seconds=30)
 def api_admin_queue():
     if not can_review_events():
         abort(403)
-    pending = AgentTask.query.filter_by(status="queued").count()
-    running = AgentTask.query.filter_by(status="running").count()
-    failed = AgentTask.query.filter_by(status="failed").count()
-    done = AgentTask.query.filter_by(status="done").count()
-    dead_letter = AgentTask.query.filter_by(status="dead_letter").count()
-
-    stall_cutoff = datetime.now(timezone.utc) - timedelta(minutes=3)
-    stalled_running = AgentTask.query.filter(
-        AgentTask.status == "running",
-        AgentTask.updated_at < stall_cutoff
-    ).count()
-
-    return jsonify({
-        "queued": pending,
-        "running": running,
-        "failed": failed,
-        "done": done,
-        "dead_letter": dead_letter,
-        "stalled_running": stalled_running,
-    })
+    # Status totals, stalled count, per-agent depth and oldest queued age from
+    # one GROUP BY, normally served from the worker-refreshed snapshot.
+    return jsonify(queue_stats.snapshot.get(db.session))
 
 
 @app.route('/api/admin/alerts')
@@ -6418,24 +7170,17 @@ def api_admin_alerts():
     lag_cutoff = now - timedelta(minutes=5)
     lagging_hcs = Activity.query.filter(
         Activity.logbook_status == "pending",
-        Activity.pipeline_stage.in_(["verified", "logged", "rewarded"])
-    ).all()
-    filtered_lagging = []
-    for activity in lagging_hcs:
-        ts_raw = activity.timestamp or ""
-        try:
-            ts_dt = datetime.fromisoformat(ts_raw.replace("Z", "+00:00"))
-            if ts_dt < lag_cutoff:
-                filtered_lagging.append(activity)
-        except Exception:
-            continue
-    lagging_hcs = filtered_lagging
+        Activity.pipeline_stage.in_(["verified", "logged", "rewarded"]),
+        Activity.timestamp_utc < lag_cutoff,
+    ).count()
     if lagging_hcs:
-        alerts.append({"level": "warn", "code": "HCS_LATENCY", "message": f"{len(lagging_hcs)} activities pending HCS for >5 min."})
+        alerts.append({"level": "warn", "code": "HCS_LATENCY", "message": f"{lagging_hcs} activities pending HCS for >5 min."})
 
     token_id = os.getenv("ECOCOIN_TOKEN_ID")
     treasury_id = os.getenv("ECOCOIN_TREASURY_ID") or os.getenv("OPERATOR_ID")
     if token_id and treasury_id:
+        import requests
+
         try:
             bal_url = f"https://testnet.mirrornode.hedera.com/api/v1/tokens/{token_id}/balances"
             resp = requests.get(bal_url, params={"account.id": treasury_id, "limit": 1}, timeout=10)
@@ -6453,6 +7198,43 @@ def api_admin_alerts():
     return jsonify({"alerts": alerts})
 
 
+@app.get('/api/admin/cache-stats')
+def api_admin_cache_stats():
+    if not can_review_events():
+        abort(403)
+    return jsonify({"ok": True, **computation_cache.stats()})
+
+
+METRICS_TOKEN = (os.getenv('VERICYCLE_METRICS_TOKEN') or '').strip()
+
+
+@app.get('/metrics')
+def metrics_endpoint():
+    authorization = request.headers.get('Authorization') or ''
+    token_ok = bool(METRICS_TOKEN) and hmac.compare_digest(authorization, f"Bearer {METRICS_TOKEN}")
+    if not token_ok and not (current_user.is_authenticated and is_admin_user(current_user)):
+        abort(403)
+    try:
+        gauges = metrics.queue_gauges(queue_stats.snapshot.get(db.session))
+    except Exception as e:
+        db.session.rollback()
+        print(f"[METRICS] Queue gauges skipped: {type(e).__name__}: {e}", flush=True)
+        gauges = {}
+    body = metrics.render(metrics.registry.collect(), gauges)
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
+@app.get('/api/admin/sql-profile')
+def api_admin_sql_profile():
+    # Statement text can carry other users' data: real admins only, even in demo mode.
+    if not (current_user.is_authenticated and is_admin_user(current_user)):
+        abort(403)
+    if (request.args.get('reset') or '').strip().lower() in {'1', 'true', 'yes'}:
+        sql_profiler.profiler.reset()
+    limit = max(1, min(request.args.get('limit', default=20, type=int) or 20, 200))
+    return jsonify({"ok": True, **sql_profiler.profiler.report(limit=limit)})
+
+
 @app.route('/api/admin/dead-letter')
 def api_admin_dead_letter():
     if not can_review_events():
@@ -6600,6 +7382,8 @@ def api_admin_commerce_events(activity_id):
 
 @app.route('/api/mirror-verify/<int:activity_id>')
 def api_mirror_verify(activity_id):
+    import requests
+
     activity = Activity.query.get_or_404(activity_id)
 
     if not activity.hedera_tx_id:
@@ -6644,6 +7428,8 @@ def admin_clear_logs():
     keep = 200
     keep_subquery = db.session.query(AgentLog.id).order_by(AgentLog.id.desc()).limit(keep).subquery()
     AgentLog.query.filter(~AgentLog.id.in_(keep_subquery)).delete(synchronize_session=False)
+    # Bulk deletes skip the flush hooks; agent status is derived from these logs.
+    touch_scopes(db.session, [SCOPE_AGENT_LOGS])
     audit_admin_action("clear_logs", "agent_log", None, f"keep={keep}")
     db.session.commit()
     return redirect('/admin/monitor')
@@ -6805,6 +7591,10 @@ def handle_unexpected_error(error):
     return 'Internal Server Error', 500
 
 
+# Module fully imported: print the boot profile if VERICYCLE_BOOT_PROFILE=1.
+boot_profiler.report()
+
+
 # -----------------------------------------------------------------
 # 9. RUN THE APP
 # - Start the Flask development server when executed directly.
@@ -0,0 +1,103 @@
+"""
+Startup profiling and lazy imports.
+
+With VERICYCLE_BOOT_PROFILE=1, app.py installs an import hook before its own
+imports and wraps each boot step in boot_profiler.step(); when the boot block
+finishes, report() prints the slowest modules (inclusive and self time) and
+the time spent per boot step:
+
+    VERICYCLE_BOOT_PROFILE=1 python -c "import app"
+
+(`python -X importtime -c "import app"` gives the raw per-module import tree.)
+"""
+
+from __future__ import annotations
+
+import importlib.abc
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+ENABLED = os.getenv("VERICYCLE_BOOT_PROFILE", "0").strip().lower() in ("1", "true", "yes")
+REPORT_LIMIT = int(os.getenv("VERICYCLE_BOOT_PROFILE_TOP", "20"))
+
+_import_times: dict[str, list[float]] = {}  # module -> [inclusive, self]
+_local = threading.local()  # per-thread stack of [module, child time]
+_steps: list[tuple[str, float]] = []
+_started = time.perf_counter()
+
+
+class _TimingLoader(importlib.abc.Loader):
+    def __init__(self, loader):
+        self._loader = loader
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        stack = _local.__dict__.setdefault("stack", [])
+        frame = [module.__name__, 0.0]
+        stack.append(frame)
+        started = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - started
+            stack.pop()
+            if stack:
+                stack[-1][1] += elapsed
+            _import_times[module.__name__] = [elapsed, elapsed - frame[1]]
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    def find_spec(self, fullname, path, target=None):
+        # Ask the remaining finders, then wrap whatever loader they picked.
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimingLoader(spec.loader)
+                return spec
+        return None
+
+
+def install():
+    """Start timing imports (no-op unless VERICYCLE_BOOT_PROFILE=1)."""
+    global _started
+    if ENABLED and not any(isinstance(finder, _TimingFinder) for finder in sys.meta_path):
+        _started = time.perf_counter()
+        sys.meta_path.insert(0, _TimingFinder())
+
+
+@contextmanager
+def step(name: str):
+    """Time one boot step; cheap enough to leave in place when profiling is off."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if ENABLED:
+            _steps.append((name, time.perf_counter() - started))
+
+
+def report(out=None):
+    if not ENABLED:
+        return
+    out = out or sys.stderr
+    total = time.perf_counter() - _started
+    print(f"[BOOT PROFILE] total {total * 1000:.1f} ms since install()", file=out, flush=True)
+    print(f"[BOOT PROFILE] top {REPORT_LIMIT} imports (inclusive ms / self ms):", file=out)
+    ranked = sorted(_import_times.items(), key=lambda item: item[1][0], reverse=True)[:REPORT_LIMIT]
+    for module, (inclusive, self_time) in ranked:
+        print(f"  {inclusive * 1000:9.1f} {self_time * 1000:9.1f}  {module}", file=out)
+    print("[BOOT PROFILE] boot steps (ms):", file=out)
+    for name, elapsed in _steps:
+        print(f"  {elapsed * 1000:9.1f}  {name}", file=out)
+    out.flush()
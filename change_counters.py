@@ -0,0 +1,192 @@
+"""
+Per-scope change counters for cheap "has anything changed?" checks.
+
+Every commit bumps a version row for each scope its flushes touched, inside
+the same transaction, so counters are shared by all web processes and roll
+back with the change they describe. The bump happens once, just before the
+commit, so the row lock on a busy scope is held only for the commit itself,
+not for a whole multi-flush transaction. Polling endpoints turn the versions of the scopes
+they depend on into an ETag and answer If-None-Match with 304 before running
+any of their heavy queries.
+
+Scopes:
+- "pipeline": activities, agent tasks, dead letters, verification signals
+- "tasks": agent task rows only (the queue stats snapshot and /api/admin/queue)
+- "agent_logs": AgentLog lines and the agent_health rows derived from them (kept
+  apart so the log flusher's frequent commits don't move every pipeline ETag)
+- "hotspots": pickup opportunities, assignments, verification signals, community hotspot rows
+- "user:<id>": rows owned by one user (activities, wallet, assignments, profile)
+"""
+
+import hashlib
+import time
+
+from sqlalchemy import event, select, update
+
+SCOPE_PIPELINE = "pipeline"
+SCOPE_HOTSPOTS = "hotspots"
+SCOPE_TASKS = "tasks"
+SCOPE_AGENT_LOGS = "agent_logs"
+FLUSHED_SCOPES_KEY = "_change_counter_flushed"
+PENDING_SCOPES_KEY = "_change_counter_pending"
+
+_commit_callbacks = []
+
+
+def user_scope(user_id) -> str:
+    return f"user:{int(user_id)}"
+
+
+def scopes_for_instance(obj) -> set[str]:
+    from models import (
+        Activity, AgentCommerceEvent, AgentLog, AgentTask, CommunityHotspot, DeadLetterTask,
+        OpportunityAssignment, PickupOpportunity, User, VerificationSignal, WalletTransaction,
+    )
+
+    scopes = set()
+    if isinstance(obj, (Activity, AgentTask, DeadLetterTask, AgentCommerceEvent)):
+        scopes.add(SCOPE_PIPELINE)
+    if isinstance(obj, AgentTask):
+        scopes.add(SCOPE_TASKS)
+    if isinstance(obj, AgentLog):
+        scopes.add(SCOPE_AGENT_LOGS)
+    if isinstance(obj, VerificationSignal):
+        scopes.update((SCOPE_PIPELINE, SCOPE_HOTSPOTS))
+    if isinstance(obj, (PickupOpportunity, OpportunityAssignment, CommunityHotspot)):
+        scopes.add(SCOPE_HOTSPOTS)
+
+    owner_id = None
+    if isinstance(obj, (Activity, WalletTransaction)):
+        owner_id = obj.user_id
+    elif isinstance(obj, OpportunityAssignment):
+        owner_id = obj.recycler_user_id
+    elif isinstance(obj, PickupOpportunity):
+        owner_id = obj.source_user_id
+    elif isinstance(obj, User):
+        owner_id = obj.id
+    if owner_id:
+        scopes.add(user_scope(owner_id))
+    return scopes
+
+
+def _upsert(connection, table, key_values: dict, insert_values: dict, update_values: dict):
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table).values(**key_values, **insert_values)
+        stmt = stmt.on_conflict_do_update(index_elements=list(key_values.keys()), set_=update_values)
+        connection.execute(stmt)
+        return
+
+    where = [table.c[key] == value for key, value in key_values.items()]
+    result = connection.execute(update(table).where(*where).values(update_values))
+    if not result.rowcount:
+        connection.execute(table.insert().values(**key_values, **insert_values))
+
+
+def atomic_increment(connection, table, key_values: dict, column: str, amount=1, initial=None):
+    """
+    INSERT ... ON CONFLICT DO UPDATE SET column = column + amount, so concurrent
+    writers from several processes never lose an increment. A missing row is
+    created with `initial` (defaults to amount).
+    """
+    initial = amount if initial is None else initial
+    _upsert(connection, table, key_values, {column: initial}, {column: table.c[column] + amount})
+
+
+def upsert(connection, table, key_values: dict, values: dict):
+    """INSERT ... ON CONFLICT DO UPDATE SET values: safe when several processes create the same row."""
+    _upsert(connection, table, key_values, values, values)
+
+
+def bump_scopes(connection, scopes):
+    from models import ChangeCounter
+
+    table = ChangeCounter.__table__
+    # New rows start at the wall clock (ms) rather than 1 so a dropped and
+    # recreated table (demo reset) never hands out a version seen before.
+    initial = int(time.time() * 1000)
+    for scope in sorted(scopes):
+        atomic_increment(connection, table, {"scope": scope}, "version", 1, initial=initial)
+
+
+def _mark_scopes(session, scopes):
+    session.info.setdefault(PENDING_SCOPES_KEY, set()).update(scopes)
+    session.info.setdefault(FLUSHED_SCOPES_KEY, set()).update(scopes)
+
+
+def touch_scopes(session, scopes):
+    """Bump scopes (at commit) for writes that bypass the unit of work (bulk deletes, raw SQL)."""
+    scopes = set(scopes)
+    if scopes:
+        _mark_scopes(session, scopes)
+
+
+def has_uncommitted_changes(session) -> bool:
+    return bool(session.new or session.dirty or session.deleted or session.info.get(FLUSHED_SCOPES_KEY))
+
+
+def on_commit(callback):
+    """Register callback(scopes) to run after a commit that changed those scopes."""
+    _commit_callbacks.append(callback)
+    return callback
+
+
+def current_versions(session, scopes) -> dict[str, int]:
+    from models import ChangeCounter
+
+    scopes = list(scopes)
+    if not scopes:
+        return {}
+    rows = session.execute(
+        select(ChangeCounter.scope, ChangeCounter.version).where(ChangeCounter.scope.in_(scopes))
+    ).all()
+    versions = {scope: 0 for scope in scopes}
+    versions.update({scope: int(version or 0) for scope, version in rows})
+    return versions
+
+
+def etag_for_versions(name: str, versions: dict[str, int], *extra) -> str:
+    parts = [name] + [f"{scope}={versions[scope]}" for scope in sorted(versions)] + [str(x) for x in extra]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:24]
+
+
+def install_session_hooks(session_factory):
+    @event.listens_for(session_factory, "after_flush")
+    def _collect_change_scopes(session, flush_context):
+        scopes = set()
+        for obj in list(session.new) + list(session.deleted):
+            scopes |= scopes_for_instance(obj)
+        for obj in session.dirty:
+            if session.is_modified(obj, include_collections=False):
+                scopes |= scopes_for_instance(obj)
+        if scopes:
+            _mark_scopes(session, scopes)
+
+    @event.listens_for(session_factory, "before_commit")
+    def _bump_change_counters(session):
+        # commit() flushes after this hook; flush now so those changes are counted too.
+        if session.new or session.dirty or session.deleted:
+            session.flush()
+        scopes = session.info.pop(PENDING_SCOPES_KEY, None)
+        if scopes:
+            bump_scopes(session.connection(), scopes)
+
+    @event.listens_for(session_factory, "after_commit")
+    def _emit_committed_scopes(session):
+        scopes = session.info.pop(FLUSHED_SCOPES_KEY, None)
+        if not scopes:
+            return
+        for callback in list(_commit_callbacks):
+            try:
+                callback(scopes)
+            except Exception as e:
+                print(f"[CHANGE COUNTERS] commit callback failed: {type(e).__name__}: {e}", flush=True)
+
+    @event.listens_for(session_factory, "after_rollback")
+    def _discard_flushed_scopes(session):
+        session.info.pop(PENDING_SCOPES_KEY, None)
+        session.info.pop(FLUSHED_SCOPES_KEY, None)
@@ -0,0 +1,223 @@
+"""
+Tag-invalidated cache for derived views.
+
+Two tiers:
+- an in-process LRU, always on;
+- an optional shared SQLite file (VERICYCLE_SHARED_CACHE_PATH) so several web
+  workers reuse each other's results.
+
+Entries are keyed by function name + arguments and tagged with change-counter
+scopes (see change_counters.py). Each entry is stamped with the versions of its
+tags when it was computed and is only served while those versions are current,
+so a commit in any process invalidates it. Commits in this process also emit
+their scopes through an after_commit hook, which evicts matching entries from
+both tiers right away.
+"""
+
+import copy
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import wraps
+
+from change_counters import current_versions, has_uncommitted_changes, on_commit
+from extensions import db
+
+DEFAULT_MAXSIZE = int(os.getenv("VERICYCLE_CACHE_MAXSIZE", "512") or 512)
+
+
+class SharedCacheTier:
+    """SQLite file shared by all workers on one host. Failures degrade to a miss."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        # Connections are opened on first use, per thread and per process: under
+        # gunicorn's preload_app the module is imported in the master, and a
+        # SQLite connection must never be carried across fork(). A forked
+        # worker's main thread still sees the master's thread-local, so the pid
+        # check makes it abandon that copy and open its own.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=2.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entry ("
+                " key TEXT PRIMARY KEY, tags TEXT NOT NULL, stamp TEXT NOT NULL,"
+                " value BLOB NOT NULL, stored_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str):
+        row = self._conn().execute("SELECT stamp, value FROM cache_entry WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        return row[0], pickle.loads(row[1])
+
+    def set(self, key: str, tags, stamp: str, value):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entry (key, tags, stamp, value, stored_at) VALUES (?, ?, ?, ?, ?)",
+            (key, "|" + "|".join(sorted(tags)) + "|", stamp, pickle.dumps(value), time.time()),
+        )
+        conn.commit()
+
+    def invalidate_tags(self, tags):
+        conn = self._conn()
+        for tag in tags:
+            conn.execute("DELETE FROM cache_entry WHERE tags LIKE ?", (f"%|{tag}|%",))
+        conn.commit()
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM cache_entry")
+        conn.commit()
+
+
+class TagCache:
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, shared_path: str | None = None):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()  # key -> (tags, stamp, value)
+        self._stats = defaultdict(lambda: defaultdict(int))
+        self.shared = None
+        if shared_path:
+            try:
+                self.shared = SharedCacheTier(shared_path)
+            except Exception as e:
+                print(f"[CACHE] shared tier disabled ({shared_path}): {type(e).__name__}: {e}", flush=True)
+
+    def _count(self, name: str, field: str):
+        with self._lock:
+            self._stats[name][field] += 1
+
+    def get(self, name: str, key: str, stamp: str, tags=()):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] == stamp:
+                    self._entries.move_to_end(key)
+                    self._stats[name]["local_hits"] += 1
+                    return True, entry[2]
+                del self._entries[key]
+                self._stats[name]["stale"] += 1
+
+        if self.shared is not None:
+            try:
+                shared_entry = self.shared.get(key)
+            except Exception:
+                shared_entry = None
+            if shared_entry is not None and shared_entry[0] == stamp:
+                self._store_local(key, tags, stamp, shared_entry[1])
+                self._count(name, "shared_hits")
+                return True, shared_entry[1]
+
+        self._count(name, "misses")
+        return False, None
+
+    def _store_local(self, key: str, tags, stamp: str, value):
+        with self._lock:
+            self._entries[key] = (frozenset(tags), stamp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def set(self, key: str, tags, stamp: str, value):
+        self._store_local(key, tags, stamp, value)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, tags, stamp, value)
+            except Exception as e:
+                print(f"[CACHE] shared tier write skipped: {type(e).__name__}: {e}", flush=True)
+
+    def invalidate_tags(self, tags):
+        tags = set(tags)
+        with self._lock:
+            doomed = [key for key, entry in self._entries.items() if entry[0] & tags]
+            for key in doomed:
+                del self._entries[key]
+        if self.shared is not None:
+            try:
+                self.shared.invalidate_tags(tags)
+            except Exception:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.shared is not None:
+            try:
+                self.shared.clear()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            functions = {}
+            for name, counters in self._stats.items():
+                hits = counters["local_hits"] + counters["shared_hits"]
+                lookups = hits + counters["misses"]
+                functions[name] = {
+                    **dict(counters),
+                    "lookups": lookups,
+                    "hit_ratio": round(hits / lookups, 4) if lookups else None,
+                }
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "shared_tier": self.shared.path if self.shared is not None else None,
+                "functions": functions,
+            }
+
+
+cache = TagCache(shared_path=(os.getenv("VERICYCLE_SHARED_CACHE_PATH") or "").strip() or None)
+on_commit(cache.invalidate_tags)
+
+
+def cached(tags, key=None):
+    """
+    Cache a function's return value under tag invalidation.
+
+    tags: list of scopes, or a callable taking the function's arguments.
+    key:  optional callable mapping the arguments to a hashable cache key
+          (e.g. a User to its id); defaults to repr of the arguments.
+
+    Callers always get a private copy, so mutating the result is safe. Calls
+    made while the session holds uncommitted changes bypass the cache.
+    """
+    def decorator(fn):
+        name = fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if has_uncommitted_changes(db.session):
+                return fn(*args, **kwargs)
+            entry_tags = sorted(tags(*args, **kwargs) if callable(tags) else tags)
+            arg_key = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            cache_key = f"{name}:{arg_key!r}"
+            try:
+                versions = current_versions(db.session, entry_tags)
+            except Exception as e:
+                db.session.rollback()
+                print(f"[CACHE] bypass {name}: {type(e).__name__}: {e}", flush=True)
+                return fn(*args, **kwargs)
+            stamp = ",".join(f"{tag}={versions[tag]}" for tag in entry_tags)
+
+            hit, value = cache.get(name, cache_key, stamp, entry_tags)
+            if hit:
+                return copy.deepcopy(value)
+            value = fn(*args, **kwargs)
+            cache.set(cache_key, entry_tags, stamp, value)
+            return copy.deepcopy(value)
+
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
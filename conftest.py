@@ -0,0 +1,15 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# In-process tests import app, which binds its database and starts the
+# embedded task worker at import time. Point them at a throwaway SQLite file
+# with the worker off, so they never touch vericycle.db and a background commit
+# cannot land in the middle of a measurement.
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="vericycle-tests-")
+atexit.register(shutil.rmtree, _TEST_DB_DIR, ignore_errors=True)
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TEST_DB_DIR, 'test.db')}"
+os.environ["VERICYCLE_RUNTIME"] = "0"
+os.environ.setdefault("VERICYCLE_AUTO_MIGRATE", "1")
@@ -0,0 +1,188 @@
+"""
+Database engine configuration.
+
+The default deployment is a single SQLite file shared by the web workers and
+the embedded task worker thread. In SQLite's default rollback-journal mode a
+writer locks readers out, so readers queue behind every task commit and give
+up with "database is locked" under load. Every new SQLite connection therefore
+gets:
+
+- journal_mode=WAL: readers keep reading the last committed snapshot while
+  a single writer appends to the write-ahead log
+- busy_timeout: wait for the write lock rather than failing straight away
+- synchronous=NORMAL: fsync at checkpoints rather than at every commit (safe
+  in WAL mode; a power loss can only drop the last commits)
+- cache_size / mmap_size: keep hot pages in memory and read through mmap
+
+The pool is bounded so a burst of requests waits for a connection rather than
+opening one per thread. Server databases (DATABASE_URL=postgresql://...) get the
+same bounds plus pre-ping, so connections dropped by the server or a proxy are
+replaced before use, and recycling of long-lived connections.
+
+With DATABASE_REPLICA_URL set, the session routes plain SELECTs of views
+decorated with @read_replica (dashboards, proof hub, admin listings) to a
+read-only replica bind. Flushes, SELECT ... FOR UPDATE and raw text() SQL stay
+on the primary. A request that writes switches to the primary for the rest of
+the request, and the writer's browser session reads from the primary for
+VERICYCLE_REPLICA_STICKY_S afterwards, so users see their own writes despite
+replication lag.
+
+Settings (environment):
+    VERICYCLE_SQLITE_WAL=1                 0 keeps the rollback journal (e.g. network filesystems)
+    VERICYCLE_SQLITE_BUSY_TIMEOUT_MS=5000
+    VERICYCLE_SQLITE_SYNCHRONOUS=NORMAL   (FULL when WAL is off)
+    VERICYCLE_SQLITE_CACHE_KB=32768
+    VERICYCLE_SQLITE_MMAP_MB=256
+    VERICYCLE_DB_POOL_SIZE=5, VERICYCLE_DB_MAX_OVERFLOW=5, VERICYCLE_DB_POOL_TIMEOUT_S=10
+    VERICYCLE_DB_POOL_PRE_PING=1, VERICYCLE_DB_POOL_RECYCLE_S=1800   (server databases)
+    DATABASE_REPLICA_URL                   unset: everything reads from the primary
+    VERICYCLE_REPLICA_STICKY_S=10
+
+scripts/bench_sqlite_concurrency.py compares reader/writer throughput with and
+without these settings.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from functools import wraps
+
+from flask import g, has_request_context, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, event
+from sqlalchemy.engine import Engine, make_url
+
+
+def _flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes")
+
+
+SQLITE_WAL = _flag("VERICYCLE_SQLITE_WAL", "1")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("VERICYCLE_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_SYNCHRONOUS = os.getenv("VERICYCLE_SQLITE_SYNCHRONOUS", "NORMAL" if SQLITE_WAL else "FULL").strip().upper()
+SQLITE_CACHE_KB = int(os.getenv("VERICYCLE_SQLITE_CACHE_KB", "32768"))
+SQLITE_MMAP_MB = int(os.getenv("VERICYCLE_SQLITE_MMAP_MB", "256"))
+
+POOL_SIZE = int(os.getenv("VERICYCLE_DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("VERICYCLE_DB_MAX_OVERFLOW", "5"))
+POOL_TIMEOUT_SECONDS = float(os.getenv("VERICYCLE_DB_POOL_TIMEOUT_S", "10"))
+POOL_PRE_PING = _flag("VERICYCLE_DB_POOL_PRE_PING", "1")
+POOL_RECYCLE_SECONDS = int(os.getenv("VERICYCLE_DB_POOL_RECYCLE_S", "1800"))
+
+REPLICA_BIND_KEY = "replica"
+REPLICA_URL = (os.getenv("DATABASE_REPLICA_URL") or "").strip()
+REPLICA_STICKY_SECONDS = float(os.getenv("VERICYCLE_REPLICA_STICKY_S", "10"))
+_PRIMARY_UNTIL_KEY = "_db_primary_until"
+
+if SQLITE_SYNCHRONOUS not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+    raise RuntimeError(f"VERICYCLE_SQLITE_SYNCHRONOUS must be OFF/NORMAL/FULL/EXTRA, not {SQLITE_SYNCHRONOUS!r}")
+
+
+def is_sqlite_file(url) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def normalize_url(url: str) -> str:
+    # Heroku/Render still hand out postgres://, which SQLAlchemy no longer accepts.
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
+def engine_options(url) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS for `url`."""
+    url = make_url(url)
+    pool = {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT_SECONDS,
+    }
+    if url.get_backend_name() != "sqlite":
+        return {**pool, "pool_pre_ping": POOL_PRE_PING, "pool_recycle": POOL_RECYCLE_SECONDS}
+    if not is_sqlite_file(url):
+        return {}
+    # sqlite3's own lock wait; busy_timeout below applies the same limit per connection.
+    return {**pool, "connect_args": {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+
+
+def binds() -> dict:
+    """SQLALCHEMY_BINDS: the read replica, when DATABASE_REPLICA_URL is set."""
+    if not REPLICA_URL:
+        return {}
+    url = normalize_url(REPLICA_URL)
+    return {REPLICA_BIND_KEY: {"url": url, **engine_options(url)}}
+
+
+def apply_sqlite_pragmas(dbapi_connection, wal: bool = SQLITE_WAL):
+    cursor = dbapi_connection.cursor()
+    try:
+        if wal:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+    finally:
+        cursor.close()
+
+
+def _on_connect(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        apply_sqlite_pragmas(dbapi_connection)
+
+
+def install():
+    """Apply the SQLite pragmas to every connection any engine opens (idempotent)."""
+    if not event.contains(Engine, "connect", _on_connect):
+        event.listen(Engine, "connect", _on_connect)
+
+
+def _replica_reads_enabled() -> bool:
+    return has_request_context() and g.get("_db_read_replica", False) and not g.get("_db_wrote", False)
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends @read_replica SELECTs to the replica bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+            and _replica_reads_enabled()
+        ):
+            replica = self._db.engines.get(REPLICA_BIND_KEY)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_replica(view):
+    """Let this view's reads go to the replica, unless the user wrote in the last few seconds."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if REPLICA_URL and time.time() >= float(flask_session.get(_PRIMARY_UNTIL_KEY, 0) or 0):
+            g._db_read_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def init_replica_routing(app, db):
+    """Track writes per request so the writer keeps reading from the primary for a while."""
+    if not REPLICA_URL:
+        return
+
+    @event.listens_for(db.session, "after_flush")
+    def _mark_request_wrote(session, flush_context):
+        if has_request_context():
+            g._db_wrote = True
+
+    @app.after_request
+    def _stick_to_primary(response):
+        if g.get("_db_wrote", False):
+            flask_session[_PRIMARY_UNTIL_KEY] = time.time() + REPLICA_STICKY_SECONDS
+        return response
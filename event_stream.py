@@ -0,0 +1,282 @@
+"""
+In-process publish/subscribe broker behind the server-sent events stream.
+
+Events are derived from committed ORM changes (activity stage transitions,
+AgentTask queue transitions, dead letters, assignment updates) so every writer
+- web requests and the background task worker alike - feeds the stream without
+extra calls. Each event goes to the "admin" channel and, when it belongs to a
+user, to that user's "user:<id>" channel.
+
+The broker lives in process memory: subscribers only see events committed by
+the same process (the web process that also runs the embedded task worker).
+Clients keep a slow full-refresh fallback for anything published elsewhere.
+Event ids are "<epoch>-<sequence>", where the epoch is random per broker: a
+Last-Event-ID from another process or an earlier boot (whose sequence restarted
+at 1) never matches, so that client is told to resync instead of being replayed
+the wrong events or none at all.
+"""
+
+import itertools
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+
+from sqlalchemy import event, inspect
+
+ADMIN_CHANNEL = "admin"
+SUBSCRIBER_QUEUE_SIZE = 256
+REPLAY_BUFFER_SIZE = 500
+# Well under gunicorn's 120 s worker timeout; see gunicorn.conf.py.
+STREAM_MAX_SECONDS = 60.0
+
+
+def user_channel(user_id) -> str:
+    return f"user:{int(user_id)}"
+
+
+class Subscription:
+    def __init__(self, channels: set[str]):
+        self.channels = channels
+        self.queue: queue.Queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+
+class EventBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: list[Subscription] = []
+        self.epoch = uuid.uuid4().hex[:12]
+        self._sequence = itertools.count(1)
+        self._last_seq = 0
+        self._replay: deque = deque(maxlen=REPLAY_BUFFER_SIZE)
+
+    def _parse_event_id(self, event_id: str) -> int | None:
+        """Sequence number of one of this broker's event ids, else None."""
+        epoch, _, seq = (event_id or "").strip().rpartition("-")
+        if epoch != self.epoch:
+            return None
+        try:
+            return int(seq)
+        except ValueError:
+            return None
+
+    def subscribe(self, channels, last_event_id: str | None = None) -> tuple[Subscription, list[dict] | None]:
+        """
+        Register a subscriber. When the client reconnects with Last-Event-ID the
+        missed events are returned for replay; None means the client must resync
+        from a full snapshot: the gap is no longer buffered, or the id was issued
+        by another broker (process or boot) or lies ahead of this one.
+        """
+        sub = Subscription(set(channels))
+        with self._lock:
+            self._subscriptions.append(sub)
+            if last_event_id is None:
+                return sub, []
+            buffered = list(self._replay)
+            last_seq = self._last_seq
+        seq = self._parse_event_id(last_event_id)
+        if seq is None or seq > last_seq:
+            return sub, None
+        if buffered and buffered[0]["seq"] > seq + 1:
+            return sub, None
+        missed = [e for e in buffered if e["seq"] > seq and e["channel"] in sub.channels]
+        return sub, missed
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            if sub in self._subscriptions:
+                self._subscriptions.remove(sub)
+
+    def publish(self, channel: str, event_name: str, data: dict):
+        with self._lock:
+            self._last_seq = next(self._sequence)
+            envelope = {
+                "id": f"{self.epoch}-{self._last_seq}",
+                "seq": self._last_seq,
+                "channel": channel,
+                "event": event_name,
+                "data": data,
+            }
+            self._replay.append(envelope)
+            targets = [s for s in self._subscriptions if channel in s.channels]
+        for sub in targets:
+            try:
+                sub.queue.put_nowait(envelope)
+            except queue.Full:
+                # Slow consumer: drop its backlog and ask it to resync.
+                sub.overflowed = True
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscriptions)
+
+
+broker = EventBroker()
+
+
+def format_sse(envelope: dict | None = None, *, event_name: str | None = None, data=None, retry_ms: int | None = None) -> str:
+    lines = []
+    if retry_ms is not None:
+        lines.append(f"retry: {int(retry_ms)}")
+    if envelope is not None:
+        lines.append(f"id: {envelope['id']}")
+        event_name = envelope["event"]
+        data = envelope["data"]
+    if event_name:
+        lines.append(f"event: {event_name}")
+    if data is not None:
+        lines.append(f"data: {json.dumps(data, separators=(',', ':'), default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_events(channels, last_event_id: str | None = None, heartbeat_seconds: float = 15.0, max_seconds: float = STREAM_MAX_SECONDS):
+    """
+    Generator yielding SSE frames for the given channels. Each open stream
+    occupies one gunicorn thread (gthread workers), so it ends after max_seconds
+    to hand that thread back; EventSource reconnects on its own and resumes
+    from Last-Event-ID.
+    """
+    sub, missed = broker.subscribe(channels, last_event_id)
+    try:
+        yield format_sse(retry_ms=3000, event_name="hello", data={"channels": sorted(sub.channels)})
+        if missed is None:
+            yield format_sse(event_name="resync", data={"reason": "replay_gap"})
+        else:
+            for envelope in missed:
+                yield format_sse(envelope)
+
+        started = time.monotonic()
+        while time.monotonic() - started < max_seconds:
+            if sub.overflowed:
+                sub.overflowed = False
+                while not sub.queue.empty():
+                    try:
+                        sub.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                yield format_sse(event_name="resync", data={"reason": "overflow"})
+                continue
+            try:
+                envelope = sub.queue.get(timeout=heartbeat_seconds)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(envelope)
+    finally:
+        broker.unsubscribe(sub)
+
+
+# -----------------------------------------------------------------
+# Commit hooks: turn flushed ORM changes into stream events.
+# -----------------------------------------------------------------
+_PENDING_KEY = "_event_stream_pending"
+
+
+def _changed(obj, attr: str) -> tuple[bool, object]:
+    history = inspect(obj).attrs[attr].history
+    if not history.has_changes():
+        return False, None
+    return True, (history.deleted[0] if history.deleted else None)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _collect_events(session) -> list[tuple[list[str], str, dict]]:
+    from models import Activity, AgentTask, DeadLetterTask, OpportunityAssignment, WalletTransaction
+
+    collected = []
+    for obj in list(session.new) + list(session.dirty):
+        is_new = obj in session.new
+        if isinstance(obj, Activity):
+            stage_changed, prev_stage = _changed(obj, "pipeline_stage")
+            status_changed, _ = _changed(obj, "status")
+            if not (is_new or stage_changed or status_changed):
+                continue
+            channels = [ADMIN_CHANNEL]
+            if obj.user_id:
+                channels.append(user_channel(obj.user_id))
+            collected.append((channels, "activity", {
+                "activity_id": obj.id,
+                "user_id": obj.user_id,
+                "created": is_new,
+                "pipeline_stage": obj.pipeline_stage,
+                "previous_stage": None if is_new else prev_stage,
+                "status": obj.status,
+                "verified_status": obj.verified_status,
+            }))
+        elif isinstance(obj, AgentTask):
+            status_changed, prev_status = _changed(obj, "status")
+            if not (is_new or status_changed):
+                continue
+            collected.append(([ADMIN_CHANNEL], "task", {
+                "task_id": obj.id,
+                "activity_id": obj.activity_id,
+                "agent": obj.agent_name,
+                "status": obj.status,
+                "previous_status": None if is_new else prev_status,
+                "attempts": obj.attempts,
+                "error": obj.last_error,
+            }))
+        elif isinstance(obj, DeadLetterTask) and is_new:
+            collected.append(([ADMIN_CHANNEL], "dead_letter", {
+                "dead_letter_id": obj.id,
+                "task_id": obj.task_id,
+                "activity_id": obj.activity_id,
+                "agent": obj.agent_name,
+                "reason": obj.reason,
+            }))
+        elif isinstance(obj, OpportunityAssignment):
+            status_changed, prev_status = _changed(obj, "status")
+            if not (is_new or status_changed):
+                continue
+            channels = [ADMIN_CHANNEL]
+            if obj.recycler_user_id:
+                channels.append(user_channel(obj.recycler_user_id))
+            collected.append((channels, "assignment", {
+                "assignment_id": obj.id,
+                "opportunity_id": obj.opportunity_id,
+                "recycler_user_id": obj.recycler_user_id,
+                "status": obj.status,
+                "previous_status": None if is_new else prev_status,
+            }))
+        elif isinstance(obj, WalletTransaction) and is_new and obj.user_id:
+            collected.append(([user_channel(obj.user_id)], "wallet", {
+                "transaction_id": obj.id,
+                "action_type": obj.action_type,
+                "amount_eco": obj.amount_eco,
+                "status": obj.status,
+            }))
+    return collected
+
+
+def install_session_hooks(session_factory):
+    @event.listens_for(session_factory, "after_flush")
+    def _queue_stream_events(session, flush_context):
+        try:
+            events = _collect_events(session)
+        except Exception as exc:
+            print(f"[SSE] event collection skipped: {type(exc).__name__}: {exc}", flush=True)
+            return
+        if events:
+            session.info.setdefault(_PENDING_KEY, []).extend(events)
+
+    @event.listens_for(session_factory, "after_commit")
+    def _publish_stream_events(session):
+        pending = session.info.pop(_PENDING_KEY, None)
+        if not pending:
+            return
+        committed_at = _now_iso()
+        for channels, event_name, data in pending:
+            data["at"] = committed_at
+            for channel in channels:
+                broker.publish(channel, event_name, data)
+
+    @event.listens_for(session_factory, "after_rollback")
+    def _discard_stream_events(session):
+        session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,35 @@
+"""
+Gunicorn settings (picked up automatically from the working directory).
+
+The app is imported once in the master (preload_app) and the workers are
+forked from it, so the ~7k-line app module, templates and SQLAlchemy mappings
+are shared copy-on-write instead of being rebuilt per worker. VERICYCLE_PRELOAD
+tells app.py not to start threads at import; post_fork starts each worker's
+task worker thread and drops any pooled connections inherited from the master.
+
+Workers are threaded (gthread): an open /api/events/stream holds one thread,
+not a whole worker, for up to event_stream.STREAM_MAX_SECONDS. With the
+default sync worker a single open dashboard would block its worker, and the
+arbiter would kill it (and its task thread) once the stream outlived timeout.
+"""
+
+import os
+
+os.environ.setdefault("VERICYCLE_PRELOAD", "1")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "3"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+timeout = 120
+preload_app = True
+
+
+def post_fork(server, worker):
+    from app import app, db, start_runtime
+
+    with app.app_context():
+        # close=False: leave the parent's sockets alone, just forget them here.
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    start_runtime()
@@ -0,0 +1,293 @@
+"""
+Request and pipeline metrics in the Prometheus text format.
+
+The web side records, per route template and method:
+
+- a latency histogram: vericycle_http_request_duration_seconds
+- a status-code counter: vericycle_http_requests_total
+- the number of requests in flight: vericycle_http_requests_in_flight
+
+The task worker records, per agent:
+
+- task run time by outcome (done / retry / dead_letter / failed / error):
+  vericycle_agent_task_duration_seconds
+- retries and dead letters as counters
+
+GET /metrics renders all of it, plus the queue depth by status and agent
+and the oldest queued task's age. Those last two come from the
+queue_stats snapshot at scrape time.
+
+Every gunicorn worker keeps its own registry. Set VERICYCLE_METRICS_DIR to
+a directory shared by the workers: each process then writes its snapshot
+there (at most once per second, and at exit) and /metrics merges all of
+them. That way a scrape that lands on any one worker still sees the
+whole service. Counters and histograms from exited workers keep counting.
+In-flight gauges only count live processes.
+
+Set VERICYCLE_METRICS=0 to turn recording off. Scrapers send
+VERICYCLE_METRICS_TOKEN as a bearer token; without it only a signed-in admin
+gets the page.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+
+ENABLED = os.getenv("VERICYCLE_METRICS", "1").strip().lower() in ("1", "true", "yes")
+METRICS_DIR = (os.getenv("VERICYCLE_METRICS_DIR") or "").strip() or None
+FLUSH_SECONDS = 1.0
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TASK_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+HELP = {
+    "vericycle_http_requests_total": ("counter", "HTTP requests by route, method and status code."),
+    "vericycle_http_request_duration_seconds": ("histogram", "HTTP request latency by route and method."),
+    "vericycle_http_requests_in_flight": ("gauge", "HTTP requests currently being handled."),
+    "vericycle_agent_tasks_total": ("counter", "Agent task runs by agent and outcome."),
+    "vericycle_agent_task_duration_seconds": ("histogram", "Agent task run time by agent and outcome."),
+    "vericycle_agent_task_retries_total": ("counter", "Agent task retries scheduled."),
+    "vericycle_agent_task_dead_letters_total": ("counter", "Agent tasks moved to the dead-letter queue."),
+    "vericycle_agent_queue_depth": ("gauge", "Agent tasks by status (all agents) or queued/running per agent."),
+    "vericycle_agent_queue_oldest_age_seconds": ("gauge", "Age of the oldest queued agent task."),
+}
+
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: dict[str, dict[tuple, float]] = {}
+        self.gauges: dict[str, dict[tuple, float]] = {}
+        self.histograms: dict[str, dict[tuple, dict]] = {}
+        self._last_flush = 0.0
+
+    def inc(self, name: str, labels: dict, value: float = 1.0):
+        if not ENABLED:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+        self.flush_if_due()
+
+    def gauge_add(self, name: str, labels: dict, delta: float):
+        if not ENABLED:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self.gauges.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + delta
+
+    def observe(self, name: str, labels: dict, value: float, buckets=HTTP_BUCKETS):
+        if not ENABLED:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = {"buckets": list(buckets), "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+            for idx, bound in enumerate(hist["buckets"]):
+                if value <= bound:
+                    hist["counts"][idx] += 1
+                    break
+            hist["sum"] += value
+            hist["count"] += 1
+        self.flush_if_due()
+
+    def snapshot(self) -> dict:
+        """JSON-safe copy: label tuples become JSON strings."""
+        with self._lock:
+            return json.loads(json.dumps({
+                "pid": os.getpid(),
+                "counters": {name: {json.dumps(key): value for key, value in series.items()}
+                             for name, series in self.counters.items()},
+                "gauges": {name: {json.dumps(key): value for key, value in series.items()}
+                           for name, series in self.gauges.items()},
+                "histograms": {name: {json.dumps(key): hist for key, hist in series.items()}
+                               for name, series in self.histograms.items()},
+            }))
+
+    # -- Multi-process export -------------------------------------------------------------
+    def flush(self):
+        if not METRICS_DIR:
+            return
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"metrics_{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(tmp_path, path)
+
+    def flush_if_due(self):
+        if METRICS_DIR and time.monotonic() - self._last_flush >= FLUSH_SECONDS:
+            self._last_flush = time.monotonic()
+            try:
+                self.flush()
+            except OSError as exc:
+                print(f"[METRICS] Snapshot write failed: {exc}", flush=True)
+
+    def collect(self) -> list[dict]:
+        """This process's snapshot plus the other processes' files in VERICYCLE_METRICS_DIR."""
+        snapshots = [self.snapshot()]
+        if not METRICS_DIR or not os.path.isdir(METRICS_DIR):
+            return snapshots
+        for file_name in os.listdir(METRICS_DIR):
+            if not (file_name.startswith("metrics_") and file_name.endswith(".json")):
+                continue
+            try:
+                pid = int(file_name[len("metrics_"):-len(".json")])
+            except ValueError:
+                continue
+            if pid == os.getpid():
+                continue
+            try:
+                with open(os.path.join(METRICS_DIR, file_name), encoding="utf-8") as handle:
+                    other = json.load(handle)
+            except (OSError, ValueError):
+                continue
+            if not _pid_alive(pid):
+                other["gauges"] = {}
+            snapshots.append(other)
+        return snapshots
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs, extra=()) -> str:
+    items = [*pairs, *extra]
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in items) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render(snapshots: list[dict], gauges: dict[str, list[tuple[dict, float]]] | None = None) -> str:
+    """Merge process snapshots (plus scrape-time gauges) into Prometheus text exposition format."""
+    counters: dict[str, dict[str, float]] = {}
+    merged_gauges: dict[str, dict[str, float]] = {}
+    histograms: dict[str, dict[str, dict]] = {}
+    for snap in snapshots:
+        for target, source in ((counters, snap.get("counters", {})), (merged_gauges, snap.get("gauges", {}))):
+            for name, series in source.items():
+                merged = target.setdefault(name, {})
+                for key, value in series.items():
+                    merged[key] = merged.get(key, 0.0) + value
+        for name, series in snap.get("histograms", {}).items():
+            merged = histograms.setdefault(name, {})
+            for key, hist in series.items():
+                current = merged.get(key)
+                if current is None or current["buckets"] != hist["buckets"]:
+                    merged[key] = {**hist, "counts": list(hist["counts"])}
+                    continue
+                current["counts"] = [a + b for a, b in zip(current["counts"], hist["counts"])]
+                current["sum"] += hist["sum"]
+                current["count"] += hist["count"]
+    for name, series in (gauges or {}).items():
+        merged_gauges[name] = {json.dumps(_key(labels)): value for labels, value in series}
+
+    lines = []
+
+    def header(name):
+        kind, text = HELP.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    for source in (counters, merged_gauges):
+        for name in sorted(source):
+            header(name)
+            for key, value in sorted(source[name].items()):
+                lines.append(f"{name}{_labels(json.loads(key))} {_number(value)}")
+    for name in sorted(histograms):
+        header(name)
+        for key, hist in sorted(histograms[name].items()):
+            pairs = json.loads(key)
+            cumulative = 0
+            for bound, count in zip(hist["buckets"], hist["counts"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(pairs, [('le', _number(bound))])} {cumulative}")
+            lines.append(f'{name}_bucket{_labels(pairs, [("le", "+Inf")])} {hist["count"]}')
+            lines.append(f"{name}_sum{_labels(pairs)} {_number(hist['sum'])}")
+            lines.append(f"{name}_count{_labels(pairs)} {hist['count']}")
+    return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+if METRICS_DIR:
+    atexit.register(registry.flush)
+
+
+# -- Flask middleware -------------------------------------------------------------------------
+def install(app):
+    """Record latency, status and in-flight counts for every request (no-op if VERICYCLE_METRICS=0)."""
+    if not ENABLED:
+        return
+    from flask import g, request
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_started = time.perf_counter()
+        registry.gauge_add("vericycle_http_requests_in_flight", {}, 1)
+
+    @app.after_request
+    def _metrics_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _metrics_finish(exc):
+        started = g.pop("_metrics_started", None)
+        if started is None:
+            return
+        registry.gauge_add("vericycle_http_requests_in_flight", {}, -1)
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        status = g.pop("_metrics_status", 500 if exc is not None else 200)
+        registry.observe(
+            "vericycle_http_request_duration_seconds",
+            {"route": route, "method": request.method},
+            time.perf_counter() - started,
+        )
+        registry.inc("vericycle_http_requests_total", {"route": route, "method": request.method, "status": str(status)})
+
+
+# -- Task worker --------------------------------------------------------------------------
+def record_task(agent_name: str, outcome: str, seconds: float):
+    registry.observe("vericycle_agent_task_duration_seconds", {"agent": agent_name, "outcome": outcome},
+                     seconds, buckets=TASK_BUCKETS)
+    registry.inc("vericycle_agent_tasks_total", {"agent": agent_name, "outcome": outcome})
+
+
+def queue_gauges(stats: dict) -> dict[str, list[tuple[dict, float]]]:
+    """Scrape-time gauges from a queue_stats snapshot."""
+    depth = [({"status": status}, float(stats.get(status) or 0))
+             for status in ("queued", "running", "failed", "done", "dead_letter")]
+    for agent_name, agent in sorted((stats.get("per_agent") or {}).items()):
+        for status in ("queued", "running"):
+            depth.append(({"agent": agent_name, "status": status}, float(agent.get(status) or 0)))
+    gauges = {"vericycle_agent_queue_depth": depth}
+    if stats.get("oldest_queued_age_seconds") is not None:
+        gauges["vericycle_agent_queue_oldest_age_seconds"] = [({}, float(stats["oldest_queued_age_seconds"]))]
+    return gauges
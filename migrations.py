@@ -0,0 +1,122 @@
+"""
+Versioned one-shot migrations.
+
+Schema patches and data backfills used to run on every import of app.py, in
+every web worker. They are now registered here as named steps (in order) and
+recorded in the schema_migration table once applied, so a booted worker only
+has to check that nothing is pending: one SELECT, independent of table sizes.
+
+Steps receive a Progress. Chunked backfills read progress.cursor (the last id
+they finished) and call progress.checkpoint(cursor, rows) after each chunk,
+which commits the chunk together with the new cursor; a step interrupted half
+way resumes from its last checkpoint on the next run.
+
+Runtime jobs that only need to succeed once per database (not per process)
+can leave a marker row here too with record() / is_recorded().
+
+Run pending steps with `flask --app app migrate`. Outside production, app.py
+also runs them at boot unless VERICYCLE_AUTO_MIGRATE=0.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+
+from sqlalchemy import select
+
+from models import SchemaMigration
+
+
+@dataclass(frozen=True)
+class Step:
+    name: str
+    fn: Callable[["Progress"], None]
+
+
+_steps: list[Step] = []
+
+
+def step(name: str):
+    """Register fn(progress) as the next migration step. Names must never be reused or reordered."""
+    def decorator(fn):
+        if any(existing.name == name for existing in _steps):
+            raise ValueError(f"Duplicate migration step: {name}")
+        _steps.append(Step(name, fn))
+        return fn
+    return decorator
+
+
+def registered_steps() -> list[Step]:
+    return list(_steps)
+
+
+class Progress:
+    def __init__(self, session, record: SchemaMigration):
+        self.session = session
+        self.record = record
+
+    @property
+    def cursor(self) -> int:
+        return int(self.record.cursor or 0)
+
+    def checkpoint(self, cursor: int, rows: int = 0):
+        """Commit the current chunk together with the resume cursor."""
+        self.record.cursor = int(cursor)
+        self.record.rows = int(self.record.rows or 0) + int(rows)
+        self.session.commit()
+
+
+def applied_names(session) -> set[str]:
+    return set(session.execute(
+        select(SchemaMigration.name).where(SchemaMigration.status == "applied")
+    ).scalars())
+
+
+def pending_steps(session) -> list[Step]:
+    applied = applied_names(session)
+    return [item for item in _steps if item.name not in applied]
+
+
+def is_recorded(session, name: str) -> bool:
+    return session.execute(
+        select(SchemaMigration.name).where(SchemaMigration.name == name, SchemaMigration.status == "applied")
+    ).first() is not None
+
+
+def record(session, name: str, rows: int = 0):
+    """Mark `name` as done (a one-off runtime job rather than a registered step)."""
+    record = session.get(SchemaMigration, name) or SchemaMigration(name=name, cursor=0)
+    record.status = "applied"
+    record.rows = int(rows)
+    record.applied_at = datetime.now(timezone.utc)
+    session.add(record)
+    session.commit()
+
+
+def run_pending(session, log=print) -> list[str]:
+    """Apply every pending step in registration order. Stops at the first failure."""
+    ran = []
+    for item in pending_steps(session):
+        record = session.get(SchemaMigration, item.name)
+        if record is None:
+            record = SchemaMigration(name=item.name, status="running", cursor=0, rows=0)
+            session.add(record)
+            session.commit()
+        resumed = f" (resuming after id {record.cursor})" if record.cursor else ""
+        started = time.perf_counter()
+        try:
+            item.fn(Progress(session, record))
+            record.status = "applied"
+            record.applied_at = datetime.now(timezone.utc)
+            session.commit()
+        except Exception:
+            session.rollback()
+            log(f"[MIGRATE] {item.name} failed{resumed}; later steps not run", flush=True)
+            raise
+        log(f"[MIGRATE] {item.name} applied{resumed} in {time.perf_counter() - started:.2f}s "
+            f"({record.rows} rows)", flush=True)
+        ran.append(item.name)
+    return ran
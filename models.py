@@ -18,14 +18,27 @@ class User(db.Model, UserMixin):
     id_number = db.Column(db.String(30), nullable=True)
     role = db.Column(db.String(20), nullable=False, default='collector')  # Phase 2: recycler may still persist as collector for compatibility.
 
+    __table_args__ = (
+        # Hedera callbacks and mirror-node sync resolve the collector by account id.
+        db.Index("ix_user_hedera_account_id", "hedera_account_id"),
+    )
+
 
 class Activity(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     timestamp = db.Column(db.String(64), nullable=False)
+    # Typed UTC copy of timestamp for range filters and ordering. The string
+    # stays as written because proof hashes are computed over it.
+    timestamp_utc = db.Column(db.DateTime(timezone=True), nullable=True, index=True)
     desc = db.Column(db.String(512), nullable=False)
     amount = db.Column(db.Float, nullable=False)
 
+    # Structured copy of the "(12.0kg of Plastics)" part of desc, so kg totals
+    # can be aggregated in SQL. material_key is a normalize_material_key() value.
+    weight_kg = db.Column(db.Float, nullable=True)
+    material_key = db.Column(db.String(40), nullable=True, index=True)
+
     # NEW FIELDS FOR AGENTS
     verified_status = db.Column(db.String(20), default="pending")
     status = db.Column(db.String(50), default="pending")
@@ -34,11 +47,13 @@ class Activity(db.Model):
     proof_hash = db.Column(db.String(64), nullable=True)
     logbook_status = db.Column(db.String(20), default="pending")  # pending|anchored|offchain_final|demo_skipped|failed
     logbook_tx_id = db.Column(db.String(150), nullable=True)
-    logbook_last_error = db.Column(db.Text, nullable=True)
+    # Long diagnostic text, read by the timeline/admin views only: deferred so
+    # list queries don't load it (undefer with queries.activity_diagnostics()).
+    logbook_last_error = db.deferred(db.Column(db.Text, nullable=True), group="diagnostics")
     logbook_finalized_at = db.Column(db.DateTime(timezone=True), nullable=True)
     reward_status = db.Column(db.String(40), nullable=True)  # paid|finalized_no_transfer
     reward_tx_id = db.Column(db.String(150), nullable=True)
-    reward_last_error = db.Column(db.Text, nullable=True)
+    reward_last_error = db.deferred(db.Column(db.Text, nullable=True), group="diagnostics")
     trust_weight = db.Column(db.Float, default=1.0)
     verifier_reputation = db.Column(db.Float, default=0.85)
     reputation_delta = db.Column(db.Float, default=0.0)
@@ -58,6 +73,11 @@ class Activity(db.Model):
     reviewed_by_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     reviewed_at = db.Column(db.DateTime(timezone=True), nullable=True)
 
+    # Denormalized from the first center_verification signal so center views
+    # can filter and dedupe without decoding signal metadata.
+    center_signal_at = db.Column(db.DateTime(timezone=True), nullable=True, index=True)
+    center_assignment_id = db.Column(db.Integer, nullable=True, index=True)
+
     user = db.relationship(
         'User',
         foreign_keys=[user_id],
@@ -69,6 +89,15 @@ class Activity(db.Model):
         backref=db.backref('reviewed_activities', lazy=True, foreign_keys='Activity.reviewed_by_user_id')
     )
 
+    __table_args__ = (
+        db.Index("ix_activity_user_material_weight", "user_id", "material_key", "weight_kg"),
+        # Per-user history: wallet snapshot (newest id first) and dashboards (newest timestamp first).
+        db.Index("ix_activity_user_id", "user_id", "id"),
+        db.Index("ix_activity_user_timestamp_utc", "user_id", "timestamp_utc"),
+        # Review queue and pipeline-stage filters.
+        db.Index("ix_activity_pipeline_stage", "pipeline_stage"),
+    )
+
 
 class AgentTask(db.Model):
     __tablename__ = "agent_task"
@@ -94,6 +123,16 @@ class AgentTask(db.Model):
 
     activity = db.relationship('Activity', backref=db.backref('tasks', lazy=True))
 
+    __table_args__ = (
+        # Agents' "already queued/running?" checks and proof bundles, per activity.
+        db.Index("ix_agent_task_activity_status", "activity_id", "status"),
+        # Worker pick query: queued tasks that are due.
+        db.Index("ix_agent_task_status_next_run_at", "status", "next_run_at"),
+        # Compaction deletes finished rows; without AUTOINCREMENT SQLite would
+        # hand their ids out again.
+        {"sqlite_autoincrement": True},
+    )
+
 
 class DeadLetterTask(db.Model):
     __tablename__ = "dead_letter_task"
@@ -196,6 +235,14 @@ class AgentLog(db.Model):
     hedera_tx_id = db.Column(db.String(150), nullable=True)
     last_error = db.Column(db.String(512), nullable=True)
 
+    __table_args__ = (
+        # Per-activity timeline (/api/admin/activity-events) and per-agent latest lines.
+        db.Index("ix_agent_log_activity_id", "activity_id", "id"),
+        db.Index("ix_agent_log_agent_name", "agent_name", "id"),
+        # Retention sweeps by age.
+        db.Index("ix_agent_log_created_at", "created_at"),
+    )
+
 
 class VerificationSignal(db.Model):
     __tablename__ = "verification_signal"
@@ -217,6 +264,10 @@ class VerificationSignal(db.Model):
     activity = db.relationship("Activity", backref=db.backref("signals", lazy=True, cascade="all, delete-orphan"))
     source_user = db.relationship("User", backref=db.backref("verification_signals", lazy=True))
 
+    __table_args__ = (
+        db.Index("ix_verification_signal_activity_id", "activity_id"),
+    )
+
 
 class AgentCommerceEvent(db.Model):
     __tablename__ = "agent_commerce_event"
@@ -235,6 +286,11 @@ class AgentCommerceEvent(db.Model):
 
     activity = db.relationship("Activity", backref=db.backref("commerce_events", lazy=True))
 
+    __table_args__ = (
+        # RewardAgent's per-activity fee lookup (newest first).
+        db.Index("ix_agent_commerce_event_activity_id", "activity_id", "id"),
+    )
+
 
 class PickupOpportunity(db.Model):
     __tablename__ = "pickup_opportunity"
@@ -254,6 +310,8 @@ class PickupOpportunity(db.Model):
     # open | accepted | completed | cancelled
 
     notes = db.Column(db.String(500), nullable=True)
+    # Resident reports only: normalized title::location grouping key for CommunityHotspot.
+    hotspot_key = db.Column(db.String(255), nullable=True, index=True)
 
     created_at = db.Column(
         db.DateTime(timezone=True),
@@ -267,6 +325,14 @@ class PickupOpportunity(db.Model):
         foreign_keys=[source_user_id]
     )
 
+    __table_args__ = (
+        # Open listings / purge by status, resident hotspot reports, a business's own requests,
+        # each newest first.
+        db.Index("ix_pickup_opportunity_status_created_at", "status", "created_at"),
+        db.Index("ix_pickup_opportunity_source_role_created_at", "source_role", "created_at"),
+        db.Index("ix_pickup_opportunity_source_user_created_at", "source_user_id", "created_at"),
+    )
+
 
 class OpportunityAssignment(db.Model):
     __tablename__ = "opportunity_assignment"
@@ -327,6 +393,15 @@ class OpportunityAssignment(db.Model):
         foreign_keys=[handover_confirmed_by_user_id]
     )
 
+    __table_args__ = (
+        # Center queue: submitted assignments, newest submission first.
+        db.Index("ix_opportunity_assignment_status_submitted_at", "status", "submitted_at"),
+        # A recycler's assignments and an opportunity's assignments, newest acceptance first.
+        db.Index("ix_opportunity_assignment_recycler_accepted_at", "recycler_user_id", "accepted_at"),
+        db.Index("ix_opportunity_assignment_opportunity_accepted_at", "opportunity_id", "accepted_at"),
+        db.Index("ix_opportunity_assignment_linked_activity_id", "linked_activity_id"),
+    )
+
 
 class WalletTransaction(db.Model):
     __tablename__ = "wallet_transaction"
@@ -352,3 +427,158 @@ class WalletTransaction(db.Model):
     )
 
     user = db.relationship("User", backref=db.backref("wallet_transactions", lazy=True))
+
+    __table_args__ = (
+        db.Index("ix_wallet_transaction_user_created_at", "user_id", "created_at"),
+    )
+
+
+class ChangeCounter(db.Model):
+    """Monotonic per-scope version, bumped in the same transaction as the change (see change_counters.py)."""
+    __tablename__ = "change_counter"
+
+    scope = db.Column(db.String(80), primary_key=True)  # pipeline | hotspots | user:<id>
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class CommunityHotspot(db.Model):
+    """Aggregated community board row, refreshed whenever its resident reports, assignments or signals change."""
+    __tablename__ = "community_hotspot"
+
+    id = db.Column(db.Integer, primary_key=True)
+    hotspot_key = db.Column(db.String(255), nullable=False, unique=True)
+
+    title = db.Column(db.String(200), nullable=False)
+    location = db.Column(db.String(200), nullable=False)
+    type_label = db.Column(db.String(80), nullable=False)
+
+    status = db.Column(db.String(30), nullable=False, default="open")
+    status_rank = db.Column(db.Integer, nullable=False, default=0)
+    status_label = db.Column(db.String(80), nullable=True)
+    priority = db.Column(db.String(20), nullable=False, default="standard")
+    can_prioritize = db.Column(db.Boolean, nullable=False, default=False)
+    # 0 open+center, 1 open, 2 closed+center, 3 closed: leading board sort column.
+    board_bucket = db.Column(db.Integer, nullable=False, default=1)
+
+    support_count = db.Column(db.Integer, nullable=False, default=0)
+    report_count = db.Column(db.Integer, nullable=False, default=0)
+    estimated_kg = db.Column(db.Float, nullable=False, default=0.0)
+    latest_created_at = db.Column(db.String(64), nullable=True)
+
+    completed_at = db.Column(db.String(64), nullable=True)
+    completed_by = db.Column(db.String(120), nullable=True)
+    completed_activity_id = db.Column(db.Integer, nullable=True)
+    hashscan_url = db.Column(db.String(300), nullable=True)
+    reward_amount = db.Column(db.Float, nullable=True)
+
+    resident_confirmation_status = db.Column(db.String(30), nullable=True)
+    resident_confirmation_at = db.Column(db.String(64), nullable=True)
+    resident_confirmation_by = db.Column(db.String(120), nullable=True)
+
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    __table_args__ = (
+        # Same directions as the board query's ORDER BY, so no sort step is needed.
+        db.Index(
+            "ix_community_hotspot_board_order",
+            "board_bucket", support_count.desc(), report_count.desc(), "latest_created_at",
+        ),
+    )
+
+    def to_board_dict(self) -> dict:
+        return {
+            "hotspot_key": self.hotspot_key,
+            "title": self.title,
+            "location": self.location,
+            "type_label": self.type_label,
+            "status": self.status,
+            "status_rank": self.status_rank,
+            "status_label": self.status_label,
+            "priority": self.priority,
+            "support_count": self.support_count,
+            "report_count": self.report_count,
+            "latest_created_at": self.latest_created_at,
+            "can_prioritize": bool(self.can_prioritize),
+            "completed_at": self.completed_at,
+            "completed_by": self.completed_by,
+            "completed_activity_id": self.completed_activity_id,
+            "proof_bundle_url": f"/api/proof-bundle/{self.completed_activity_id}" if self.completed_activity_id else None,
+            "hashscan_url": self.hashscan_url,
+            "reward_amount": self.reward_amount,
+            "resident_confirmation_status": self.resident_confirmation_status,
+            "resident_confirmation_at": self.resident_confirmation_at,
+            "resident_confirmation_by": self.resident_confirmation_by,
+            "estimated_kg": self.estimated_kg,
+        }
+
+
+class NeighborhoodDailyKg(db.Model):
+    """Verified recycled kg per UTC day across all users (dashboard neighborhood rollup)."""
+    __tablename__ = "neighborhood_daily_kg"
+
+    day = db.Column(db.Date, primary_key=True)
+    kg = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class AgentHealth(db.Model):
+    """Latest health per agent, maintained from AgentLog writes (see agents/agent_health.py)."""
+    __tablename__ = "agent_health"
+
+    agent_name = db.Column(db.String(64), primary_key=True)
+    last_seen = db.Column(db.String(64), nullable=True)  # created_at of the latest AgentLog line
+    last_level = db.Column(db.String(16), nullable=True)
+    last_tx_id = db.Column(db.String(150), nullable=True)
+    last_error = db.Column(db.String(512), nullable=True)
+    last_error_at = db.Column(db.String(64), nullable=True)
+    consecutive_failures = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+
+class AgentTaskArchive(db.Model):
+    """Finished AgentTask rows moved out of the hot queue table (see agents/task_compaction.py)."""
+    __tablename__ = "agent_task_archive"
+
+    id = db.Column(db.Integer, primary_key=True)
+    original_id = db.Column(db.Integer, nullable=True)  # agent_task.id when archived
+    activity_id = db.Column(db.Integer, nullable=False, index=True)
+    agent_name = db.Column(db.String(50), nullable=False)
+    task_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    attempts = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.String(512), nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    archived_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        # Queue stats add the archived done/failed totals.
+        db.Index("ix_agent_task_archive_status", "status"),
+    )
+
+
+class ActivityTaskSummary(db.Model):
+    """Latest archived task per agent for one activity, kept for proof bundles and the admin list."""
+    __tablename__ = "activity_task_summary"
+
+    activity_id = db.Column(db.Integer, primary_key=True)
+    # JSON list of {"id", "agent", "status", "attempts", "last_error"}, one entry per agent.
+    agents_json = db.Column(db.Text, nullable=False, default="[]")
+    archived_task_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+
+class SchemaMigration(db.Model):
+    """One row per applied migrations.py step or runtime marker; cursor lets chunked backfills resume."""
+    __tablename__ = "schema_migration"
+
+    name = db.Column(db.String(120), primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default="running")  # running|applied
+    cursor = db.Column(db.Integer, nullable=False, default=0)
+    rows = db.Column(db.Integer, nullable=False, default=0)
+    started_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    applied_at = db.Column(db.DateTime(timezone=True), nullable=True)
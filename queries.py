@@ -0,0 +1,123 @@
+"""
+Reusable read queries for the dashboard endpoints.
+
+The loader tuples pull in the relationships each view walks (opportunity,
+recycler, linked activity) with joinedload/selectinload, so rendering a list
+never falls back to one lazy load per row. latest_assignments_by_opportunity()
+replaces the "newest assignment for this request" query that used to run once
+per request row with a single row_number() window query.
+
+activity_summaries() is the column projection for views that only count or
+total activities; activity_diagnostics() undefers the long error text that
+Activity keeps out of ordinary loads.
+"""
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import contains_eager, joinedload, selectinload, undefer_group
+
+from extensions import db
+from models import Activity, OpportunityAssignment, PickupOpportunity
+
+
+# Deferred column group on Activity (logbook_last_error, reward_last_error).
+ACTIVITY_DIAGNOSTICS = "diagnostics"
+
+ACTIVITY_SUMMARY_COLUMNS = (
+    Activity.id, Activity.user_id, Activity.timestamp, Activity.desc, Activity.amount, Activity.weight_kg,
+    Activity.status, Activity.verified_status, Activity.pipeline_stage,
+    Activity.logbook_status, Activity.reward_status,
+    Activity.proof_hash, Activity.hedera_tx_id, Activity.hcs_tx_id, Activity.logbook_tx_id,
+    Activity.hts_tx_id, Activity.reward_tx_id,
+)
+
+
+def activity_summaries(*criteria, order_by=None) -> list:
+    """
+    Plain rows (no ORM instances) with the columns read by the canonical status
+    helpers (activity_state_set and the is_activity_*_canonical checks) plus
+    amount/weight. Rows support attribute access, so they can be passed to
+    those helpers in place of Activity objects.
+    """
+    stmt = select(*ACTIVITY_SUMMARY_COLUMNS).where(*criteria)
+    if order_by is not None:
+        stmt = stmt.order_by(order_by)
+    return db.session.execute(stmt).all()
+
+
+def activity_diagnostics():
+    """Load the deferred logbook/reward error text with the rows."""
+    return undefer_group(ACTIVITY_DIAGNOSTICS)
+
+
+def assignment_list_loaders():
+    """Loaders for assignment lists that show opportunity and recycler details."""
+    return (
+        joinedload(OpportunityAssignment.opportunity),
+        joinedload(OpportunityAssignment.recycler_user),
+    )
+
+
+def assignment_detail_loaders():
+    """assignment_list_loaders() plus the linked activity (proof / reward fields, reward error text)."""
+    return assignment_list_loaders() + (
+        selectinload(OpportunityAssignment.linked_activity).undefer_group(ACTIVITY_DIAGNOSTICS),
+    )
+
+
+def assignments_for_recycler(user_id: int):
+    return (
+        OpportunityAssignment.query
+        .options(joinedload(OpportunityAssignment.opportunity))
+        .filter_by(recycler_user_id=user_id)
+        .order_by(OpportunityAssignment.accepted_at.desc())
+    )
+
+
+def submitted_assignments():
+    return (
+        OpportunityAssignment.query
+        .options(*assignment_list_loaders())
+        .filter(OpportunityAssignment.status == 'submitted')
+        .order_by(OpportunityAssignment.submitted_at.desc())
+    )
+
+
+def linked_assignments_for_business(business_user_id: int):
+    """Business assignments that produced an activity, with opportunity and activity loaded."""
+    return (
+        OpportunityAssignment.query
+        .join(PickupOpportunity, OpportunityAssignment.opportunity_id == PickupOpportunity.id)
+        .options(
+            contains_eager(OpportunityAssignment.opportunity),
+            selectinload(OpportunityAssignment.linked_activity),
+        )
+        .filter(PickupOpportunity.source_role == 'business')
+        .filter(PickupOpportunity.source_user_id == business_user_id)
+        .filter(OpportunityAssignment.linked_activity_id.isnot(None))
+    )
+
+
+def latest_assignments_by_opportunity(opportunity_ids) -> dict[int, OpportunityAssignment]:
+    """Newest assignment (by accepted_at) for each opportunity id, details eager-loaded."""
+    opportunity_ids = sorted({int(opportunity_id) for opportunity_id in opportunity_ids})
+    if not opportunity_ids:
+        return {}
+    ranked = (
+        select(
+            OpportunityAssignment.id.label("assignment_id"),
+            func.row_number().over(
+                partition_by=OpportunityAssignment.opportunity_id,
+                order_by=(OpportunityAssignment.accepted_at.desc(), OpportunityAssignment.id.desc()),
+            ).label("rank"),
+        )
+        .where(OpportunityAssignment.opportunity_id.in_(opportunity_ids))
+        .subquery()
+    )
+    rows = (
+        OpportunityAssignment.query
+        .options(*assignment_detail_loaders())
+        .join(ranked, ranked.c.assignment_id == OpportunityAssignment.id)
+        .filter(ranked.c.rank == 1)
+        .all()
+    )
+    return {row.opportunity_id: row for row in rows}
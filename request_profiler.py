@@ -0,0 +1,260 @@
+"""
+Opt-in sampling profiler for single requests.
+
+An admin adds `X-Vericycle-Profile: 1` (or `?_profile=1`) to a request. For
+the length of that request a background thread samples the handling
+thread's stack every VERICYCLE_PROFILE_INTERVAL_MS (default 2 ms) through
+sys._current_frames(). When the request finishes, two files go to
+artifacts/profiles/:
+
+- <stamp>_<pid>_<method>_<route>.folded: collapsed stacks, one
+  "frame;frame;frame count" line per distinct stack, ready for
+  flamegraph.pl or speedscope
+- <stamp>_<pid>_<method>_<route>.txt: the request line, duration and
+  sample count, and the top VERICYCLE_PROFILE_TOP functions by self and by
+  inclusive samples
+
+The response's X-Vericycle-Profile header names the saved files. If the
+request was not profiled, it says why: "rate-limited" or "forbidden"; if the
+files could not be written (disk full, read-only volume), "save-failed", and
+the response itself goes out unchanged.
+
+Rate limits are strict so the feature can stay on in production:
+
+- one profiled request at a time per process;
+- at most one per VERICYCLE_PROFILE_MIN_INTERVAL_S (default 60) across
+  all processes, tracked by the mtime of a marker file in the directory,
+  which is checked and touched under an flock on that file;
+- sampling stops after VERICYCLE_PROFILE_MAX_S (default 30) seconds;
+- only the newest VERICYCLE_PROFILE_KEEP (default 50) profiles are kept.
+
+VERICYCLE_PROFILE=0 turns the feature off entirely.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes run a single process
+    fcntl = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STDLIB = sysconfig.get_paths()["stdlib"]
+PROFILE_DIR = os.path.join(ROOT, "artifacts", "profiles")
+ENABLED = os.getenv("VERICYCLE_PROFILE", "1").strip().lower() in ("1", "true", "yes")
+INTERVAL_SECONDS = float(os.getenv("VERICYCLE_PROFILE_INTERVAL_MS", "2")) / 1000
+MIN_INTERVAL_SECONDS = float(os.getenv("VERICYCLE_PROFILE_MIN_INTERVAL_S", "60"))
+MAX_SECONDS = float(os.getenv("VERICYCLE_PROFILE_MAX_S", "30"))
+KEEP = int(os.getenv("VERICYCLE_PROFILE_KEEP", "50"))
+TOP = int(os.getenv("VERICYCLE_PROFILE_TOP", "25"))
+
+HEADER = "X-Vericycle-Profile"
+_MARKER = ".last_profile"
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    if path.startswith(ROOT + os.sep):
+        path = os.path.relpath(path, ROOT)
+    elif "site-packages" + os.sep in path:
+        path = path.split("site-packages" + os.sep, 1)[1]
+    elif path.startswith(STDLIB + os.sep):
+        path = os.path.relpath(path, STDLIB)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples one thread's stack on a background thread until stop()."""
+
+    def __init__(self, thread_id: int, interval: float = INTERVAL_SECONDS, max_seconds: float = MAX_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self.started = 0.0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._switch_interval = None
+
+    def start(self):
+        # The sampler only runs when it gets the GIL; the default 5 ms switch interval
+        # would leave a short request with no samples at all.
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 2))
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        if self._switch_interval is not None:
+            sys.setswitchinterval(self._switch_interval)
+
+    def _run(self):
+        deadline = self.started + self.max_seconds
+        while not self._stop.wait(self.interval) and time.perf_counter() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            # Skip the sample that caught the request thread inside stop().
+            if stack and not self._stop.is_set():
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, title: str, top: int = TOP) -> str:
+        self_counts: Counter[str] = Counter()
+        inclusive: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            self_counts[stack[-1]] += count
+            for label in set(stack):
+                inclusive[label] += count
+        total = max(self.samples, 1)
+        lines = [
+            title,
+            f"duration {self.elapsed * 1000:.1f} ms, {self.samples} samples every {self.interval * 1000:g} ms",
+            "",
+            f"top {top} by self samples:",
+        ]
+        lines += [f"  {count:6d} {100 * count / total:5.1f}%  {label}" for label, count in self_counts.most_common(top)]
+        lines += ["", f"top {top} by inclusive samples:"]
+        lines += [f"  {count:6d} {100 * count / total:5.1f}%  {label}" for label, count in inclusive.most_common(top)]
+        return "\n".join(lines) + "\n"
+
+
+class RequestProfiler:
+    def __init__(self, directory: str = PROFILE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._active = False
+
+    def _acquire(self) -> bool:
+        with self._lock:
+            if self._active:
+                return False
+            marker = os.path.join(self.directory, _MARKER)
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(marker, "a", encoding="utf-8") as handle:
+                    if fcntl is not None:
+                        try:
+                            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        except BlockingIOError:
+                            # Another process is claiming the slot right now.
+                            return False
+                    try:
+                        # open() just created an empty marker if there was none; only a
+                        # non-empty one records an earlier claim.
+                        claimed = os.path.getsize(marker) > 0
+                        if claimed and time.time() - os.path.getmtime(marker) < MIN_INTERVAL_SECONDS:
+                            return False
+                        if not claimed:
+                            handle.write("1")
+                            handle.flush()
+                        os.utime(marker)
+                    finally:
+                        if fcntl is not None:
+                            fcntl.flock(handle, fcntl.LOCK_UN)
+            except OSError as e:
+                print(f"[PROFILE] marker unavailable: {type(e).__name__}: {e}", flush=True)
+                return False
+            self._active = True
+            return True
+
+    def _release(self):
+        with self._lock:
+            self._active = False
+
+    def _prune(self):
+        names = sorted(
+            (name for name in os.listdir(self.directory) if name.endswith(".folded")),
+            reverse=True,
+        )
+        for name in names[KEEP:]:
+            base = name[:-len(".folded")]
+            for suffix in (".folded", ".txt"):
+                try:
+                    os.remove(os.path.join(self.directory, base + suffix))
+                except OSError:
+                    pass
+
+    def save(self, sampler: StackSampler, method: str, route: str, status) -> str:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        base = f"{time.strftime('%Y%m%dT%H%M%S')}_{os.getpid()}_{method}_{slug}"[:160]
+        with open(os.path.join(self.directory, base + ".folded"), "w", encoding="utf-8") as handle:
+            handle.write(sampler.collapsed())
+        with open(os.path.join(self.directory, base + ".txt"), "w", encoding="utf-8") as handle:
+            handle.write(sampler.summary(f"{method} {route} -> {status}"))
+        self._prune()
+        return base
+
+    def install(self, app, is_allowed):
+        """Profile requests that ask for it when is_allowed() (checked per request) says so."""
+        if not ENABLED:
+            return
+        from flask import g, request
+
+        def _finish(status) -> str | None:
+            sampler = g.pop("_request_sampler", None)
+            if sampler is None:
+                return None
+            try:
+                sampler.stop()
+                route = request.url_rule.rule if request.url_rule else request.path
+                base = self.save(sampler, request.method, route, status)
+                print(f"[PROFILE] {request.method} {request.path}: {sampler.samples} samples "
+                      f"-> artifacts/profiles/{base}.txt", flush=True)
+                return base
+            except OSError as e:
+                print(f"[PROFILE] {request.method} {request.path}: could not save profile: "
+                      f"{type(e).__name__}: {e}", flush=True)
+                return "save-failed"
+            finally:
+                self._release()
+
+        @app.before_request
+        def _profile_start():
+            wanted = request.headers.get(HEADER) == "1" or request.args.get("_profile") == "1"
+            if not wanted:
+                return
+            if not is_allowed():
+                g._request_profile_result = "forbidden"
+                return
+            if not self._acquire():
+                g._request_profile_result = "rate-limited"
+                return
+            sampler = StackSampler(threading.get_ident())
+            g._request_sampler = sampler
+            sampler.start()
+
+        @app.after_request
+        def _profile_stop(response):
+            base = _finish(response.status_code)
+            result = base or g.pop("_request_profile_result", None)
+            if result:
+                response.headers[HEADER] = result
+            return response
+
+        @app.teardown_request
+        def _profile_abort(exc):
+            # after_request is skipped when the view raised; still stop the sampler.
+            if g.get("_request_sampler") is not None:
+                _finish(500)
+
+
+profiler = RequestProfiler()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""Time and retained memory for listing activities: full rows vs default (deferred) vs load_only.
+
+Seeds a throwaway SQLite database with --rows activities (about one in five
+carrying a long logbook/reward error, as failed anchors and transfers do) and
+loads all of them three ways:
+
+  full      every column, including the deferred diagnostics group
+  default   Activity.query.all(): diagnostics deferred
+  summary   queries.activity_summaries() column rows (no ORM instances)
+
+    python scripts/bench_activity_listing.py --rows 100000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+os.chdir(ROOT)
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+_tmpdir = tempfile.mkdtemp(prefix="vericycle-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+
+import queries  # noqa: E402
+from app import app, db  # noqa: E402
+from models import Activity  # noqa: E402
+
+ERROR_TEXT = "HCS submission failed: " + "INSUFFICIENT_TX_FEE status from consensus node; retry scheduled. " * 12
+
+
+def _seed(rows: int):
+    table = Activity.__table__
+    batch = []
+    for idx in range(rows):
+        failing = idx % 5 == 0
+        batch.append({
+            "user_id": 1,
+            "timestamp": "2026-01-01T00:00:00Z",
+            "desc": f"Verified Drop-off ({1 + idx % 20}.0kg of Plastics)",
+            "amount": 10.0,
+            "weight_kg": float(1 + idx % 20),
+            "material_key": "plastics",
+            "status": "verified",
+            "verified_status": "verified",
+            "pipeline_stage": "log_failed" if failing else "attested",
+            "logbook_status": "failed" if failing else "anchored",
+            "logbook_tx_id": None if failing else f"0.0.{idx}@1700000000.{idx:09d}",
+            "logbook_last_error": ERROR_TEXT if failing else None,
+            "reward_last_error": ERROR_TEXT if failing else None,
+            "last_error": ERROR_TEXT[:500] if failing else None,
+        })
+        if len(batch) == 5000:
+            db.session.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+    db.session.commit()
+
+
+class _Rows:
+    """Adapter so a row-returning helper fits the query-shaped _measure() loop."""
+
+    def __init__(self, fetch):
+        self.fetch = fetch
+
+    def all(self):
+        return self.fetch()
+
+
+def _measure(label: str, build_query, repeats: int) -> dict:
+    timings, retained = [], []
+    for _ in range(repeats):
+        db.session.expunge_all()
+        gc.collect()
+        started = time.perf_counter()
+        rows = build_query().all()
+        timings.append(time.perf_counter() - started)
+        count = len(rows)
+        del rows
+
+        db.session.expunge_all()
+        gc.collect()
+        tracemalloc.start()
+        rows = build_query().all()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        retained.append(current)
+        del rows
+    return {"mode": label, "rows": count, "seconds": min(timings), "retained_mb": min(retained) / (1024 * 1024)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with app.app_context():
+        _seed(args.rows)
+        modes = [
+            ("full", lambda: Activity.query.options(queries.activity_diagnostics())),
+            ("default", lambda: Activity.query),
+            ("summary", lambda: _Rows(queries.activity_summaries)),
+        ]
+        results = [_measure(label, build, args.repeats) for label, build in modes]
+
+    print(f"{'mode':<10} {'rows':>8} {'seconds':>9} {'retained MB':>12}")
+    for row in results:
+        print(f"{row['mode']:<10} {row['rows']:>8} {row['seconds']:>9.3f} {row['retained_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
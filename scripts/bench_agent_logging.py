@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""Compare AgentLog write load per pipeline task with the log buffer off and on.
+
+Runs against a throwaway SQLite database. Each simulated task follows the
+worker's sequence: claim (commit), START line (commit), agent stage update
+(commit), DONE line (commit). Only statements issued by this thread are
+counted; buffered lines are flushed here at the end so their cost is included.
+
+    python scripts/bench_agent_logging.py --tasks 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+os.chdir(ROOT)
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+_tmpdir = tempfile.mkdtemp(prefix="vericycle-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+
+from sqlalchemy import event  # noqa: E402
+
+from agents import log_buffer, task_worker  # noqa: E402
+from app import app, db  # noqa: E402
+from models import Activity, AgentLog, AgentTask  # noqa: E402
+
+
+def _counting(engine):
+    counts = {"statements": 0, "agent_log_inserts": 0, "activity_selects": 0, "commits": 0}
+    thread_id = threading.get_ident()
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() != thread_id:
+            return
+        counts["statements"] += 1
+        sql = " ".join(statement.split()).lower()
+        if sql.startswith("insert into agent_log"):
+            counts["agent_log_inserts"] += 1
+        elif sql.startswith("select") and " from activity" in sql:
+            counts["activity_selects"] += 1
+
+    def _commit(conn):
+        if threading.get_ident() == thread_id:
+            counts["commits"] += 1
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "commit", _commit)
+    return counts, lambda: (
+        event.remove(engine, "before_cursor_execute", _before_cursor_execute),
+        event.remove(engine, "commit", _commit),
+    )
+
+
+def _make_tasks(count: int) -> list[int]:
+    ids = []
+    for idx in range(count):
+        activity = Activity(
+            user_id=1,
+            timestamp="2026-01-01T00:00:00Z",
+            desc="Bench Drop-off (1.0kg of Plastics)",
+            amount=1.0,
+            status="pending",
+            pipeline_stage="submitted",
+        )
+        db.session.add(activity)
+        db.session.flush()
+        task = AgentTask(activity_id=activity.id, agent_name="BenchAgent", task_type="bench", status="bench")
+        db.session.add(task)
+        db.session.flush()
+        ids.append(task.id)
+    db.session.commit()
+    return ids
+
+
+def _run_tasks(task_ids: list[int]):
+    for task_id in task_ids:
+        task = db.session.get(AgentTask, task_id)
+        task.status = "running"
+        db.session.commit()
+        activity = db.session.get(Activity, task.activity_id)
+        task_worker._log(task.activity_id, task.agent_name, f"START task_id={task.id}", activity=activity)
+        db.session.commit()
+        activity.pipeline_stage = "verified"
+        db.session.commit()
+        task.status = "done"
+        task_worker._log(task.activity_id, task.agent_name, "DONE result=True", activity=activity)
+        db.session.commit()
+
+
+def bench(tasks: int, buffered: bool) -> dict:
+    buffer = log_buffer.buffer
+    buffer.enabled = buffered
+    # The explicit flush below does all the writing, on this thread.
+    buffer.batch_size = 10 ** 9
+    buffer.flush_seconds = 3600.0
+    with app.app_context():
+        task_ids = _make_tasks(tasks)
+        before = db.session.query(AgentLog).count()
+        counts, stop = _counting(db.engine)
+        try:
+            _run_tasks(task_ids)
+            if buffered:
+                buffer.flush()
+        finally:
+            stop()
+        written = db.session.query(AgentLog).count() - before
+    return {"mode": "buffered" if buffered else "direct", "log_rows": written, **counts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200)
+    args = parser.parse_args()
+
+    results = [bench(args.tasks, buffered=False), bench(args.tasks, buffered=True)]
+    print(f"{'mode':<10} {'rows':>6} {'stmts/task':>11} {'log inserts/task':>17} {'activity selects/task':>22} {'commits/task':>13}")
+    for row in results:
+        print(
+            f"{row['mode']:<10} {row['log_rows']:>6} {row['statements'] / args.tasks:>11.2f} "
+            f"{row['agent_log_inserts'] / args.tasks:>17.2f} {row['activity_selects'] / args.tasks:>22.2f} "
+            f"{row['commits'] / args.tasks:>13.2f}"
+        )
+    direct, buffered = results
+    saved = direct["statements"] - buffered["statements"]
+    print(f"statements saved per task: {saved / args.tasks:.2f} ({saved / max(direct['statements'], 1):.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""Reader/writer throughput on one SQLite file: default settings vs db_config (WAL + pragmas).
+
+Seeds a throwaway database per mode with --rows activities, then runs
+--readers and --writers processes (like gunicorn workers plus the task worker)
+against it for --seconds:
+
+  reader  dashboard-style reads: a user's latest activities plus a verified-kg aggregate
+  writer  one pipeline step per transaction: insert an activity and an agent log line, commit
+
+and reports operations per second, p99 latency and "database is locked" errors.
+
+  default  SQLAlchemy defaults: rollback journal, synchronous=FULL, sqlite3's 5 s lock wait
+  tuned    db_config.engine_options() plus apply_sqlite_pragmas() on connect
+
+    python scripts/bench_sqlite_concurrency.py --readers 4 --writers 2 --seconds 10
+"""
+
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine, event, text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+import db_config  # noqa: E402
+from extensions import db  # noqa: E402
+import models  # noqa: E402,F401  (registers the tables on db.metadata)
+
+USERS = 50
+
+READ_LATEST = text(
+    'SELECT id, "desc", amount, status FROM activity WHERE user_id = :user_id ORDER BY id DESC LIMIT 20'
+)
+READ_TOTAL = text("SELECT count(*), sum(weight_kg) FROM activity WHERE status = 'verified'")
+WRITE_ACTIVITY = text(
+    'INSERT INTO activity (user_id, timestamp, "desc", amount, weight_kg, status, verified_status, pipeline_stage) '
+    "VALUES (:user_id, '2026-01-01T00:00:00Z', 'Verified Drop-off (4.0kg of Cans)', 10.0, 4.0, 'pending', 'pending', 'created')"
+)
+WRITE_LOG = text(
+    "INSERT INTO agent_log (activity_id, agent_name, level, message, created_at) "
+    "VALUES (:activity_id, 'CollectorAgent', 'info', 'START', CURRENT_TIMESTAMP)"
+)
+
+
+def _engine(url: str, tuned: bool):
+    if not tuned:
+        return create_engine(url)
+    engine = create_engine(url, **db_config.engine_options(url))
+    event.listen(engine, "connect", lambda dbapi_connection, record: db_config.apply_sqlite_pragmas(dbapi_connection))
+    return engine
+
+
+def _seed(url: str, tuned: bool, rows: int):
+    engine = _engine(url, tuned)
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                'INSERT INTO activity (user_id, timestamp, "desc", amount, weight_kg, status, verified_status, pipeline_stage) '
+                "VALUES (:user_id, '2026-01-01T00:00:00Z', 'Verified Drop-off (8.0kg of Paper)', 10.0, 8.0, "
+                "'verified', 'verified', 'attested')"
+            ),
+            [{"user_id": 1 + idx % USERS} for idx in range(rows)],
+        )
+    engine.dispose()
+
+
+def _run(role: str, url: str, tuned: bool, seconds: float, seed: int, results):
+    engine = _engine(url, tuned)
+    latencies, errors, step = [], 0, seed
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        step += 1
+        started = time.perf_counter()
+        try:
+            if role == "reader":
+                with engine.connect() as conn:
+                    conn.execute(READ_LATEST, {"user_id": 1 + step % USERS}).all()
+                    conn.execute(READ_TOTAL).one()
+            else:
+                with engine.begin() as conn:
+                    activity_id = conn.execute(WRITE_ACTIVITY, {"user_id": 1 + step % USERS}).lastrowid
+                    conn.execute(WRITE_LOG, {"activity_id": activity_id})
+        except OperationalError as exc:
+            if "locked" not in str(exc).lower():
+                raise
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    engine.dispose()
+    results.put((role, latencies, errors))
+
+
+def _p99(values: list[float]) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+
+def _measure(label: str, tuned: bool, args) -> list[dict]:
+    tmpdir = tempfile.mkdtemp(prefix="vericycle-bench-")
+    url = f"sqlite:///{tmpdir}/bench.db"
+    _seed(url, tuned, args.rows)
+
+    results = multiprocessing.Queue()
+    roles = ["reader"] * args.readers + ["writer"] * args.writers
+    procs = [
+        multiprocessing.Process(target=_run, args=(role, url, tuned, args.seconds, idx * 7919, results))
+        for idx, role in enumerate(roles)
+    ]
+    for proc in procs:
+        proc.start()
+    collected = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    rows = []
+    for role in ("reader", "writer"):
+        latencies = [value for r, values, _ in collected if r == role for value in values]
+        errors = sum(errs for r, _, errs in collected if r == role)
+        rows.append({
+            "mode": label,
+            "role": role,
+            "ops_per_s": len(latencies) / args.seconds,
+            "p99_ms": _p99(latencies) * 1000,
+            "locked": errors,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    results = _measure("default", False, args) + _measure("tuned", True, args)
+
+    print(f"{'mode':<8} {'role':<7} {'ops/s':>9} {'p99 ms':>9} {'locked':>7}")
+    for row in results:
+        print(f"{row['mode']:<8} {row['role']:<7} {row['ops_per_s']:>9.1f} {row['p99_ms']:>9.1f} {row['locked']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Per-request SQL profiling and N+1 detection (opt-in).
+
+With VERICYCLE_SQL_PROFILE=1, every statement executed while a request is
+being handled is counted and timed through SQLAlchemy's cursor events. Each
+statement is reduced to a fingerprint: whitespace collapsed, literals and
+IN (...) lists replaced by "?". When a request runs the same fingerprint
+VERICYCLE_SQL_N_PLUS_ONE (default 5) or more times, a "[SQL] N+1?" line is
+logged with the route and the statement. That is the usual sign of a lazy
+relationship loaded inside a loop.
+
+Per-route totals (requests, statements, DB time, worst request) are kept
+per process and served to admins at /api/admin/sql-profile, ranked by
+average DB time ("slowest") and average statement count ("chattiest").
+The flagged N+1 patterns are listed there too. Statements run by the task
+worker thread, outside any request, are not recorded.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+ENABLED = os.getenv("VERICYCLE_SQL_PROFILE", "0").strip().lower() in ("1", "true", "yes")
+N_PLUS_ONE_THRESHOLD = int(os.getenv("VERICYCLE_SQL_N_PLUS_ONE", "5"))
+SLOW_REQUEST_MS = float(os.getenv("VERICYCLE_SQL_SLOW_MS", "250"))
+RECENT_FLAGS = 50
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\?|__\[POSTCOMPILE_\w+\]|%\(\w+\)s|:\w+)\s*,?)+\)", re.IGNORECASE)
+
+
+def fingerprint(statement: str) -> str:
+    """Statement text with literals and IN lists collapsed, for grouping repeats."""
+    text = _WHITESPACE.sub(" ", statement).strip()
+    text = _STRING_LITERAL.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    return _IN_LIST.sub("IN (?)", text)
+
+
+class SqlProfiler:
+    def __init__(self, n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._lock = threading.Lock()
+        self._routes: dict[str, dict] = {}
+        self._flags: deque[dict] = deque(maxlen=RECENT_FLAGS)
+        self._installed = False
+
+    # -- SQLAlchemy cursor events ---------------------------------------------------------
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            conn.info.setdefault("_sql_profile_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not has_request_context():
+            return
+        started = conn.info.get("_sql_profile_started")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        current = g.get("_sql_profile")
+        if current is None:
+            current = g._sql_profile = {"count": 0, "seconds": 0.0, "fingerprints": Counter()}
+        current["count"] += 1
+        current["seconds"] += elapsed
+        current["fingerprints"][fingerprint(statement)] += 1
+
+    # -- Flask request hooks --------------------------------------------------------------
+    def _start_request(self):
+        g._sql_profile_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        started = g.pop("_sql_profile_started", None)
+        current = g.pop("_sql_profile", None) or {"count": 0, "seconds": 0.0, "fingerprints": Counter()}
+        if started is None:
+            return response
+        route = f"{request.method} {request.url_rule.rule if request.url_rule else '<unmatched>'}"
+        self.record(route, current["count"], current["seconds"], time.perf_counter() - started,
+                    current["fingerprints"])
+        return response
+
+    def record(self, route: str, count: int, db_seconds: float, request_seconds: float, fingerprints: Counter):
+        repeats = [(text, n) for text, n in fingerprints.most_common() if n >= self.n_plus_one_threshold]
+        with self._lock:
+            stats = self._routes.setdefault(route, {
+                "requests": 0, "statements": 0, "db_seconds": 0.0, "request_seconds": 0.0,
+                "max_statements": 0, "max_db_seconds": 0.0, "n_plus_one_requests": 0,
+            })
+            stats["requests"] += 1
+            stats["statements"] += count
+            stats["db_seconds"] += db_seconds
+            stats["request_seconds"] += request_seconds
+            stats["max_statements"] = max(stats["max_statements"], count)
+            stats["max_db_seconds"] = max(stats["max_db_seconds"], db_seconds)
+            if repeats:
+                stats["n_plus_one_requests"] += 1
+                for text, n in repeats:
+                    self._flags.append({"route": route, "repeats": n, "statement": text[:500], "at": time.time()})
+        for text, n in repeats:
+            print(f"[SQL] N+1? {route}: {n}x {text[:200]}", flush=True)
+        if request_seconds * 1000 >= SLOW_REQUEST_MS:
+            print(
+                f"[SQL] Slow request {route}: {request_seconds * 1000:.0f} ms, "
+                f"{count} statements, {db_seconds * 1000:.0f} ms in DB",
+                flush=True,
+            )
+
+    # -- Reporting ------------------------------------------------------------------------
+    def report(self, limit: int = 20) -> dict:
+        with self._lock:
+            routes = []
+            for route, stats in self._routes.items():
+                requests_seen = stats["requests"]
+                routes.append({
+                    "route": route,
+                    "requests": requests_seen,
+                    "avg_statements": round(stats["statements"] / requests_seen, 2),
+                    "max_statements": stats["max_statements"],
+                    "avg_db_ms": round(stats["db_seconds"] * 1000 / requests_seen, 2),
+                    "max_db_ms": round(stats["max_db_seconds"] * 1000, 2),
+                    "avg_request_ms": round(stats["request_seconds"] * 1000 / requests_seen, 2),
+                    "n_plus_one_requests": stats["n_plus_one_requests"],
+                })
+            flags = list(self._flags)
+        return {
+            "enabled": ENABLED,
+            "pid": os.getpid(),
+            "n_plus_one_threshold": self.n_plus_one_threshold,
+            "slowest": sorted(routes, key=lambda row: row["avg_db_ms"], reverse=True)[:limit],
+            "chattiest": sorted(routes, key=lambda row: row["avg_statements"], reverse=True)[:limit],
+            "n_plus_one": list(reversed(flags))[:limit],
+        }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._flags.clear()
+
+    def install(self, app):
+        """Hook into every engine and into app's request cycle (no-op unless VERICYCLE_SQL_PROFILE=1)."""
+        if not ENABLED or self._installed:
+            return
+        self._installed = True
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+
+profiler = SqlProfiler()
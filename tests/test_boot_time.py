@@ -0,0 +1,45 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Wall-clock budget for `import app` on an already-migrated database.
+BOOT_BUDGET_SECONDS = float(os.getenv("VERICYCLE_BOOT_BUDGET_S", "1.5"))
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+print("BOOT_RESULT " + json.dumps({
+    "seconds": elapsed,
+    "loaded": sorted(name for name in ("urllib3", "reportlab") if name in sys.modules),
+}))
+"""
+
+
+def _boot(database_url: str) -> dict:
+    env = dict(os.environ, DATABASE_URL=database_url, VERICYCLE_AUTO_MIGRATE="1")
+    env.pop("VERICYCLE_BOOT_PROFILE", None)
+    env.pop("VERICYCLE_RUNTIME", None)  # conftest turns the worker off; boot it like production
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    line = next(line for line in completed.stdout.splitlines() if line.startswith("BOOT_RESULT "))
+    return json.loads(line[len("BOOT_RESULT "):])
+
+
+def test_import_app_stays_within_boot_budget():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        database_url = f"sqlite:///{tmpdir}/boot.db"
+        _boot(database_url)  # first boot applies migrations and seeds the demo data
+        timings = [_boot(database_url) for _ in range(2)]
+
+    best = min(result["seconds"] for result in timings)
+    assert best < BOOT_BUDGET_SECONDS, f"import app took {best:.2f}s (budget {BOOT_BUDGET_SECONDS}s)"
+    # Outbound HTTP and PDF libraries load on first use, not at boot.
+    assert timings[0]["loaded"] == []
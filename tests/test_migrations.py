@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Runs every migration step on a fresh database while rejecting SQLite-only SQL
+# issued by the app, the way Postgres (DATABASE_URL=postgresql://...) would.
+# SQLite's own inspector still uses PRAGMA through exec_driver_sql (no compiled
+# construct), so only text()/ORM statements are checked.
+PROBE = """
+import json, re
+from sqlalchemy import event
+import app, migrations
+from app import db
+
+SQLITE_ONLY = re.compile(r"\\bPRAGMA\\b|\\bsqlite_master\\b|\\bDATETIME\\b", re.IGNORECASE)
+rejected = []
+
+with app.app.app_context():
+    @event.listens_for(db.engine, "before_cursor_execute")
+    def _reject_sqlite_only(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and context.compiled is not None and SQLITE_ONLY.search(statement):
+            rejected.append(" ".join(statement.split())[:200])
+            raise RuntimeError("SQLite-only statement")
+
+    try:
+        ran = migrations.run_pending(db.session)
+        error = None
+    except Exception as exc:
+        ran, error = [], f"{type(exc).__name__}: {exc}"
+    print("MIGRATE_RESULT " + json.dumps({
+        "ran": ran,
+        "error": error,
+        "rejected": rejected,
+        "pending": [item.name for item in migrations.pending_steps(db.session)],
+    }))
+"""
+
+
+def test_migration_steps_use_no_sqlite_only_sql():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{tmpdir}/migrate.db",
+            VERICYCLE_AUTO_MIGRATE="0",
+            VERICYCLE_RUNTIME="0",
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, timeout=180,
+        )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    line = next(line for line in completed.stdout.splitlines() if line.startswith("MIGRATE_RESULT "))
+    result = json.loads(line[len("MIGRATE_RESULT "):])
+
+    assert result["rejected"] == [], result["rejected"]
+    assert result["error"] is None, result["error"]
+    assert result["ran"] and result["pending"] == []
@@ -0,0 +1,166 @@
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from sqlalchemy import event, func
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app import app, db  # noqa: E402
+from models import Activity, OpportunityAssignment, PickupOpportunity, User  # noqa: E402
+
+ROW_BATCH = 6
+
+
+@contextmanager
+def count_statements(engine):
+    """Count SQL statements issued by this thread."""
+    counter = {"count": 0}
+    thread_id = threading.get_ident()
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread_id:
+            counter["count"] += 1
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+def _user(email: str, role: str) -> User:
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        user = User()
+        user.email = email
+        user.password_hash = "!"
+        db.session.add(user)
+    user.role = role
+    user.full_name = "Pytest Query Count"
+    user.phone_number = "0110000000"
+    user.id_number = user.id_number or f"ID-{uuid4().hex[:8]}"
+    user.address = "Pytest Address"
+    db.session.commit()
+    return user
+
+
+def _top_business() -> User:
+    business = (
+        User.query
+        .filter(func.lower(func.trim(User.role)) == "business")
+        .order_by(User.id.asc())
+        .first()
+    )
+    return business or _user("pytest_querycount_business@example.com", "business")
+
+
+def _add_rows(business_id: int, recycler_id: int, count: int, marker: str) -> None:
+    now = datetime.now(timezone.utc)
+    for idx in range(count):
+        opportunity = PickupOpportunity(
+            source_role="business",
+            source_user_id=business_id,
+            material_type="Plastics",
+            estimated_kg=5.0,
+            location="Pytest Depot",
+            status="submitted" if idx % 2 else "completed",
+            notes=marker,
+            created_at=now - timedelta(minutes=idx),
+        )
+        db.session.add(opportunity)
+        db.session.flush()
+        assignment = OpportunityAssignment(
+            opportunity_id=opportunity.id,
+            recycler_user_id=recycler_id,
+            status="submitted" if idx % 2 else "completed",
+            accepted_at=now - timedelta(minutes=idx),
+            submitted_at=now - timedelta(minutes=idx),
+            submitted_material_type="Plastics",
+            submitted_weight_kg=5.0,
+        )
+        if not idx % 2:
+            activity = Activity(
+                user_id=recycler_id,
+                timestamp=now.isoformat(),
+                desc="Verified Business Pickup (5.0kg of Plastics)",
+                amount=10.0,
+                status="verified",
+                verified_status="verified",
+                pipeline_stage="attested",
+            )
+            db.session.add(activity)
+            db.session.flush()
+            assignment.linked_activity_id = activity.id
+        db.session.add(assignment)
+    db.session.commit()
+
+
+def _remove_rows(marker: str) -> None:
+    opportunity_ids = [
+        row.id for row in PickupOpportunity.query.with_entities(PickupOpportunity.id).filter_by(notes=marker)
+    ]
+    assignments = (
+        OpportunityAssignment.query
+        .with_entities(OpportunityAssignment.id, OpportunityAssignment.linked_activity_id)
+        .filter(OpportunityAssignment.opportunity_id.in_(opportunity_ids))
+        .all()
+    )
+    activity_ids = [row.linked_activity_id for row in assignments if row.linked_activity_id]
+    # Bulk deletes by id: the ORM unit of work would cascade through the
+    # relationships and try to delete the same linked row twice.
+    OpportunityAssignment.query.filter(
+        OpportunityAssignment.id.in_([row.id for row in assignments])
+    ).delete(synchronize_session=False)
+    Activity.query.filter(Activity.id.in_(activity_ids)).delete(synchronize_session=False)
+    PickupOpportunity.query.filter(PickupOpportunity.id.in_(opportunity_ids)).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def _measure(client, engine, user_id: int, path: str) -> int:
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+        session["_fresh"] = True
+    # Warm-up request absorbs one-off demo seeding and cache fills.
+    assert client.get(path).status_code == 200, path
+    with count_statements(engine) as counter:
+        response = client.get(path)
+    assert response.status_code == 200, path
+    return counter["count"]
+
+
+def test_dashboard_endpoints_use_constant_statement_counts():
+    marker = f"[PYTEST-QUERY-COUNT-{uuid4().hex[:8]}]"
+    with app.app_context():
+        business_id = _top_business().id
+        recycler_id = _user("pytest_querycount_recycler@example.com", "collector").id
+        center_id = _user("pytest_querycount_center@example.com", "center").id
+        resident_id = _user("pytest_querycount_resident@example.com", "resident").id
+        engine = db.engine
+    endpoints = [
+        (business_id, "/business"),
+        (recycler_id, "/api/opportunities/my-assignments"),
+        (center_id, "/api/center/submitted-assignments"),
+        (resident_id, "/household"),
+    ]
+
+    try:
+        with app.app_context():
+            _add_rows(business_id, recycler_id, ROW_BATCH, marker)
+        with app.test_client() as client:
+            small = {path: _measure(client, engine, user_id, path) for user_id, path in endpoints}
+
+        with app.app_context():
+            _add_rows(business_id, recycler_id, ROW_BATCH, marker)
+        with app.test_client() as client:
+            large = {path: _measure(client, engine, user_id, path) for user_id, path in endpoints}
+    finally:
+        with app.app_context():
+            _remove_rows(marker)
+
+    assert large == small
@@ -0,0 +1,118 @@
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import case, create_engine, event, or_, select
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import queries  # noqa: E402
+from app import app, db  # noqa: E402
+from models import (  # noqa: E402
+    Activity, AgentCommerceEvent, AgentTask, CommunityHotspot, OpportunityAssignment, PickupOpportunity,
+    User, VerificationSignal, WalletTransaction,
+)
+
+
+@pytest.fixture(scope="module")
+def explain():
+    """Run a statement against an empty copy of the schema and return its EXPLAIN QUERY PLAN details."""
+    engine = create_engine("sqlite://")
+    db.metadata.create_all(engine)
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def _explain(conn, cursor, statement, parameters, context, executemany):
+        return "EXPLAIN QUERY PLAN " + statement, parameters
+
+    def run(statement) -> list[str]:
+        with engine.connect() as conn:
+            return [row[3] for row in conn.execute(statement)]
+
+    yield run
+    engine.dispose()
+
+
+def assert_indexed(plan: list[str], table: str, ordered: bool = False):
+    assert f"SCAN {table}" not in plan, f"full scan of {table}: {plan}"
+    assert any(detail.startswith(f"SEARCH {table} USING") for detail in plan), f"no index search on {table}: {plan}"
+    if ordered:
+        assert not any("TEMP B-TREE FOR ORDER BY" in detail for detail in plan), f"sort not served by index: {plan}"
+
+
+def test_activity_access_paths(explain):
+    assert_indexed(explain(select(Activity).where(Activity.user_id == 1).order_by(Activity.id.desc())),
+                   "activity", ordered=True)
+    assert_indexed(explain(
+        select(Activity).where(Activity.user_id == 1).order_by(Activity.timestamp_utc.desc()).limit(200)
+    ), "activity", ordered=True)
+    assert_indexed(explain(select(Activity).where(Activity.pipeline_stage == "needs_review")), "activity")
+    assert_indexed(explain(select(VerificationSignal).where(VerificationSignal.activity_id == 1)),
+                   "verification_signal")
+
+
+def test_pipeline_access_paths(explain):
+    now = datetime.now(timezone.utc)
+    assert_indexed(explain(
+        select(AgentTask.id).where(AgentTask.activity_id == 1, AgentTask.status.in_(["queued", "running"]))
+    ), "agent_task")
+    # Same shape as the task worker's pick query; the priority sort itself needs a temp b-tree.
+    priority_order = case((AgentTask.agent_name == "CollectorAgent", 1), else_=99)
+    assert_indexed(explain(
+        select(AgentTask)
+        .where(AgentTask.status == "queued", or_(AgentTask.next_run_at.is_(None), AgentTask.next_run_at <= now))
+        .order_by(priority_order.asc(), AgentTask.id.asc())
+        .limit(1)
+    ), "agent_task")
+    assert_indexed(explain(
+        select(AgentCommerceEvent)
+        .where(AgentCommerceEvent.activity_id == 1, AgentCommerceEvent.reason == "verification_fee")
+        .order_by(AgentCommerceEvent.id.desc())
+        .limit(1)
+    ), "agent_commerce_event", ordered=True)
+
+
+def test_opportunity_access_paths(explain):
+    with app.app_context():
+        submitted = queries.submitted_assignments().statement
+        for_recycler = queries.assignments_for_recycler(1).statement
+    assert_indexed(explain(submitted), "opportunity_assignment", ordered=True)
+    assert_indexed(explain(for_recycler), "opportunity_assignment", ordered=True)
+    assert_indexed(explain(
+        select(OpportunityAssignment.id).where(OpportunityAssignment.opportunity_id.in_([1, 2, 3]))
+    ), "opportunity_assignment")
+    assert_indexed(explain(select(OpportunityAssignment).where(OpportunityAssignment.linked_activity_id == 1)),
+                   "opportunity_assignment")
+
+    newest = PickupOpportunity.created_at.desc()
+    assert_indexed(explain(select(PickupOpportunity).where(PickupOpportunity.status == "open").order_by(newest)),
+                   "pickup_opportunity", ordered=True)
+    assert_indexed(explain(
+        select(PickupOpportunity).where(PickupOpportunity.source_role == "resident").order_by(newest)
+    ), "pickup_opportunity", ordered=True)
+    assert_indexed(explain(
+        select(PickupOpportunity)
+        .where(PickupOpportunity.source_user_id == 1, PickupOpportunity.source_role == "business")
+        .order_by(newest)
+    ), "pickup_opportunity", ordered=True)
+
+    # Community hotspot board (_community_hotspot_board_rows): the whole table in board order.
+    plan = explain(select(CommunityHotspot).order_by(
+        CommunityHotspot.board_bucket.asc(),
+        CommunityHotspot.support_count.desc(),
+        CommunityHotspot.report_count.desc(),
+        CommunityHotspot.latest_created_at.asc(),
+    ))
+    assert "SCAN community_hotspot USING INDEX ix_community_hotspot_board_order" in plan, plan
+    assert not any("TEMP B-TREE" in detail for detail in plan), plan
+
+
+def test_user_and_wallet_access_paths(explain):
+    assert_indexed(explain(select(User).where(User.hedera_account_id == "0.0.1234")), "user")
+    assert_indexed(explain(
+        select(WalletTransaction)
+        .where(WalletTransaction.user_id == 1)
+        .order_by(WalletTransaction.created_at.desc(), WalletTransaction.id.desc())
+    ), "wallet_transaction", ordered=True)
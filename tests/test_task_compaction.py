@@ -0,0 +1,69 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agents import queue_stats, task_compaction  # noqa: E402
+from app import app, db  # noqa: E402
+from models import Activity, AgentTask, AgentTaskArchive, User  # noqa: E402
+
+
+def _finished_task_id(activity_id: int, finished_at: datetime) -> int:
+    task = AgentTask(
+        activity_id=activity_id,
+        agent_name="LoggerAgent",
+        task_type="log",
+        status="done",
+        attempts=1,
+        created_at=finished_at,
+        updated_at=finished_at,
+    )
+    db.session.add(task)
+    db.session.commit()
+    task_id = task.id
+    # updated_at has an onupdate default; pin it back to the finish time.
+    AgentTask.query.filter_by(id=task_id).update({"updated_at": finished_at}, synchronize_session=False)
+    db.session.commit()
+    return task_id
+
+
+def test_compacting_every_task_then_inserting_again(tmp_path):
+    lock_path = str(tmp_path / "compaction.lock")
+    later = datetime.now(timezone.utc) + timedelta(days=1)
+    with app.app_context():
+        user = User.query.order_by(User.id.asc()).first()
+        activity = Activity(
+            user_id=user.id,
+            timestamp=datetime.now(timezone.utc).isoformat(),
+            desc="Pytest compaction",
+            amount=0.0,
+            status="verified",
+        )
+        db.session.add(activity)
+        db.session.commit()
+
+        first_id = _finished_task_id(activity.id, datetime.now(timezone.utc) - timedelta(days=30))
+        # Move every finished task out, so agent_task keeps no id at or above this one.
+        task_compaction.compact_finished_tasks(db.session, now=later, older_than_days=0, lock_path=lock_path)
+        assert AgentTask.query.filter(AgentTask.status.in_(("done", "failed"))).count() == 0
+
+        second_id = _finished_task_id(activity.id, datetime.now(timezone.utc) - timedelta(days=30))
+        moved = task_compaction.compact_finished_tasks(db.session, now=later, older_than_days=0,
+                                                       lock_path=lock_path)
+        assert moved == 1
+
+        archived = {
+            row.original_id
+            for row in AgentTaskArchive.query.filter_by(activity_id=activity.id)
+        }
+        assert archived == {first_id, second_id}
+        entries = task_compaction.archived_entries(db.session, [activity.id])[activity.id]
+        assert [entry["id"] for entry in entries] == [second_id]
+
+        archived_done = db.session.query(func.count(AgentTaskArchive.id)).filter_by(status="done").scalar()
+        assert queue_stats.compute_queue_stats(db.session)["done"] >= archived_done